@@ -1,10 +1,21 @@
-from services.request import ingestão_gastos_diretos, request_num_pages
-from services.auxilar import processamento_dados, limpar_dados_raw, listar_arquivos_raw, listar_particoes
-from services.silver_transformer import executar_pipeline
 import os
+import sys
 import time
 
+def limpar_tela():
+    os.system('cls' if os.name == 'nt' else 'clear')
+
 def main():
+    # Importados aqui para que os subcomandos da CLI não paguem o custo do menu
+    from services.request import ingestão_gastos_diretos, request_num_pages
+    from services.auxilar import processamento_dados, limpar_dados_raw, listar_arquivos_raw, listar_particoes, verificar_indice_raw
+    from services.silver_transformer import executar_pipeline, WORKERS_SILVER
+    from services.bronze_compactor import compactar_bronze, COLUNAS_ORDENACAO
+    from services.manifesto import relatorio_faltantes
+    from services.gold import executar_gold
+    from services.leitor_silver import resumo_silver
+    from services.api import iniciar_api, API_HOST, API_PORT
+    from services.replay import replay_raw_para_bronze, WORKERS_REPLAY
 
     while True:
         print("Sistema de Ingestao de Gastos Diretos")
@@ -15,7 +26,13 @@ def main():
         print("4. Limpar Arquivos Raw")
         print("5. Processar Bronze -> Silver")
         print("6. Visualizar Dados Silver")
-        print("7. Sair")
+        print("7. Compactar Particoes Bronze")
+        print("8. Relatorio de Paginas Faltantes")
+        print("9. Verificar/Reconstruir Indice Raw")
+        print("10. Atualizar Camada Gold")
+        print("11. Iniciar API de Consultas")
+        print("12. Replay Raw -> Bronze")
+        print("13. Sair")
         print("-" * 40)
 
         opcao = input("Escolha uma opcao: ")
@@ -29,29 +46,36 @@ def main():
             except Exception as e:
                 print(f"Erro durante a ingestao: {e}")
             input("\nPressione Enter para continuar...")
-            os.system('cls')
+            limpar_tela()
 
         elif opcao == "2":
             listar_arquivos_raw()
             input("\nPressione Enter para continuar...")
-            os.system('cls')
+            limpar_tela()
 
         elif opcao == "3":
             listar_particoes()
             input("\nPressione Enter para continuar...")
-            os.system('cls')
+            limpar_tela()
 
         elif opcao == "4":
             limpar_dados_raw()
             input("\nPressione Enter para continuar...")
-            os.system('cls')
+            limpar_tela()
 
         elif opcao == "5":
             print("\n" + "=" * 60)
             print("PROCESSAMENTO BRONZE -> SILVER")
             print("=" * 60)
+            motor = input("Motor de execucao (pandas/duckdb/spark) [pandas]: ").strip().lower() or "pandas"
+            reprocessar = 's'
+            if motor == "pandas":
+                reprocessar = input("Reprocessar todas as particoes (full refresh)? (s/n): ")
             try:
-                df_silver, validacao = executar_pipeline()
+                df_silver, validacao = executar_pipeline(
+                    streaming=True, incremental=reprocessar.lower() != 's',
+                    workers=WORKERS_SILVER, motor=motor
+                )
                 
                 print("\n" + "=" * 60)
                 print("RESUMO DO PROCESSAMENTO")
@@ -78,48 +102,37 @@ def main():
                 traceback.print_exc()
             
             input("\nPressione Enter para continuar...")
-            os.system('cls')
+            limpar_tela()
 
         elif opcao == "6":
             print("\n" + "=" * 60)
             print("VISUALIZAR DADOS SILVER")
             print("=" * 60)
             try:
-                # Verificar se já existe dados silver
-                from pathlib import Path
-                import pandas as pd
-                
-                silver_path = Path("dataset/silver")
+                print("\nLendo metadados da camada Silver...")
+                resumo = resumo_silver()
                 
-                if not silver_path.exists() or not list(silver_path.glob("**/*.parquet")):
+                if resumo is None:
                     print("\nNenhum dado encontrado na camada Silver.")
                     print("Execute primeiro a opcao 5 (Processar Bronze -> Silver)")
                 else:
-                    print("\nLendo dados da camada Silver...")
-                    
-                    # Ler dados silver
-                    dfs = []
-                    for arquivo in silver_path.glob("**/*.parquet"):
-                        dfs.append(pd.read_parquet(arquivo))
-                    df_silver = pd.concat(dfs, ignore_index=True)
-                    
                     print("\n" + "=" * 60)
                     print("INFORMACOES DOS DADOS SILVER")
                     print("=" * 60)
-                    print(f"\nTotal de registros: {len(df_silver):,}")
-                    print(f"Colunas: {list(df_silver.columns)}")
+                    print(f"\nTotal de registros: {resumo['total_registros']:,} em {resumo['particoes']} particoes")
+                    print(f"Colunas: {resumo['colunas']}")
                     
                     # Estatísticas básicas
-                    if 'valor' in df_silver.columns:
-                        print(f"\nValor total: R$ {df_silver['valor'].sum():,.2f}")
-                        print(f"Valor medio: R$ {df_silver['valor'].mean():,.2f}")
-                        print(f"Valor maximo: R$ {df_silver['valor'].max():,.2f}")
+                    if resumo['valor_total'] is not None:
+                        print(f"\nValor total: R$ {resumo['valor_total']:,.2f}")
+                        print(f"Valor medio: R$ {resumo['valor_medio']:,.2f}")
+                        print(f"Valor maximo: R$ {resumo['valor_maximo']:,.2f}")
                     
-                    if 'ano' in df_silver.columns:
-                        print(f"\nPeriodo: {df_silver['ano'].min():.0f} - {df_silver['ano'].max():.0f}")
+                    if resumo['ano_min'] is not None:
+                        print(f"\nPeriodo: {resumo['ano_min']:.0f} - {resumo['ano_max']:.0f}")
                     
                     print("\nAmostra dos dados:")
-                    print(df_silver.head(10))
+                    print(resumo['amostra'])
                     print("=" * 60)
                     
             except Exception as e:
@@ -128,9 +141,62 @@ def main():
                 traceback.print_exc()
             
             input("\nPressione Enter para continuar...")
-            os.system('cls')
+            limpar_tela()
 
         elif opcao == "7":
+            ordenar = input("Ordenar por orgao/favorecido? (s/n): ")
+            compactar_bronze(ordenar_por=COLUNAS_ORDENACAO if ordenar.lower() == 's' else None)
+            input("\nPressione Enter para continuar...")
+            limpar_tela()
+
+        elif opcao == "8":
+            relatorio_faltantes()
+            input("\nPressione Enter para continuar...")
+            limpar_tela()
+
+        elif opcao == "9":
+            verificar_indice_raw()
+            input("\nPressione Enter para continuar...")
+            limpar_tela()
+
+        elif opcao == "10":
+            motor = input("Motor de execucao (pandas/spark) [pandas]: ").strip().lower() or "pandas"
+            reprocessar = 's'
+            if motor == "pandas":
+                reprocessar = input("Recalcular todos os meses (full refresh)? (s/n): ")
+            try:
+                resultado = executar_gold(incremental=reprocessar.lower() != 's', motor=motor)
+                print(f"\nMeses recalculados: {len(resultado['atualizados'])}")
+                print(f"Meses em cache: {resultado['em_cache']}")
+                if resultado['removidos']:
+                    print(f"Meses removidos: {', '.join(resultado['removidos'])}")
+            except Exception as e:
+                print(f"Erro ao atualizar a gold: {e}")
+            input("\nPressione Enter para continuar...")
+            limpar_tela()
+
+        elif opcao == "11":
+            print(f"API de consultas em http://{API_HOST}:{API_PORT} (Ctrl+C para voltar)")
+            try:
+                iniciar_api()
+            except KeyboardInterrupt:
+                pass
+            limpar_tela()
+
+        elif opcao == "12":
+            print("Intervalo de paginas (Enter em ambos = reconstruir a bronze inteira)")
+            inicio = input("Pagina inicial: ").strip()
+            fim = input("Pagina final: ").strip()
+            try:
+                replay_raw_para_bronze(
+                    int(inicio) if inicio else None, int(fim) if fim else None, workers=WORKERS_REPLAY
+                )
+            except Exception as e:
+                print(f"Erro durante o replay: {e}")
+            input("\nPressione Enter para continuar...")
+            limpar_tela()
+
+        elif opcao == "13":
             print("Saindo...")
             break
         else:
@@ -138,4 +204,7 @@ def main():
             time.sleep(1)
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from services.cli import main as cli
+        sys.exit(cli())
     main()
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+API HTTP de consultas sobre a silver e a gold
+Cada requisição lê apenas as partições e colunas necessárias (services.consulta)
+e respostas repetidas saem do cache LRU.
+
+Uso:
+    python -m services.api
+"""
+
+import os
+
+from flask import Flask, jsonify, request
+
+from services.consulta import (
+    FILTROS, LIMITE_LINHAS_CONSULTA, cache, consultar_gastos, consultar_gold, consultar_registros,
+)
+
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", 5000))
+
+
+def _parametros_comuns():
+    """Intervalo de ano_mes e filtros de igualdade da query string"""
+    return {
+        'ano_mes_inicio': request.args.get('ano_mes_inicio'),
+        'ano_mes_fim': request.args.get('ano_mes_fim'),
+        'filtros': {f: request.args[f] for f in FILTROS if request.args.get(f)},
+    }
+
+
+def _resposta(tabela):
+    return jsonify({'linhas': tabela.num_rows, 'dados': tabela.to_pylist()})
+
+
+def criar_app():
+    """
+    Cria a aplicação Flask
+    Returns:
+        Flask app com as rotas de consulta
+    """
+    app = Flask(__name__)
+    app.json.ensure_ascii = False
+
+    @app.errorhandler(ValueError)
+    def parametro_invalido(erro):
+        return jsonify({'erro': str(erro)}), 400
+
+    @app.errorhandler(FileNotFoundError)
+    def dados_ausentes(erro):
+        return jsonify({'erro': str(erro)}), 404
+
+    @app.get("/saude")
+    def saude():
+        return jsonify({'status': 'ok', 'cache': cache.estatisticas()})
+
+    @app.get("/silver/registros")
+    def registros():
+        colunas = request.args.get('colunas')
+        return _resposta(consultar_registros(
+            **_parametros_comuns(),
+            colunas=colunas.split(',') if colunas else None,
+            limite=request.args.get('limite', LIMITE_LINHAS_CONSULTA, type=int),
+        ))
+
+    @app.get("/silver/gastos")
+    def gastos():
+        return _resposta(consultar_gastos(
+            agrupar_por=request.args.get('agrupar_por', 'orgao'),
+            por_mes=request.args.get('por_mes', '').lower() in ('1', 's', 'true'),
+            **_parametros_comuns(),
+        ))
+
+    @app.get("/gold/<agregado>")
+    def gold(agregado):
+        return _resposta(consultar_gold(
+            agregado, **_parametros_comuns(),
+            limite=request.args.get('limite', LIMITE_LINHAS_CONSULTA, type=int),
+        ))
+
+    return app
+
+
+def iniciar_api(host=API_HOST, port=API_PORT):
+    """Sobe o servidor de desenvolvimento do Flask (uma thread por requisição)"""
+    criar_app().run(host=host, port=port, threaded=True)
+
+
+if __name__ == "__main__":
+    iniciar_api()
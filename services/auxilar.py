@@ -1,13 +1,20 @@
-import pandas as pd
 from pathlib import Path
-import json
-import gzip
 import os
 
+from services.metricas import METRICAS
+from services.formato_raw import listar_arquivos_raw_disco
+from services.indice_raw import (
+    ARQUIVO_INDICE, carregar_indice, reconstruir_indice_raw, verificar_integridade_raw,
+)
+
+@METRICAS.etapa("estatisticas_bronze")
 def processamento_dados():
     """
     Exibe estatísticas dos dados já particionados na bronze
     """
+    import pyarrow.parquet as pq
+    from services.bronze_writer import estatisticas_arquivo
+    
     bronze_path = Path("dataset/bronze")
     
     if not bronze_path.exists():
@@ -31,21 +38,18 @@ def processamento_dados():
         arquivos_parquet = list(particao.glob("*.parquet"))
         
         if arquivos_parquet:
-            # Carregar dados da partição
-            dfs_particao = []
-            for arquivo in arquivos_parquet:
-                df_part = pd.read_parquet(arquivo)
-                dfs_particao.append(df_part)
+            # Estatísticas da partição a partir do rodapé dos arquivos
+            estatisticas = [estatisticas_arquivo(arquivo) for arquivo in arquivos_parquet]
+            registros_particao = sum(e['registros'] for e in estatisticas)
             
-            df_particao = pd.concat(dfs_particao, ignore_index=True) if dfs_particao else pd.DataFrame()
-            
-            if not df_particao.empty:
-                print(f"{ano_mes}: {len(df_particao):,} registros")
-                total_registros += len(df_particao)
+            if registros_particao:
+                print(f"{ano_mes}: {registros_particao:,} registros")
+                total_registros += registros_particao
                 
                 # Mostrar valor total se existir
-                if 'valor' in df_particao.columns:
-                    valor_total = df_particao['valor'].sum()
+                somas = [e['valor_soma'] for e in estatisticas if e['valor_soma'] is not None]
+                if somas:
+                    valor_total = sum(somas)
                     print(f"    Valor: R$ {valor_total:,.2f}")
     
     print("=" * 50)
@@ -56,14 +60,17 @@ def processamento_dados():
         primeira_particao = sorted(particoes)[0]
         arquivos = list(primeira_particao.glob("*.parquet"))
         if arquivos:
-            df_sample = pd.read_parquet(arquivos[0])
+            arquivo_amostra = pq.ParquetFile(arquivos[0])
+            df_sample = next(arquivo_amostra.iter_batches(batch_size=5)).to_pandas()
             print(f"\nColunas disponiveis: {list(df_sample.columns)}")
             print(f"\nAmostra dos dados:")
             print(df_sample.head())
 
+@METRICAS.etapa("listagem_raw")
 def listar_arquivos_raw():
     """
-    Lista todos os arquivos JSON (comprimidos) na pasta raw
+    Lista todos os arquivos JSON (comprimidos) na pasta raw a partir do índice,
+    sem descomprimir os arquivos
     """
     raw_path = Path("dataset/raw")
     
@@ -71,45 +78,73 @@ def listar_arquivos_raw():
         print("Pasta raw não encontrada.")
         return
     
-    # Buscar arquivos .json.gz
-    json_files = list(raw_path.glob("gastos_diretos_page_*.json.gz"))
+    indice = carregar_indice()
     
-    if not json_files:
-        print("Nenhum arquivo JSON comprimido encontrado na pasta raw.")
+    if not indice:
+        if listar_arquivos_raw_disco(raw_path):
+            print("Indice da raw ausente. Use a opcao de verificar/reconstruir o indice.")
+        else:
+            print("Nenhum arquivo JSON comprimido encontrado na pasta raw.")
         return
     
-    print(f"Arquivos JSON comprimidos encontrados ({len(json_files)}):")
+    print(f"Arquivos JSON comprimidos encontrados ({len(indice)}):")
     print("=" * 60)
     
     total_size = 0
     total_records = 0
     
-    for arquivo in sorted(json_files):
-        try:
-            # Ler arquivo comprimido
-            with gzip.open(arquivo, 'rt', encoding='utf-8') as f:
-                dados = json.load(f)
-            
-            num_records = len(dados.get('results', []))
-            file_size = arquivo.stat().st_size
-            total_size += file_size
-            total_records += num_records
-            
-            print(f"{arquivo.name}: {num_records} registros ({file_size/1024:.1f} KB)")
-            
-        except Exception as e:
-            print(f"{arquivo.name}: Erro ao ler arquivo ({e})")
+    for pagina in sorted(indice):
+        entrada = indice[pagina]
+        num_records = entrada['registros']
+        file_size = entrada['bytes_comprimido']
+        total_size += file_size
+        total_records += num_records
+        
+        periodo = entrada['ano_mes_min']
+        if entrada['ano_mes_max'] != periodo:
+            periodo = f"{periodo} a {entrada['ano_mes_max']}"
+        nome = entrada['arquivo'] if entrada.get('offset') is None else f"{entrada['arquivo']} (pagina {pagina})"
+        print(f"{nome}: {num_records} registros ({file_size/1024:.1f} KB) [{periodo}]")
     
     print("=" * 60)
     print(f"Total: {total_records:,} registros em {total_size/1024/1024:.1f} MB")
 
+def verificar_indice_raw():
+    """
+    Verifica o índice da raw contra os arquivos em disco e oferece reconstruí-lo
+    """
+    raw_path = Path("dataset/raw")
+    
+    if not raw_path.exists():
+        print("Pasta raw não encontrada.")
+        return
+    
+    problemas = verificar_integridade_raw()
+    
+    print("Verificacao do indice da raw:")
+    print("=" * 60)
+    print(f"Paginas indexadas sem arquivo: {len(problemas['sem_arquivo'])}")
+    print(f"Arquivos sem entrada no indice: {len(problemas['sem_indice'])}")
+    print(f"Arquivos com tamanho divergente: {len(problemas['tamanho_divergente'])}")
+    print("=" * 60)
+    
+    if any(problemas.values()):
+        resposta = input("Reconstruir o indice a partir dos arquivos? (s/n): ")
+        if resposta.lower() == 's':
+            total = reconstruir_indice_raw()
+            print(f"Indice reconstruido com {total} pagina(s).")
+        else:
+            print("Operacao cancelada.")
+    else:
+        print("Indice consistente com os arquivos.")
+
 def limpar_dados_raw():
     """
     Remove arquivos JSON comprimidos da pasta raw
     """
     raw_path = Path("dataset/raw")
     if raw_path.exists():
-        json_files = list(raw_path.glob("gastos_diretos_page_*.json.gz"))
+        json_files = listar_arquivos_raw_disco(raw_path)
         
         if json_files:
             print(f"Encontrados {len(json_files)} arquivos JSON comprimidos para remover...")
@@ -117,6 +152,7 @@ def limpar_dados_raw():
             if resposta.lower() == 's':
                 for arquivo in json_files:
                     arquivo.unlink()
+                Path(ARQUIVO_INDICE).unlink(missing_ok=True)
                 print("Arquivos JSON removidos com sucesso!")
             else:
                 print("Operacao cancelada.")
@@ -125,10 +161,13 @@ def limpar_dados_raw():
     else:
         print("Pasta raw nao existe.")
 
+@METRICAS.etapa("listagem_bronze")
 def listar_particoes():
     """
     Lista todas as partições disponíveis na bronze
     """
+    import pyarrow.parquet as pq
+    
     bronze_path = Path("dataset/bronze")
     
     if not bronze_path.exists():
@@ -149,10 +188,7 @@ def listar_particoes():
         arquivos = list(particao.glob("*.parquet"))
         total_arquivos = len(arquivos)
         
-        # Contar registros
-        total_registros = 0
-        for arquivo in arquivos:
-            df = pd.read_parquet(arquivo)
-            total_registros += len(df)
+        # Contar registros pelo rodapé dos arquivos, sem ler os dados
+        total_registros = sum(pq.read_metadata(arquivo).num_rows for arquivo in arquivos)
         
         print(f"{ano_mes}: {total_registros:,} registros em {total_arquivos} arquivo(s)")
\ No newline at end of file
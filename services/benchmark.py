@@ -0,0 +1,291 @@
+"""
+Benchmark ponta a ponta do pipeline
+Sobe a API simulada (services/servidor_simulado.py) e, em um diretório de
+trabalho temporário, mede:
+- ingestão: páginas/s de `ingestão_gastos_diretos` contra a API simulada
+- bronze: vazão de gravação do EscritorBronze (registros/s e MB/s)
+- silver: tempo e pico de memória (RSS) de `executar_pipeline` em um processo separado
+- listagens: latência de listar raw, partições da bronze, faltantes e resumo da silver
+
+Cada execução é acrescentada a `benchmarks/resultados.jsonl` com a versão do
+código (commit git) e os parâmetros, e comparada com a última execução de
+mesmos parâmetros para evidenciar regressões.
+
+Uso:
+    python -m services.benchmark --paginas 50 --latencia 0.02
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from services.registro_jsonl import anexar_registro, ler_registros
+from services.servidor_simulado import FonteRaw, FonteSintetica, ServidorSimulado
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o pico de RSS não é medido
+    resource = None
+
+ARQUIVO_RESULTADOS = "benchmarks/resultados.jsonl"
+RAIZ_PROJETO = Path(__file__).resolve().parent.parent
+
+# Métricas em que um valor maior é melhor (as demais são tempos/memória)
+METRICAS_MAIOR_MELHOR = {'ingestao_paginas_s', 'bronze_registros_s', 'bronze_mb_s'}
+
+
+def versao_codigo():
+    """Commit atual (com '+' se houver alterações locais) ou None fora de um repositório git"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ_PROJETO,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        sujo = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=RAIZ_PROJETO,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}+" if sujo else commit
+
+
+def pico_rss_mb():
+    """Maior RSS (MB) deste processo e dos filhos já encerrados"""
+    if resource is None:
+        return None
+    pico = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+@contextlib.contextmanager
+def _silencioso(ativo=True):
+    if not ativo:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def _cronometrar(funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def medir_ingestao(servidor, requisicoes, taxa, verboso=False):
+    from services.request import ingestão_gastos_diretos, request_num_pages
+
+    num_pages = request_num_pages(url=servidor.url)
+    with _silencioso(not verboso):
+        resultado, segundos = _cronometrar(
+            ingestão_gastos_diretos, num_pages, max_requisicoes=requisicoes,
+            requisicoes_por_segundo=taxa, url=servidor.url,
+        )
+    return {
+        'ingestao_s': segundos,
+        'ingestao_paginas': resultado['paginas'],
+        'ingestao_paginas_s': resultado['paginas'] / segundos if segundos else None,
+        'ingestao_registros': resultado['registros'],
+        'ingestao_falhas': len(resultado['falhas']),
+        'servidor_requisicoes': servidor.estatisticas['requisicoes'],
+        'servidor_429': servidor.estatisticas['respostas_429'],
+        'servidor_500': servidor.estatisticas['respostas_500'],
+    }
+
+
+def medir_bronze(fonte, paginas):
+    """Normaliza as páginas antes e mede só a gravação da bronze"""
+    from services.bronze_writer import EscritorBronze
+    from services.esquema import particionar
+    from services.request import normalizar_pagina
+
+    grupos = []
+    for numero in range(1, min(paginas, fonte.paginas) + 1):
+        tabela = normalizar_pagina({'results': fonte.pagina(numero)}, numero)
+        if tabela is None:
+            continue
+        for ano_mes, particao in particionar(tabela):
+            grupos.append((ano_mes, particao, numero))
+
+    destino = Path("bench_bronze")
+    inicio = time.perf_counter()
+    with EscritorBronze(destino) as escritor:
+        for ano_mes, tabela, numero in grupos:
+            escritor.adicionar(ano_mes, tabela, numero)
+    segundos = time.perf_counter() - inicio
+
+    registros = sum(t.num_rows for _, t, _ in grupos)
+    megabytes = sum(a.stat().st_size for a in destino.rglob("*.parquet")) / (1024 * 1024)
+    shutil.rmtree(destino, ignore_errors=True)
+    return {
+        'bronze_s': segundos,
+        'bronze_registros_s': registros / segundos if segundos else None,
+        'bronze_mb_s': megabytes / segundos if segundos else None,
+    }
+
+
+def _executar_silver(workers, fila):
+    from services.silver_transformer import executar_pipeline
+
+    inicio = time.perf_counter()
+    executar_pipeline(streaming=True, incremental=False, workers=workers)
+    fila.put({'silver_s': time.perf_counter() - inicio, 'silver_pico_rss_mb': pico_rss_mb()})
+
+
+def medir_silver(workers):
+    """Roda o pipeline em um processo novo para que o pico de RSS seja só dele"""
+    contexto = multiprocessing.get_context("spawn")
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_executar_silver, args=(workers, fila))
+    processo.start()
+    resultado = fila.get()
+    processo.join()
+    return resultado
+
+
+def medir_listagens(repeticoes=5):
+    from services.auxilar import listar_arquivos_raw, listar_particoes
+    from services.leitor_silver import resumo_silver
+    from services.manifesto import relatorio_faltantes
+
+    listagens = {
+        'listar_raw_ms': listar_arquivos_raw,
+        'listar_bronze_ms': listar_particoes,
+        'listar_faltantes_ms': relatorio_faltantes,
+        'resumo_silver_ms': resumo_silver,
+    }
+    resultados = {}
+    for nome, funcao in listagens.items():
+        tempos = []
+        for _ in range(repeticoes):
+            with _silencioso():
+                _, segundos = _cronometrar(funcao)
+            tempos.append(segundos * 1000)
+        resultados[nome] = sorted(tempos)[len(tempos) // 2]  # mediana
+    return resultados
+
+
+def comparar(atual, anterior):
+    """
+    Variação percentual de cada métrica em relação à execução anterior
+    Returns:
+        dict {metrica: (anterior, atual, variacao_pct, piorou)}
+    """
+    comparacao = {}
+    for nome, valor in atual.items():
+        antigo = anterior.get(nome)
+        if not isinstance(valor, (int, float)) or not isinstance(antigo, (int, float)) or not antigo:
+            continue
+        variacao = (valor - antigo) / antigo * 100
+        piorou = variacao < 0 if nome in METRICAS_MAIOR_MELHOR else variacao > 0
+        comparacao[nome] = (antigo, valor, variacao, piorou)
+    return comparacao
+
+
+def executar_benchmark(paginas=50, tamanho_pagina=1000, raw=None, latencia=0.0, taxa_429=0.0,
+                       taxa_falhas=0.0, requisicoes=8, taxa=1000.0, workers=1,
+                       resultados=ARQUIVO_RESULTADOS, manter=False, verboso=False):
+    """
+    Executa todas as medições em um diretório temporário
+    Args:
+        paginas / tamanho_pagina: escala dos dados sintéticos
+        raw: pasta raw a servir em vez de dados sintéticos
+        latencia / taxa_429 / taxa_falhas: comportamento da API simulada
+        requisicoes / taxa: concorrência e teto de requisições por segundo da ingestão
+        workers: processos do pipeline silver
+        resultados: arquivo JSON Lines com o histórico (None não grava)
+        manter: mantém o diretório de trabalho
+    Returns:
+        dict com parâmetros e métricas
+    """
+    fonte = FonteRaw(Path(raw).resolve(), limite=paginas) if raw else FonteSintetica(paginas, tamanho_pagina)
+    parametros = {
+        'fonte': 'raw' if raw else 'sintetica', 'paginas': fonte.paginas, 'tamanho_pagina': fonte.tamanho_pagina,
+        'latencia': latencia, 'taxa_429': taxa_429, 'taxa_falhas': taxa_falhas,
+        'requisicoes': requisicoes, 'taxa': taxa, 'workers': workers,
+    }
+    resultados = Path(resultados).resolve() if resultados else None
+
+    diretorio = Path(tempfile.mkdtemp(prefix="benchmark_etl_"))
+    original = os.getcwd()
+    os.chdir(diretorio)
+    metricas = {}
+    try:
+        with ServidorSimulado(fonte, latencia=latencia, taxa_429=taxa_429, taxa_falhas=taxa_falhas,
+                              retry_after=0.1) as servidor:
+            print(f"Ingestao: {fonte.paginas} paginas de {servidor.url}")
+            metricas.update(medir_ingestao(servidor, requisicoes, taxa, verboso))
+        print("Gravacao da bronze")
+        metricas.update(medir_bronze(fonte, fonte.paginas))
+        print(f"Pipeline silver ({workers} worker(s))")
+        metricas.update(medir_silver(workers))
+        print("Listagens")
+        metricas.update(medir_listagens())
+    finally:
+        os.chdir(original)
+        if manter:
+            print(f"Diretorio de trabalho mantido em {diretorio}")
+        else:
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+    execucao = {
+        'data': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'versao': versao_codigo(),
+        'python': sys.version.split()[0],
+        'parametros': parametros,
+        'metricas': metricas,
+    }
+
+    anteriores = [r for r in ler_registros(resultados) if r.get('parametros') == parametros] if resultados else []
+    imprimir_resultado(execucao, anteriores[-1] if anteriores else None)
+    if resultados:
+        anexar_registro(resultados, execucao)
+        print(f"Resultado gravado em {resultados}")
+    return execucao
+
+
+def imprimir_resultado(execucao, anterior=None):
+    print("=" * 60)
+    print(f"Benchmark (versao {execucao['versao']})")
+    comparacao = comparar(execucao['metricas'], anterior['metricas']) if anterior else {}
+    for nome, valor in execucao['metricas'].items():
+        texto = f"{valor:,.2f}" if isinstance(valor, float) else f"{valor}"
+        if nome in comparacao:
+            antigo, _, variacao, piorou = comparacao[nome]
+            marca = " (REGRESSAO)" if piorou and abs(variacao) >= 10 else ""
+            texto += f"  [{variacao:+.1f}% vs {anterior['versao']}]{marca}"
+        print(f"  {nome}: {texto}")
+    print("=" * 60)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ponta a ponta contra a API simulada")
+    parser.add_argument("--paginas", type=int, default=50)
+    parser.add_argument("--tamanho-pagina", type=int, default=1000)
+    parser.add_argument("--raw", help="servir as páginas desta pasta raw em vez de dados sintéticos")
+    parser.add_argument("--latencia", type=float, default=0.0, help="latência média (s) da API simulada")
+    parser.add_argument("--taxa-429", type=float, default=0.0)
+    parser.add_argument("--taxa-falhas", type=float, default=0.0)
+    parser.add_argument("--requisicoes", type=int, default=8, help="requisições simultâneas da ingestão")
+    parser.add_argument("--taxa", type=float, default=1000.0, help="teto de requisições por segundo")
+    parser.add_argument("--workers", type=int, default=1, help="processos do pipeline silver")
+    parser.add_argument("--resultados", default=ARQUIVO_RESULTADOS)
+    parser.add_argument("--manter", action="store_true", help="não apagar o diretório de trabalho")
+    parser.add_argument("--verboso", action="store_true", help="mostrar a saída da ingestão")
+    args = parser.parse_args(argv)
+
+    executar_benchmark(
+        args.paginas, args.tamanho_pagina, args.raw, args.latencia, args.taxa_429, args.taxa_falhas,
+        args.requisicoes, args.taxa, args.workers, args.resultados, args.manter, args.verboso,
+    )
+
+
+if __name__ == "__main__":
+    main()
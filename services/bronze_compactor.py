@@ -0,0 +1,157 @@
+"""
+Compactação da camada Bronze
+Junta os vários arquivos pequenos gerados pela ingestão append-only em poucos
+arquivos grandes por partição, opcionalmente ordenados para melhorar a poda
+por estatísticas (min/max) dos row groups
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from services.bronze_writer import com_estatisticas, nome_arquivo_parte, sem_colunas_nulas
+from services.deduplicacao import COLUNA_HASH, hash_tabela
+from services.esquema import conformar_tabela
+
+# Só compacta partições com mais arquivos do que este limite
+MIN_FRAGMENTOS = 8
+# Tamanho alvo (em disco) de cada arquivo compactado
+TAMANHO_ALVO_MB = 128
+# Linhas por row group nos arquivos compactados
+LINHAS_POR_GRUPO = 128 * 1024
+# Colunas de órgão/favorecido como chegam da API
+COLUNAS_ORDENACAO = ['nome_orgao', 'nome_favorecido']
+# Marcador da troca em andamento: arquivos novos (temporário -> destino) e fragmentos a remover
+ARQUIVO_MARCADOR = "_compactacao.json"
+
+
+def concluir_compactacao(particao):
+    """
+    Conclui a troca de arquivos de uma compactação interrompida, se houver
+    O marcador só existe depois que todos os arquivos novos foram gravados,
+    então a troca sempre pode ser refeita até o fim: os temporários que faltam
+    são renomeados e os fragmentos antigos que restam são removidos
+    Returns:
+        True se havia uma compactação pendente
+    """
+    particao = Path(particao)
+    marcador = particao / ARQUIVO_MARCADOR
+    try:
+        with open(marcador, 'r', encoding='utf-8') as f:
+            troca = json.load(f)
+    except FileNotFoundError:
+        return False
+
+    for temporario, destino in troca['novos']:
+        if (particao / temporario).exists():
+            os.replace(particao / temporario, particao / destino)
+    for nome in troca['antigos']:
+        (particao / nome).unlink(missing_ok=True)
+    marcador.unlink()
+    return True
+
+
+def concluir_compactacoes_pendentes(bronze_path="dataset/bronze"):
+    """Conclui as compactações interrompidas de todas as partições (antes de ler a bronze)"""
+    for marcador in Path(bronze_path).glob(f"ano_mes=*/{ARQUIVO_MARCADOR}"):
+        concluir_compactacao(marcador.parent)
+
+
+def compactar_particao(particao, tamanho_alvo_mb=TAMANHO_ALVO_MB,
+                       linhas_por_grupo=LINHAS_POR_GRUPO, ordenar_por=None):
+    """
+    Reescreve uma partição em arquivos do tamanho alvo
+    Args:
+        particao: diretório ano_mes=YYYY_MM
+        tamanho_alvo_mb: tamanho aproximado de cada arquivo gerado
+        linhas_por_grupo: linhas por row group
+        ordenar_por: colunas de ordenação (ignoradas se não existirem)
+    Returns:
+        tuple (arquivos lidos, arquivos gerados)
+    """
+    particao = Path(particao)
+    ano_mes = particao.name.replace("ano_mes=", "")
+    concluir_compactacao(particao)
+    arquivos = sorted(particao.glob("*.parquet"))
+
+    tabelas = []
+    for arquivo in arquivos:
+        tabela = pq.read_table(arquivo)
+        # Arquivos antigos, sem hash de registro: calcular antes de juntar
+        if COLUNA_HASH not in tabela.column_names:
+            tabela = tabela.append_column(COLUNA_HASH, hash_tabela(tabela))
+        # Arquivos antigos, com valor/datas em texto, passam aos tipos do esquema declarado
+        tabelas.append(conformar_tabela(tabela))
+    tabela = sem_colunas_nulas(pa.concat_tables(tabelas, promote_options="permissive"))
+
+    colunas = [c for c in (ordenar_por or []) if c in tabela.column_names]
+    if colunas:
+        tabela = tabela.sort_by([(c, "ascending") for c in colunas])
+
+    # Estimar linhas por arquivo a partir do tamanho atual em disco
+    bytes_disco = sum(a.stat().st_size for a in arquivos)
+    bytes_por_linha = max(bytes_disco / max(tabela.num_rows, 1), 1)
+    linhas_por_arquivo = max(int(tamanho_alvo_mb * 1024 * 1024 / bytes_por_linha), 1)
+
+    # Gravar todos os arquivos novos como temporários antes de trocar
+    temporarios = []
+    for inicio in range(0, max(tabela.num_rows, 1), linhas_por_arquivo):
+        destino = particao / nome_arquivo_parte(ano_mes)
+        temporario = destino.with_name(f".{destino.name}.tmp")
+        pq.write_table(com_estatisticas(tabela.slice(inicio, linhas_por_arquivo)), temporario,
+                       row_group_size=linhas_por_grupo, write_statistics=True)
+        temporarios.append((temporario, destino))
+
+    # O marcador é o ponto de confirmação: sem ele os temporários são
+    # descartáveis; com ele uma troca interrompida é concluída por
+    # concluir_compactacao, sem deixar fragmentos e arquivo novo juntos
+    marcador = particao / ARQUIVO_MARCADOR
+    temporario_marcador = marcador.with_name(f".{marcador.name}.tmp")
+    with open(temporario_marcador, 'w', encoding='utf-8') as f:
+        json.dump({
+            'novos': [[t.name, d.name] for t, d in temporarios],
+            'antigos': [a.name for a in arquivos],
+        }, f)
+    os.replace(temporario_marcador, marcador)
+    concluir_compactacao(particao)
+
+    return len(arquivos), len(temporarios)
+
+
+def compactar_bronze(min_fragmentos=MIN_FRAGMENTOS, tamanho_alvo_mb=TAMANHO_ALVO_MB,
+                     linhas_por_grupo=LINHAS_POR_GRUPO, ordenar_por=None):
+    """
+    Compacta as partições da bronze com mais de `min_fragmentos` arquivos
+    Args:
+        min_fragmentos: partições com até este número de arquivos são ignoradas
+        tamanho_alvo_mb: tamanho aproximado de cada arquivo gerado
+        linhas_por_grupo: linhas por row group
+        ordenar_por: colunas de ordenação, ex.: COLUNAS_ORDENACAO
+    """
+    bronze_path = Path("dataset/bronze")
+
+    if not bronze_path.exists():
+        print("Pasta bronze nao encontrada.")
+        return
+
+    concluir_compactacoes_pendentes(bronze_path)
+    particoes = sorted(bronze_path.glob("ano_mes=*/"))
+    candidatas = [p for p in particoes if len(list(p.glob("*.parquet"))) > min_fragmentos]
+
+    if not candidatas:
+        print(f"Nenhuma particao com mais de {min_fragmentos} arquivos para compactar.")
+        return
+
+    print(f"Compactando {len(candidatas)} de {len(particoes)} particoes:")
+    print("=" * 50)
+
+    for particao in candidatas:
+        ano_mes = particao.name.replace("ano_mes=", "")
+        lidos, gerados = compactar_particao(particao, tamanho_alvo_mb, linhas_por_grupo, ordenar_por)
+        print(f"{ano_mes}: {lidos} arquivo(s) -> {gerados} arquivo(s)")
+
+    print("=" * 50)
+    print("Compactacao concluida.")
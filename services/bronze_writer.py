@@ -0,0 +1,169 @@
+"""
+Escrita append-only na camada Bronze
+Cada descarga grava um novo arquivo parquet na partição, sem reler os existentes
+"""
+
+import json
+import os
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from services.metricas import METRICAS
+
+# Limites do buffer por partição antes de gravar um novo arquivo
+LIMITE_LINHAS = 50_000
+LIMITE_BYTES = 64 * 1024 * 1024
+# Limite do buffer somando todas as partições
+LIMITE_BYTES_TOTAL = 256 * 1024 * 1024
+# Chave dos metadados do rodapé parquet com as estatísticas do arquivo
+CHAVE_ESTATISTICAS = b"estatisticas"
+
+
+def nome_arquivo_parte(ano_mes):
+    """Gera um nome único e ordenável para um novo arquivo da partição"""
+    return f"dados_{ano_mes}_{time.time_ns()}_{uuid.uuid4().hex[:8]}.parquet"
+
+
+def sem_colunas_nulas(tabela):
+    """
+    Troca colunas do tipo null (página em que o campo veio sempre vazio)
+    por string, para que os arquivos da partição tenham esquemas compatíveis
+    """
+    esquema = pa.schema([
+        campo.with_type(pa.string()) if pa.types.is_null(campo.type) else campo
+        for campo in tabela.schema
+    ])
+    return tabela.cast(esquema) if esquema != tabela.schema else tabela
+
+
+def com_estatisticas(tabela):
+    """
+    Anexa ao esquema (rodapé do parquet) o número de registros e a soma de valor,
+    para que listagens respondam sem ler os dados
+    """
+    estatisticas = {'registros': tabela.num_rows}
+    if 'valor' in tabela.column_names:
+        coluna = tabela.column('valor')
+        if pa.types.is_floating(coluna.type) or pa.types.is_integer(coluna.type):
+            estatisticas['valor_soma'] = float(pc.sum(coluna).as_py() or 0.0)
+        else:  # valor em texto (bronze anterior ao esquema declarado)
+            import pandas as pd
+            valores = pd.to_numeric(coluna.to_pandas(), errors='coerce')
+            estatisticas['valor_soma'] = float(valores.sum())
+
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[CHAVE_ESTATISTICAS] = json.dumps(estatisticas).encode()
+    return tabela.replace_schema_metadata(metadados)
+
+
+def estatisticas_arquivo(arquivo):
+    """
+    Lê as estatísticas de um arquivo parquet da bronze pelo rodapé
+    Arquivos antigos, sem estatísticas gravadas, têm apenas a coluna valor lida
+    Returns:
+        dict com 'registros' e 'valor_soma' (None se não houver coluna valor)
+    """
+    metadados = pq.read_metadata(arquivo)
+    chaves = metadados.metadata or {}
+    if CHAVE_ESTATISTICAS in chaves:
+        estatisticas = json.loads(chaves[CHAVE_ESTATISTICAS])
+        return {'registros': metadados.num_rows, 'valor_soma': estatisticas.get('valor_soma')}
+
+    valor_soma = None
+    if 'valor' in metadados.schema.names:
+        import pandas as pd
+        valores = pq.read_table(arquivo, columns=['valor']).column('valor').to_pandas()
+        valor_soma = float(pd.to_numeric(valores, errors='coerce').sum())
+    return {'registros': metadados.num_rows, 'valor_soma': valor_soma}
+
+
+def gravar_parquet_atomico(tabela, arquivo, **opcoes):
+    """
+    Grava a tabela em um arquivo temporário e renomeia ao final,
+    para que leitores nunca vejam um parquet incompleto
+    """
+    arquivo = Path(arquivo)
+    temporario = arquivo.with_name(f".{arquivo.name}.tmp")
+    pq.write_table(tabela, temporario, **opcoes)
+    os.replace(temporario, arquivo)
+
+
+class EscritorBronze:
+    """
+    Buffer de escrita da bronze particionado por ano_mes
+    Args:
+        base_path: diretório da camada bronze
+        limite_linhas: linhas por partição que disparam a gravação
+        limite_bytes: bytes por partição que disparam a gravação
+        limite_bytes_total: bytes somando todas as partições que disparam a gravação geral
+    """
+
+    def __init__(self, base_path="dataset/bronze", limite_linhas=LIMITE_LINHAS,
+                 limite_bytes=LIMITE_BYTES, limite_bytes_total=LIMITE_BYTES_TOTAL):
+        self.base_path = Path(base_path)
+        self.limite_linhas = limite_linhas
+        self.limite_bytes = limite_bytes
+        self.limite_bytes_total = limite_bytes_total
+        self._buffers = defaultdict(list)
+        self._linhas = defaultdict(int)
+        self._bytes = defaultdict(int)
+
+    def adicionar(self, ano_mes, tabela, pagina):
+        """
+        Adiciona registros de uma página ao buffer da partição
+        Args:
+            ano_mes: chave da partição (YYYY_MM)
+            tabela: pyarrow.Table sem a coluna de particionamento
+            pagina: página de origem dos registros
+        """
+        self._buffers[ano_mes].append((pagina, tabela))
+        self._linhas[ano_mes] += tabela.num_rows
+        self._bytes[ano_mes] += tabela.nbytes
+
+        if self._linhas[ano_mes] >= self.limite_linhas or self._bytes[ano_mes] >= self.limite_bytes:
+            self._descarregar_particao(ano_mes)
+        elif sum(self._bytes.values()) >= self.limite_bytes_total:
+            self.descarregar()
+
+    def _descarregar_particao(self, ano_mes):
+        buffer = self._buffers.pop(ano_mes, None)
+        self._linhas.pop(ano_mes, None)
+        self._bytes.pop(ano_mes, None)
+        if not buffer:
+            return
+
+        with METRICAS.etapa("bronze_gravacao", particao=ano_mes):
+            tabela = pa.concat_tables([t for _, t in buffer], promote_options="permissive")
+            tabela = sem_colunas_nulas(tabela)
+
+            partition_path = self.base_path / f"ano_mes={ano_mes}"
+            partition_path.mkdir(parents=True, exist_ok=True)
+            arquivo = partition_path / nome_arquivo_parte(ano_mes)
+            gravar_parquet_atomico(com_estatisticas(tabela), arquivo)
+        METRICAS.contar("registros", tabela.num_rows, etapa="bronze_gravacao")
+        METRICAS.contar("bytes", arquivo.stat().st_size, etapa="bronze_gravacao")
+        METRICAS.contar("arquivos", etapa="bronze_gravacao")
+
+    def descarregar(self):
+        """Grava o buffer de todas as partições"""
+        for ano_mes in list(self._buffers):
+            self._descarregar_particao(ano_mes)
+
+    def paginas_pendentes(self):
+        """Páginas com registros ainda não gravados em disco"""
+        return {pagina for buffer in self._buffers.values() for pagina, _ in buffer}
+
+    def fechar(self):
+        self.descarregar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
@@ -0,0 +1,258 @@
+"""
+Interface de linha de comando não interativa
+Subcomandos para rodar as etapas sem o menu (cron, containers) e um modo
+agendado que repete ciclos incrementais ingestão -> silver. As bibliotecas
+pesadas (pandas, pyarrow, duckdb, pyspark) só são importadas pelos subcomandos que as
+usam, então listagens e status começam em milissegundos.
+
+Uso:
+    python main.py listar raw|bronze|faltantes
+    python main.py ingerir [--requisicoes N] [--taxa R]
+    python main.py silver [--motor pandas|duckdb|spark] [--full] [--workers N]
+    python main.py gold [--motor pandas|spark] [--full]
+    python main.py agendar --intervalo 3600 [--gold]
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+
+def _workers_padrao():
+    return os.cpu_count() or 1
+
+
+def cmd_ingerir(args):
+    from services.request import ingestão_gastos_diretos, request_num_pages
+
+    num_pages = request_num_pages()
+    print(f"Total de paginas encontradas: {num_pages}")
+    opcoes = {}
+    if args.requisicoes:
+        opcoes['max_requisicoes'] = args.requisicoes
+    if args.taxa:
+        opcoes['requisicoes_por_segundo'] = args.taxa
+    ingestão_gastos_diretos(num_pages, **opcoes)
+    return 0
+
+
+def cmd_replay(args):
+    from services.replay import replay_raw_para_bronze
+
+    replay_raw_para_bronze(args.inicio, args.fim, workers=args.workers, forcar=args.forcar)
+    return 0
+
+
+def imprimir_validacao(validacao):
+    """Resumo da validação da silver (mesmo formato da opção 5 do menu)"""
+    print(f"Total de registros processados: {validacao['total_registros']:,}")
+    print(f"Status da validacao: {validacao['status']}")
+    print("Colunas criticas:")
+    for col, stats in validacao['colunas_criticas'].items():
+        print(f"  {col}: {stats['nulos']:,} nulos ({stats['percentual']}%)")
+    for tipo, qtd in validacao['valores_invalidos'].items():
+        if qtd > 0:
+            print(f"  {tipo}: {qtd:,}")
+
+
+def cmd_silver(args):
+    from services.silver_transformer import executar_pipeline
+
+    _, validacao = executar_pipeline(
+        streaming=True, incremental=not args.full, workers=args.workers, motor=args.motor
+    )
+    imprimir_validacao(validacao)
+    return 0
+
+
+def cmd_gold(args):
+    from services.gold import executar_gold
+
+    resultado = executar_gold(incremental=not args.full, motor=args.motor)
+    print(f"Meses recalculados: {len(resultado['atualizados'])} | em cache: {resultado['em_cache']}")
+    if resultado['removidos']:
+        print(f"Meses removidos: {', '.join(resultado['removidos'])}")
+    return 0
+
+
+def cmd_listar(args):
+    if args.alvo == 'raw':
+        from services.auxilar import listar_arquivos_raw
+        listar_arquivos_raw()
+    elif args.alvo == 'bronze':
+        from services.auxilar import listar_particoes
+        listar_particoes()
+    else:
+        from services.manifesto import relatorio_faltantes
+        relatorio_faltantes()
+    return 0
+
+
+def cmd_estatisticas(args):
+    if args.camada == 'bronze':
+        from services.auxilar import processamento_dados
+        processamento_dados()
+        return 0
+
+    from services.leitor_silver import resumo_silver
+    resumo = resumo_silver(tamanho_amostra=args.amostra)
+    if resumo is None:
+        print("Nenhum dado encontrado na camada Silver.")
+        return 1
+    print(f"Total de registros: {resumo['total_registros']:,} em {resumo['particoes']} particoes")
+    print(f"Colunas: {resumo['colunas']}")
+    if resumo['valor_total'] is not None:
+        print(f"Valor total: R$ {resumo['valor_total']:,.2f}")
+        print(f"Valor medio: R$ {resumo['valor_medio']:,.2f}")
+        print(f"Valor maximo: R$ {resumo['valor_maximo']:,.2f}")
+    if resumo['ano_min'] is not None:
+        print(f"Periodo: {resumo['ano_min']:.0f} - {resumo['ano_max']:.0f}")
+    if args.amostra:
+        print(resumo['amostra'])
+    return 0
+
+
+def ciclo_incremental(workers=1, gold=False):
+    """
+    Um ciclo do modo agendado: ingere as páginas que faltam e reprocessa a
+    silver (e a gold) só quando algo mudou
+    Returns:
+        dict {etapa: 'executada' | 'ignorada'}
+    """
+    from services.manifesto import ManifestoIngestao
+    from services.request import ingestão_gastos_diretos, request_num_pages
+
+    etapas = {}
+    num_pages = request_num_pages()
+    faltantes = ManifestoIngestao().faltantes(num_pages)
+    if faltantes:
+        print(f"[agendador] Ingestao: {len(faltantes):,} pagina(s) faltante(s)")
+        ingestão_gastos_diretos(num_pages)
+        etapas['ingestao'] = 'executada'
+    else:
+        print("[agendador] Ingestao: nenhuma pagina nova")
+        etapas['ingestao'] = 'ignorada'
+
+    from services.silver_transformer import executar_pipeline, particoes_desatualizadas
+    try:
+        alteradas = particoes_desatualizadas()
+    except FileNotFoundError as e:
+        print(f"[agendador] Silver: {e}")
+        alteradas = []
+    if alteradas:
+        print(f"[agendador] Silver: {len(alteradas)} particao(oes) alterada(s)")
+        executar_pipeline(streaming=True, incremental=True, workers=workers)
+        etapas['silver'] = 'executada'
+    else:
+        print("[agendador] Silver: nenhuma particao alterada")
+        etapas['silver'] = 'ignorada'
+
+    if gold:
+        if etapas['silver'] == 'executada':
+            from services.gold import executar_gold
+            resultado = executar_gold(incremental=True)
+            print(f"[agendador] Gold: {len(resultado['atualizados'])} mes(es) recalculado(s)")
+            etapas['gold'] = 'executada'
+        else:
+            etapas['gold'] = 'ignorada'
+    return etapas
+
+
+def cmd_agendar(args):
+    from services.metricas import execucao
+
+    ciclo = 0
+    while True:
+        ciclo += 1
+        inicio = time.monotonic()
+        print(f"[agendador] Ciclo {ciclo} iniciado em {time.strftime('%Y-%m-%d %H:%M:%S')}")
+        try:
+            with execucao("ciclo"):
+                ciclo_incremental(args.workers, args.gold)
+        except Exception as e:
+            # Um ciclo com falha não encerra o agendador; o próximo tenta de novo
+            print(f"[agendador] Erro no ciclo {ciclo}: {e}")
+            if args.ciclos == 1:
+                return 1
+        if args.ciclos and ciclo >= args.ciclos:
+            return 0
+        espera = max(args.intervalo - (time.monotonic() - inicio), 0)
+        print(f"[agendador] Proximo ciclo em {espera:.0f}s")
+        time.sleep(espera)
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py", description="ETL de gastos diretos (brasil.io). Sem subcomando, abre o menu."
+    )
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("ingerir", help="baixa as paginas que faltam para raw e bronze")
+    p.add_argument("--requisicoes", type=int, help="requisicoes simultaneas")
+    p.add_argument("--taxa", type=float, help="teto de requisicoes por segundo")
+    p.set_defaults(funcao=cmd_ingerir)
+
+    p = sub.add_parser("replay", help="reconstroi a bronze a partir da raw")
+    p.add_argument("--inicio", type=int, help="pagina inicial (padrao: todas)")
+    p.add_argument("--fim", type=int, help="pagina final (padrao: todas)")
+    p.add_argument("--workers", type=int, default=_workers_padrao())
+    p.add_argument("--forcar", action="store_true",
+                   help="aceita perder da bronze paginas que nao estao na raw")
+    p.set_defaults(funcao=cmd_replay)
+
+    p = sub.add_parser("silver", help="processa bronze -> silver")
+    p.add_argument("--motor", choices=["pandas", "duckdb", "spark"], default="pandas")
+    p.add_argument("--full", action="store_true", help="reprocessa todas as particoes")
+    p.add_argument("--workers", type=int, default=_workers_padrao())
+    p.set_defaults(funcao=cmd_silver)
+
+    p = sub.add_parser("gold", help="atualiza as agregacoes da gold")
+    p.add_argument("--full", action="store_true", help="recalcula todos os meses")
+    p.add_argument("--motor", choices=["pandas", "spark"], default="pandas")
+    p.set_defaults(funcao=cmd_gold)
+
+    p = sub.add_parser("listar", help="lista raw, particoes da bronze ou paginas faltantes")
+    p.add_argument("alvo", choices=["raw", "bronze", "faltantes"])
+    p.set_defaults(funcao=cmd_listar)
+
+    p = sub.add_parser("estatisticas", help="estatisticas da bronze ou da silver")
+    p.add_argument("camada", choices=["bronze", "silver"], nargs="?", default="bronze")
+    p.add_argument("--amostra", type=int, default=0, help="linhas de amostra (silver)")
+    p.set_defaults(funcao=cmd_estatisticas)
+
+    p = sub.add_parser("agendar", help="repete ciclos incrementais ingestao -> silver")
+    p.add_argument("--intervalo", type=float, default=3600, help="segundos entre o inicio dos ciclos")
+    p.add_argument("--ciclos", type=int, default=0, help="numero de ciclos (0 = sem fim)")
+    p.add_argument("--gold", action="store_true", help="atualiza tambem a gold quando a silver mudar")
+    p.add_argument("--workers", type=int, default=_workers_padrao())
+    p.set_defaults(funcao=cmd_agendar)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Executa um subcomando
+    Returns:
+        código de saída (0 sucesso, 1 erro, 130 interrompido)
+    """
+    args = criar_parser().parse_args(argv)
+    from services.metricas import execucao
+
+    # O agendador exporta as métricas a cada ciclo; os demais, ao final do comando
+    medicao = contextlib.nullcontext() if args.comando == "agendar" else execucao(args.comando)
+    try:
+        with medicao:
+            return args.funcao(args)
+    except KeyboardInterrupt:
+        print("Interrompido.")
+        return 130
+    except Exception as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
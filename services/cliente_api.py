@@ -0,0 +1,310 @@
+"""
+Cliente HTTP da API brasil.io
+Conexões reaproveitadas (requests.Session com pool), limite de taxa
+compartilhado, backoff exponencial com jitter, respeito ao Retry-After,
+orçamento de tentativas por página com lista de páginas com falha
+(dead-letter) e um circuit breaker que suspende as requisições quando a API
+falha seguidamente
+"""
+
+import email.utils
+import os
+import random
+import threading
+import time
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from services.metricas import METRICAS
+from services.registro_jsonl import anexar_registro, ler_registros, reescrever_registros
+
+load_dotenv()
+
+URL_API = os.getenv("URL_API", "https://brasil.io/api/v1/dataset/gastos-diretos/gastos/data")
+ARQUIVO_PAGINAS_FALHAS = "dataset/raw/paginas_falhas.jsonl"
+
+# Política de novas tentativas (sobrescrita via .env)
+TENTATIVAS_POR_PAGINA = int(os.getenv("TENTATIVAS_POR_PAGINA", "6"))
+BACKOFF_BASE = float(os.getenv("BACKOFF_BASE", "1.0"))
+BACKOFF_MAXIMO = float(os.getenv("BACKOFF_MAXIMO", "60"))
+TIMEOUT_REQUISICAO = float(os.getenv("TIMEOUT_REQUISICAO", "30"))
+
+# Falhas seguidas que abrem o circuito e pausa (s) antes de testar de novo
+FALHAS_ABERTURA_CIRCUITO = int(os.getenv("FALHAS_ABERTURA_CIRCUITO", "5"))
+PAUSA_CIRCUITO = float(os.getenv("PAUSA_CIRCUITO", "30"))
+
+# Respostas que valem nova tentativa; os demais 4xx são definitivos
+STATUS_TEMPORARIOS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class FalhaRequisicao(Exception):
+    """Página que esgotou as tentativas ou recebeu um erro definitivo"""
+
+    def __init__(self, mensagem, status=None, tentativas=0):
+        super().__init__(mensagem)
+        self.status = status
+        self.tentativas = tentativas
+
+
+class LimitadorTaxa:
+    """
+    Token bucket compartilhado entre as threads de requisição
+    Args:
+        taxa: tokens (requisições) liberados por segundo
+        capacidade: rajada máxima permitida
+    """
+
+    def __init__(self, taxa, capacidade=1):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self._tokens = capacidade
+        self._ultimo = time.monotonic()
+        self._liberado_em = 0.0
+        self._lock = threading.Lock()
+
+    def pausar(self, segundos):
+        """Suspende a liberação de tokens para todas as threads (ex.: Retry-After)"""
+        with self._lock:
+            self._liberado_em = max(self._liberado_em, time.monotonic() + segundos)
+            self._tokens = 0
+
+    def adquirir(self):
+        """Bloqueia até existir um token disponível"""
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                if agora < self._liberado_em:
+                    espera = self._liberado_em - agora
+                else:
+                    inicio = max(self._ultimo, self._liberado_em)
+                    self._tokens = min(self.capacidade, self._tokens + (agora - inicio) * self.taxa)
+                    self._ultimo = agora
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    espera = (1 - self._tokens) / self.taxa
+            time.sleep(espera)
+
+
+class CircuitBreaker:
+    """
+    Suspende as requisições após falhas seguidas
+    Aberto, bloqueia as chamadas até o fim da pausa; depois deixa passar uma
+    única requisição de teste (meio-aberto). Sucesso fecha o circuito, falha
+    reabre com a pausa dobrada (até `pausa_maxima`).
+    Args:
+        limite_falhas: falhas seguidas que abrem o circuito
+        pausa: segundos de espera na primeira abertura
+        pausa_maxima: teto da pausa após reaberturas
+    """
+
+    def __init__(self, limite_falhas=FALHAS_ABERTURA_CIRCUITO, pausa=PAUSA_CIRCUITO,
+                 pausa_maxima=BACKOFF_MAXIMO * 10):
+        self.limite_falhas = limite_falhas
+        self.pausa_inicial = pausa
+        self.pausa_maxima = pausa_maxima
+        self._pausa = pausa
+        self._falhas = 0
+        self._aberto_ate = None
+        self._testando = False
+        self._lock = threading.Lock()
+
+    @property
+    def aberto(self):
+        with self._lock:
+            return self._aberto_ate is not None
+
+    def aguardar(self):
+        """Bloqueia enquanto o circuito estiver aberto ou outra thread estiver testando"""
+        while True:
+            with self._lock:
+                if self._aberto_ate is None:
+                    return
+                agora = time.monotonic()
+                if agora >= self._aberto_ate and not self._testando:
+                    self._testando = True
+                    return
+                espera = max(self._aberto_ate - agora, 0.2)
+            time.sleep(min(espera, 1.0))
+
+    def sucesso(self):
+        with self._lock:
+            if self._aberto_ate is not None:
+                print("Circuito fechado: API respondendo novamente")
+            self._falhas = 0
+            self._aberto_ate = None
+            self._testando = False
+            self._pausa = self.pausa_inicial
+
+    def falha(self):
+        with self._lock:
+            self._falhas += 1
+            if self._testando:
+                # Teste do meio-aberto falhou: reabre com pausa maior
+                self._pausa = min(self._pausa * 2, self.pausa_maxima)
+                self._testando = False
+            elif self._aberto_ate is not None or self._falhas < self.limite_falhas:
+                return
+            self._aberto_ate = time.monotonic() + self._pausa
+            print(f"Circuito aberto apos {self._falhas} falhas seguidas: "
+                  f"pausando requisicoes por {self._pausa:.0f}s")
+
+
+def tempo_retry_after(valor):
+    """
+    Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos
+    Returns:
+        float, ou None se ausente/inválido
+    """
+    if not valor:
+        return None
+    try:
+        return max(float(valor), 0.0)
+    except ValueError:
+        pass
+    try:
+        data = email.utils.parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    return max(data.timestamp() - time.time(), 0.0)
+
+
+class ClienteAPI:
+    """
+    Cliente compartilhado entre as threads de download
+    Args:
+        limitador: LimitadorTaxa (None: sem limite de taxa)
+        max_conexoes: tamanho do pool de conexões HTTP
+        tentativas: orçamento de tentativas por página
+        backoff_base / backoff_maximo: espera (s) da primeira tentativa e teto
+        timeout: timeout (s) de cada requisição
+        circuito: CircuitBreaker (padrão: um novo com os limites do .env)
+        url: endpoint consultado
+    """
+
+    def __init__(self, limitador=None, max_conexoes=4, tentativas=TENTATIVAS_POR_PAGINA,
+                 backoff_base=BACKOFF_BASE, backoff_maximo=BACKOFF_MAXIMO,
+                 timeout=TIMEOUT_REQUISICAO, circuito=None, url=URL_API):
+        self.limitador = limitador
+        self.tentativas = tentativas
+        self.backoff_base = backoff_base
+        self.backoff_maximo = backoff_maximo
+        self.timeout = timeout
+        self.circuito = circuito or CircuitBreaker()
+        self.url = url
+        self.estatisticas = {'requisicoes': 0, 'novas_tentativas': 0, 'retry_after': 0, 'falhas': 0}
+        self._lock = threading.Lock()
+
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=max_conexoes)
+        self.sessao.mount("https://", adaptador)
+        self.sessao.mount("http://", adaptador)
+        self.sessao.headers.update({
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "Authorization": f"Token {os.getenv('API_KEY')}",
+        })
+
+    def _contar(self, chave):
+        with self._lock:
+            self.estatisticas[chave] += 1
+
+    def _backoff(self, tentativa):
+        """Backoff exponencial com jitter completo"""
+        teto = min(self.backoff_maximo, self.backoff_base * 2 ** (tentativa - 1))
+        return random.uniform(0, teto)
+
+    def obter(self, params=None, descricao="requisicao"):
+        """
+        GET no endpoint com novas tentativas
+        Args:
+            params: parâmetros da query string
+            descricao: identificação usada nas mensagens (ex.: "pagina 10")
+        Returns:
+            dict com o JSON da resposta
+        Raises:
+            FalhaRequisicao: erro definitivo (4xx) ou tentativas esgotadas
+        """
+        ultimo_erro, status = None, None
+        for tentativa in range(1, self.tentativas + 1):
+            self.circuito.aguardar()
+            if self.limitador is not None:
+                self.limitador.adquirir()
+            self._contar('requisicoes')
+
+            espera = None
+            try:
+                with METRICAS.etapa("requisicao"):
+                    response = self.sessao.get(self.url, params=params, timeout=self.timeout)
+                status = response.status_code
+                METRICAS.contar(f"http_{status}", etapa="requisicao")
+                METRICAS.contar("bytes", len(response.content), etapa="requisicao")
+                if status == 200:
+                    with METRICAS.etapa("requisicao_json"):
+                        dados = response.json()
+                    self.circuito.sucesso()
+                    return dados
+                ultimo_erro = f"status {status}"
+                if status not in STATUS_TEMPORARIOS:
+                    self.circuito.sucesso()  # a API respondeu; o erro é da requisição
+                    raise FalhaRequisicao(f"{descricao}: {ultimo_erro}", status, tentativa)
+                espera = tempo_retry_after(response.headers.get("Retry-After"))
+                if espera is not None:
+                    self._contar('retry_after')
+                    if self.limitador is not None:
+                        self.limitador.pausar(espera)
+            except requests.RequestException as e:
+                ultimo_erro, status = str(e), None
+                METRICAS.contar("erros_conexao", etapa="requisicao")
+            except ValueError as e:  # JSON inválido
+                ultimo_erro = f"resposta invalida: {e}"
+
+            self.circuito.falha()
+            if tentativa == self.tentativas:
+                break
+            if espera is None:
+                espera = self._backoff(tentativa)
+            self._contar('novas_tentativas')
+            METRICAS.contar("novas_tentativas", etapa="requisicao")
+            print(f"Erro em {descricao} ({ultimo_erro}); "
+                  f"tentativa {tentativa}/{self.tentativas}, nova tentativa em {espera:.1f}s")
+            time.sleep(espera)
+
+        self._contar('falhas')
+        METRICAS.contar("paginas_falhas", etapa="requisicao")
+        raise FalhaRequisicao(f"{descricao}: {ultimo_erro} apos {self.tentativas} tentativas",
+                              status, self.tentativas)
+
+    def fechar(self):
+        self.sessao.close()
+
+
+def registrar_pagina_falha(pagina, erro, caminho=ARQUIVO_PAGINAS_FALHAS):
+    """Acrescenta a página à lista de páginas com falha (dead-letter)"""
+    anexar_registro(caminho, {
+        'pagina': pagina,
+        'erro': str(erro),
+        'status': getattr(erro, 'status', None),
+        'tentativas': getattr(erro, 'tentativas', None),
+        'em': time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+
+
+def paginas_com_falha(caminho=ARQUIVO_PAGINAS_FALHAS):
+    """
+    Páginas na lista de falhas
+    Returns:
+        dict {pagina: último registro de falha}
+    """
+    return {registro['pagina']: registro for registro in ler_registros(caminho) if 'pagina' in registro}
+
+
+def remover_paginas_falhas(paginas, caminho=ARQUIVO_PAGINAS_FALHAS):
+    """Retira da lista de falhas as páginas que foram concluídas depois"""
+    paginas = set(paginas)
+    registros = ler_registros(caminho)
+    restantes = [r for r in registros if r.get('pagina') not in paginas]
+    if len(restantes) != len(registros):
+        reescrever_registros(caminho, restantes)
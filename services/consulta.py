@@ -0,0 +1,228 @@
+"""
+Consultas sobre as camadas silver e gold
+Os filtros de ano_mes escolhem só as partições necessárias e os de órgão/UF
+viram expressões do pyarrow.dataset, avaliadas contra as estatísticas dos row
+groups antes de qualquer leitura. Resultados ficam em um cache LRU cuja chave
+inclui a impressão digital das partições lidas: reescrever uma partição
+invalida as consultas que dependiam dela.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from services.esquema import COLUNAS_TEXTO
+from services.gold import AGREGADOS, CANDIDATOS_DIMENSAO, coluna_dimensao
+from services.leitor_silver import abrir_dataset, selecionar_particoes
+from services.particoes import impressao_digital
+
+CAMADAS = {'silver': "dataset/silver", 'gold': "dataset/gold"}
+
+# Quantidade de resultados mantidos no cache e teto de linhas por resposta
+TAMANHO_CACHE = int(os.getenv("CACHE_CONSULTAS", 128))
+LIMITE_LINHAS_CONSULTA = int(os.getenv("LIMITE_LINHAS_CONSULTA", 10_000))
+
+# Filtros por igualdade aceitos nas consultas (dimensões de CANDIDATOS_DIMENSAO)
+FILTROS = ['orgao', 'uf_favorecido', 'favorecido']
+
+
+class CacheConsultas:
+    """
+    Cache LRU de resultados, seguro para várias threads
+    Args:
+        capacidade: número máximo de resultados guardados
+    """
+
+    def __init__(self, capacidade=TAMANHO_CACHE):
+        self.capacidade = capacidade
+        self.itens = OrderedDict()
+        self.trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave, calcular):
+        """Devolve o resultado em cache ou calcula, guarda e devolve"""
+        with self.trava:
+            if chave in self.itens:
+                self.itens.move_to_end(chave)
+                self.acertos += 1
+                return self.itens[chave]
+            self.falhas += 1
+
+        # Calculado fora da trava: consultas diferentes não se bloqueiam
+        resultado = calcular()
+        with self.trava:
+            self.itens[chave] = resultado
+            self.itens.move_to_end(chave)
+            while len(self.itens) > self.capacidade:
+                self.itens.popitem(last=False)
+        return resultado
+
+    def estatisticas(self):
+        with self.trava:
+            return {'itens': len(self.itens), 'capacidade': self.capacidade,
+                    'acertos': self.acertos, 'falhas': self.falhas}
+
+
+cache = CacheConsultas()
+
+
+def _normalizar_filtros(filtros):
+    """
+    Padroniza os valores dos filtros como a silver padroniza as colunas de
+    COLUNAS_TEXTO (trim + uppercase); os demais só perdem os espaços das pontas
+    """
+    normalizados = {}
+    for dimensao, valor in (filtros or {}).items():
+        if valor is None:
+            continue
+        valor = str(valor).strip()
+        if any(c in COLUNAS_TEXTO for c in CANDIDATOS_DIMENSAO.get(dimensao, ())):
+            valor = valor.upper()
+        normalizados[dimensao] = valor
+    return normalizados
+
+
+def _validar_limite(limite):
+    """Limite de linhas entre 1 e LIMITE_LINHAS_CONSULTA"""
+    limite = int(limite)
+    if limite <= 0:
+        raise ValueError(f"Limite inválido: {limite}. Use um valor entre 1 e {LIMITE_LINHAS_CONSULTA}")
+    return min(limite, LIMITE_LINHAS_CONSULTA)
+
+
+def _validar_colunas(dataset, colunas):
+    """Falha com as colunas pedidas que não existem nos dados"""
+    ausentes = [c for c in colunas or () if c not in dataset.schema.names]
+    if ausentes:
+        raise ValueError(f"Colunas inexistentes: {', '.join(ausentes)}")
+
+
+def _expressao_filtros(dataset, filtros, renomear):
+    """
+    Converte filtros {dimensao: valor} já normalizados em uma expressão do dataset
+    Args:
+        renomear: resolve a coluna da dimensão (silver usa CANDIDATOS_DIMENSAO)
+    """
+    expressao = None
+    for dimensao, valor in filtros.items():
+        if valor is None:
+            continue
+        coluna = renomear(dimensao, dataset.schema.names)
+        if coluna is None:
+            raise ValueError(f"Filtro '{dimensao}' indisponível: coluna ausente nos dados")
+        condicao = ds.field(coluna) == valor
+        expressao = condicao if expressao is None else expressao & condicao
+    return expressao
+
+
+def _coluna_gold(dimensao, colunas):
+    return dimensao if dimensao in colunas else None
+
+
+def _chave(base_path, particoes, *parametros):
+    """Chave de cache: parâmetros + impressão digital das partições lidas"""
+    return (str(base_path), *parametros, tuple((p.name, impressao_digital(p)) for p in particoes))
+
+
+def consultar_registros(ano_mes_inicio=None, ano_mes_fim=None, filtros=None, colunas=None,
+                        limite=LIMITE_LINHAS_CONSULTA, silver_path=CAMADAS['silver']):
+    """
+    Registros da silver filtrados
+    Args:
+        ano_mes_inicio / ano_mes_fim: intervalo de partições (YYYY_MM, inclusivo)
+        filtros: dict {orgao|uf_favorecido|favorecido: valor}
+        colunas: colunas projetadas (padrão: todas)
+        limite: número máximo de linhas
+    Returns:
+        pyarrow.Table
+    """
+    filtros = _normalizar_filtros(filtros)
+    limite = _validar_limite(limite)
+    particoes = selecionar_particoes(silver_path, ano_mes_inicio, ano_mes_fim)
+
+    def calcular():
+        dataset = abrir_dataset(silver_path, particoes)
+        if dataset is None:
+            return pa.table({})
+        _validar_colunas(dataset, colunas)
+        expressao = _expressao_filtros(dataset, filtros, coluna_dimensao)
+        return dataset.head(limite, columns=colunas, filter=expressao)
+
+    chave = _chave(silver_path, particoes, 'registros', tuple(sorted(filtros.items())),
+                   tuple(colunas or ()), limite)
+    return cache.obter(chave, calcular)
+
+
+def consultar_gastos(agrupar_por='orgao', ano_mes_inicio=None, ano_mes_fim=None, filtros=None,
+                     por_mes=False, silver_path=CAMADAS['silver']):
+    """
+    Soma, quantidade e média de valor na silver agrupadas por uma dimensão
+    Lê apenas valor, a dimensão e as colunas filtradas
+    Args:
+        agrupar_por: dimensão (orgao, favorecido, uf_favorecido)
+        por_mes: também agrupa por ano_mes
+    Returns:
+        pyarrow.Table ordenada por valor_total decrescente
+    """
+    if agrupar_por not in CANDIDATOS_DIMENSAO:
+        raise ValueError(f"Agrupamento inválido: {agrupar_por}. Opções: {', '.join(CANDIDATOS_DIMENSAO)}")
+    filtros = _normalizar_filtros(filtros)
+    particoes = selecionar_particoes(silver_path, ano_mes_inicio, ano_mes_fim)
+
+    def calcular():
+        dataset = abrir_dataset(silver_path, particoes)
+        if dataset is None:
+            return pa.table({})
+        coluna = coluna_dimensao(agrupar_por, dataset.schema.names)
+        if coluna is None:
+            raise ValueError(f"Agrupamento '{agrupar_por}' indisponível: coluna ausente nos dados")
+
+        chaves = ['ano_mes', coluna] if por_mes else [coluna]
+        tabela = dataset.to_table(columns=[*chaves, 'valor'],
+                                  filter=_expressao_filtros(dataset, filtros, coluna_dimensao))
+        # Colunas categóricas: cada arquivo traz o próprio dicionário
+        agregado = tabela.unify_dictionaries().group_by(chaves).aggregate([('valor', 'sum'), ('valor', 'count')])
+        agregado = agregado.rename_columns(
+            [{'valor_sum': 'valor_total', 'valor_count': 'quantidade', coluna: agrupar_por}.get(c, c)
+             for c in agregado.column_names]
+        )
+        agregado = agregado.append_column(
+            'valor_medio', pc.divide(agregado['valor_total'], pc.cast(agregado['quantidade'], pa.float64()))
+        )
+        return agregado.sort_by([('valor_total', 'descending')])
+
+    chave = _chave(silver_path, particoes, 'gastos', agrupar_por, tuple(sorted(filtros.items())), por_mes)
+    return cache.obter(chave, calcular)
+
+
+def consultar_gold(agregado, ano_mes_inicio=None, ano_mes_fim=None, filtros=None,
+                   limite=LIMITE_LINHAS_CONSULTA, gold_path=CAMADAS['gold']):
+    """
+    Linhas de um agregado da gold
+    Args:
+        agregado: nome em AGREGADOS
+    Returns:
+        pyarrow.Table com a coluna ano_mes
+    """
+    if agregado not in AGREGADOS:
+        raise ValueError(f"Agregado desconhecido: {agregado}. Opções: {', '.join(AGREGADOS)}")
+    filtros = _normalizar_filtros(filtros)
+    limite = _validar_limite(limite)
+    base_path = Path(gold_path) / agregado
+    particoes = selecionar_particoes(base_path, ano_mes_inicio, ano_mes_fim)
+
+    def calcular():
+        dataset = abrir_dataset(base_path, particoes)
+        if dataset is None:
+            return pa.table({})
+        expressao = _expressao_filtros(dataset, filtros, _coluna_gold)
+        return dataset.head(limite, filter=expressao)
+
+    chave = _chave(base_path, particoes, 'gold', tuple(sorted(filtros.items())), limite)
+    return cache.obter(chave, calcular)
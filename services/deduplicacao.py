@@ -0,0 +1,116 @@
+"""
+Deduplicação por hash de conteúdo
+Cada registro recebe, na gravação da bronze, um hash estável do seu conteúdo
+(`_hash_registro`). A silver mantém por partição um índice ordenado dos hashes
+já vistos, e registros reingeridos (inclusive de páginas que se sobrepõem) são
+descartados comparando apenas os registros novos com esse índice.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+COLUNA_HASH = "_hash_registro"
+# Colunas derivadas na ingestão, que não fazem parte do conteúdo do registro
+COLUNAS_INTERNAS = ['mes_ano', 'ano_mes', '_pagina_origem', COLUNA_HASH]
+
+
+# Codificador do JSON canônico, criado uma vez (json.dumps com opções recria o encoder a cada chamada)
+_CODIFICADOR_CANONICO = json.JSONEncoder(sort_keys=True, separators=(",", ":"),
+                                         ensure_ascii=False, default=str)
+
+
+def hash_registro(registro):
+    """Hash de 64 bits (com sinal) do registro em JSON canônico"""
+    canonico = _CODIFICADOR_CANONICO.encode(registro)
+    digest = hashlib.blake2b(canonico.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+def hash_registros(registros):
+    """
+    Args:
+        registros: lista de dicts como vêm da API
+    Returns:
+        np.ndarray int64 com um hash por registro
+    """
+    return np.fromiter((hash_registro(r) for r in registros), dtype=np.int64, count=len(registros))
+
+
+def hash_dataframe(df):
+    """
+    Recalcula os hashes de registros já carregados em um DataFrame (bronze
+    antiga, gravada sem a coluna de hash), ignorando as colunas internas
+    """
+    conteudo = df.drop(columns=[c for c in COLUNAS_INTERNAS if c in df.columns])
+    conteudo = conteudo.astype(object).where(conteudo.notna(), None)
+    return hash_registros(conteudo.to_dict('records'))
+
+
+def hash_tabela(tabela):
+    """
+    Hashes de uma tabela da bronze gravada sem a coluna de hash (arquivos
+    antigos), calculados sobre os valores como estão no arquivo, antes de
+    qualquer conversão de tipo. Todos os motores usam esta função para que
+    registros antigos e reingeridos tenham o mesmo hash
+    Returns:
+        pyarrow.Array int64
+    """
+    return pa.array(hash_dataframe(tabela.to_pandas()), type=pa.int64())
+
+
+def filtrar_novos(hashes, conhecidos):
+    """
+    Máscara dos registros cujo hash não está no índice nem se repete no lote
+    Args:
+        hashes: np.ndarray int64 do lote
+        conhecidos: np.ndarray int64 ordenado com os hashes já vistos
+    Returns:
+        np.ndarray bool
+    """
+    ja_vistos = np.zeros(len(hashes), dtype=bool)
+    if len(conhecidos):
+        posicoes = np.minimum(np.searchsorted(conhecidos, hashes), len(conhecidos) - 1)
+        ja_vistos = conhecidos[posicoes] == hashes
+
+    primeira_ocorrencia = np.zeros(len(hashes), dtype=bool)
+    primeira_ocorrencia[np.unique(hashes, return_index=True)[1]] = True
+
+    return ~ja_vistos & primeira_ocorrencia
+
+
+class IndiceDeduplicacao:
+    """
+    Índice persistente de hashes por partição (um .npy ordenado por ano_mes)
+    Args:
+        diretorio: pasta dos índices, ex.: dataset/silver/_dedup
+    """
+
+    def __init__(self, diretorio="dataset/silver/_dedup"):
+        self.diretorio = Path(diretorio)
+
+    def _arquivo(self, ano_mes):
+        return self.diretorio / f"ano_mes={ano_mes}.npy"
+
+    def carregar(self, ano_mes):
+        """Hashes já vistos na partição (array vazio se não houver índice)"""
+        try:
+            return np.load(self._arquivo(ano_mes))
+        except FileNotFoundError:
+            return np.empty(0, dtype=np.int64)
+
+    def salvar(self, ano_mes, hashes):
+        """Grava o índice da partição de forma atômica"""
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        arquivo = self._arquivo(ano_mes)
+        temporario = arquivo.with_name(f".{arquivo.name}.tmp")
+        with open(temporario, 'wb') as f:
+            np.save(f, np.unique(hashes).astype(np.int64))
+        os.replace(temporario, arquivo)
+
+    def remover(self, ano_mes):
+        self._arquivo(ano_mes).unlink(missing_ok=True)
@@ -0,0 +1,193 @@
+"""
+Esquema declarado dos registros de gastos-diretos
+Cada página da API é convertida direto em colunas Arrow tipadas: `valor` como
+float, `ano`/`mes` e os códigos numéricos como inteiros pequenos e
+`data_pagamento` como date32. As chaves de partição e `mes_ano` são calculadas
+numericamente a partir de ano/mes, sem concatenar e reinterpretar strings.
+Valores que não convertem para o tipo declarado viram nulos (com aviso);
+campos fora do esquema são mantidos com o tipo inferido pelo Arrow.
+"""
+
+import logging
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logger = logging.getLogger(__name__)
+
+ESQUEMA_GASTOS = pa.schema([
+    ('ano', pa.int16()),
+    ('codigo_acao', pa.string()),  # códigos com zeros à esquerda ("0487")
+    ('codigo_elemento_despesa', pa.int16()),
+    ('codigo_favorecido', pa.string()),  # CPF/CNPJ mascarado
+    ('codigo_funcao', pa.int16()),
+    ('codigo_grupo_despesa', pa.int8()),
+    ('codigo_orgao', pa.int32()),
+    ('codigo_orgao_superior', pa.int32()),
+    ('codigo_programa', pa.int32()),
+    ('codigo_subfuncao', pa.int16()),
+    ('codigo_unidade_gestora', pa.int32()),
+    ('data_pagamento', pa.date32()),
+    # Em pagamentos sigilosos traz um aviso em texto no lugar da data
+    ('data_pagamento_original', pa.string()),
+    ('gestao_pagamento', pa.string()),
+    ('linguagem_cidada', pa.string()),
+    ('mes', pa.int8()),
+    ('nome_acao', pa.string()),
+    ('nome_elemento_despesa', pa.string()),
+    ('nome_favorecido', pa.string()),
+    ('nome_funcao', pa.string()),
+    ('nome_grupo_despesa', pa.string()),
+    ('nome_orgao', pa.string()),
+    ('nome_orgao_superior', pa.string()),
+    ('nome_programa', pa.string()),
+    ('nome_subfuncao', pa.string()),
+    ('nome_unidade_gestora', pa.string()),
+    ('numero_documento', pa.string()),
+    ('valor', pa.float64()),
+])
+
+# Colunas de texto padronizadas na silver (trim + uppercase, gravadas como
+# categóricas): órgão, unidade gestora e favorecido como chegam da API
+COLUNAS_TEXTO = ['nome_orgao', 'nome_orgao_superior', 'nome_unidade_gestora', 'nome_favorecido']
+
+# Erros de conversão do Arrow tratados como valor inválido
+_ERROS_CONVERSAO = (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError)
+
+
+def _converter_valor(valor, tipo):
+    """Converte um valor isolado (None se não couber no tipo)"""
+    if valor is None:
+        return None
+    try:
+        return pa.array([valor]).cast(tipo)[0].as_py()
+    except _ERROS_CONVERSAO:
+        try:
+            return pa.array([str(valor).strip()]).cast(tipo)[0].as_py()
+        except _ERROS_CONVERSAO:
+            return None
+
+
+def converter_coluna(valores, tipo, nome=None):
+    """
+    Converte uma lista de valores Python em um array Arrow do tipo declarado
+    Tenta a conversão direta e, só se a coluna tiver valores inválidos,
+    converte valor a valor anulando os que falham
+    Args:
+        valores: lista com os valores da coluna
+        tipo: pyarrow.DataType de destino
+        nome: nome da coluna (para o aviso de valores inválidos)
+    Returns:
+        pyarrow.Array
+    """
+    try:
+        return pa.array(valores, type=tipo)
+    except _ERROS_CONVERSAO:
+        pass
+
+    convertidos = [_converter_valor(v, tipo) for v in valores]
+    invalidos = sum(1 for v, c in zip(valores, convertidos) if v is not None and c is None)
+    if invalidos:
+        logger.warning(f"Coluna {nome}: {invalidos} valor(es) fora do tipo {tipo} convertidos em nulo")
+    return pa.array(convertidos, type=tipo)
+
+
+def _inferir_coluna(valores):
+    """Campo fora do esquema: tipo inferido, ou texto se os valores forem heterogêneos"""
+    try:
+        return pa.array(valores)
+    except _ERROS_CONVERSAO:
+        return pa.array([None if v is None else str(v) for v in valores], type=pa.string())
+
+
+def tabela_registros(registros, esquema=ESQUEMA_GASTOS):
+    """
+    Converte os registros (dicts) de uma página em uma tabela tipada
+    O Arrow monta as colunas de uma vez a partir dos dicts e cada coluna do
+    esquema é convertida ao tipo declarado (mesmo quando vem toda nula), para
+    que as páginas tenham esquemas compatíveis
+    Args:
+        registros: lista de dicts retornados pela API
+        esquema: pyarrow.Schema declarado
+    Returns:
+        pyarrow.Table com os campos da página nos tipos declarados
+    """
+    try:
+        tabela = pa.Table.from_pylist(registros)
+    except _ERROS_CONVERSAO:
+        # Algum campo com tipos misturados entre registros: inferir coluna a coluna
+        nomes = list(dict.fromkeys(chave for registro in registros for chave in registro))
+        tabela = pa.Table.from_arrays([_inferir_coluna([r.get(nome) for r in registros]) for nome in nomes],
+                                      names=nomes)
+    return conformar_tabela(tabela, esquema)
+
+
+def chave_particao(tabela):
+    """Chave numérica ano * 100 + mes de cada registro (int32)"""
+    ano = pc.cast(tabela.column('ano'), pa.int32())
+    mes = pc.cast(tabela.column('mes'), pa.int32())
+    return pc.add(pc.multiply(ano, 100), mes)
+
+
+def registros_particionaveis(tabela):
+    """Máscara dos registros com ano e mês válidos (1 a 12)"""
+    mes = tabela.column('mes')
+    return pc.and_(
+        pc.is_valid(tabela.column('ano')),
+        pc.fill_null(pc.and_(pc.greater_equal(mes, 1), pc.less_equal(mes, 12)), False),
+    )
+
+
+def coluna_mes_ano(tabela):
+    """Primeiro dia do mês de cada registro (date32), calculado a partir de ano e mes"""
+    ano = tabela.column('ano').to_numpy(zero_copy_only=False).astype(np.int64)
+    mes = tabela.column('mes').to_numpy(zero_copy_only=False).astype(np.int64)
+    meses = ((ano - 1970) * 12 + mes - 1).astype('datetime64[M]')
+    return pa.array(meses.astype('datetime64[D]'), type=pa.date32())
+
+
+def nome_particao(chave):
+    """Chave numérica 201712 -> ano_mes '2017_12'"""
+    return f"{chave // 100}_{chave % 100:02d}"
+
+
+def particionar(tabela):
+    """
+    Separa a tabela pelas partições ano_mes
+    Args:
+        tabela: pyarrow.Table com ano e mes válidos
+    Returns:
+        lista de tuplas (ano_mes, pyarrow.Table) em ordem de partição
+    """
+    chaves = chave_particao(tabela)
+    unicas = sorted(pc.unique(chaves).to_pylist())
+    if len(unicas) == 1:  # páginas costumam cair num só mês
+        return [(nome_particao(unicas[0]), tabela)]
+    return [(nome_particao(chave), tabela.filter(pc.equal(chaves, chave))) for chave in unicas]
+
+
+def conformar_tabela(tabela, esquema=ESQUEMA_GASTOS):
+    """
+    Converte as colunas de uma tabela para os tipos declarados, por cast
+    (ex.: "300.00" -> float, "2017-12-29" -> date32, int64 -> int16).
+    Serve tanto às páginas recém-inferidas quanto aos arquivos da bronze
+    gravados antes do esquema declarado; colunas já tipadas passam sem cópia
+    """
+    for campo in esquema:
+        if campo.name not in tabela.column_names:
+            continue
+        indice = tabela.column_names.index(campo.name)
+        coluna = tabela.column(indice)
+        if coluna.type == campo.type:
+            continue
+        try:
+            convertida = coluna.cast(campo.type)
+        except _ERROS_CONVERSAO:
+            convertida = converter_coluna(coluna.to_pylist(), campo.type, campo.name)
+        tabela = tabela.set_column(indice, campo, convertida)
+    if 'mes_ano' in tabela.column_names and pa.types.is_timestamp(tabela.schema.field('mes_ano').type):
+        indice = tabela.column_names.index('mes_ano')
+        tabela = tabela.set_column(indice, pa.field('mes_ano', pa.date32()),
+                                   tabela.column(indice).cast(pa.date32()))
+    return tabela
@@ -0,0 +1,288 @@
+"""
+Formato de armazenamento da camada Raw
+Cada página pode ser gravada como:
+    json           - um arquivo por página, JSON indentado (layout original)
+    json-compacto  - um arquivo por página, JSON sem espaços
+    ndjson         - segmentos com várias páginas; cada página é um membro
+                     comprimido independente com uma linha de cabeçalho e uma
+                     linha por registro
+O codec (gzip ou zstd) e o nível de compressão são configuráveis. Os leitores
+aceitam todos os layouts, inclusive arquivos antigos e misturados.
+"""
+
+import gzip
+import json
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+
+FORMATOS = ('json', 'json-compacto', 'ndjson')
+EXTENSOES_CODEC = {'gzip': '.gz', 'zstd': '.zst'}
+
+# Padrões (sobrescritos via .env)
+FORMATO_RAW = os.getenv("FORMATO_RAW", "ndjson")
+CODEC_RAW = os.getenv("CODEC_RAW", "zstd")
+NIVEL_COMPRESSAO_RAW = int(os.getenv("NIVEL_COMPRESSAO_RAW", "3"))
+PAGINAS_POR_SEGMENTO = int(os.getenv("PAGINAS_POR_SEGMENTO", "100"))
+
+PADROES_ARQUIVOS_RAW = [
+    f"gastos_diretos_{tipo}_*{extensao}{ext_codec}"
+    for tipo, extensao in (('page', '.json'), ('seg', '.ndjson'))
+    for ext_codec in EXTENSOES_CODEC.values()
+]
+_NOME_SEGMENTO = re.compile(r"gastos_diretos_seg_(\d+)\.ndjson")
+
+
+def listar_arquivos_raw_disco(raw_path="dataset/raw"):
+    """Todos os arquivos de dados da raw (páginas e segmentos, qualquer codec)"""
+    raw_path = Path(raw_path)
+    return sorted({a for padrao in PADROES_ARQUIVOS_RAW for a in raw_path.glob(padrao)})
+
+
+def eh_segmento(arquivo):
+    return "_seg_" in Path(arquivo).name
+
+
+def codec_do_arquivo(arquivo):
+    """Codec pela extensão (.gz ou .zst)"""
+    for codec, extensao in EXTENSOES_CODEC.items():
+        if Path(arquivo).name.endswith(extensao):
+            return codec
+    raise ValueError(f"Codec desconhecido: {arquivo}")
+
+
+def comprimir(conteudo, codec=CODEC_RAW, nivel=NIVEL_COMPRESSAO_RAW):
+    """Comprime bytes em um membro gzip ou frame zstd independente"""
+    if codec == 'gzip':
+        return gzip.compress(conteudo, compresslevel=nivel, mtime=0)
+    if codec == 'zstd':
+        import pyarrow as pa  # só o zstd precisa do pyarrow; listagens não o carregam
+        return pa.Codec('zstd', compression_level=nivel).compress(conteudo, asbytes=True)
+    raise ValueError(f"Codec inválido: {codec}. Opções: {', '.join(EXTENSOES_CODEC)}")
+
+
+def descomprimir(conteudo, codec, tamanho=None):
+    """
+    Descomprime um ou mais membros/frames concatenados
+    Args:
+        tamanho: tamanho descomprimido, quando conhecido (evita o modo streaming do zstd)
+    """
+    if codec == 'gzip':
+        return gzip.decompress(conteudo)
+    import pyarrow as pa
+    if tamanho is not None:
+        return pa.Codec('zstd').decompress(conteudo, decompressed_size=tamanho, asbytes=True)
+    return pa.CompressedInputStream(pa.BufferReader(conteudo), 'zstd').read()
+
+
+def codificar_pagina(dados, pagina, formato):
+    """Serializa uma página no formato escolhido (bytes não comprimidos)"""
+    if formato == 'json':
+        return json.dumps(dados, indent=2).encode('utf-8')
+    if formato == 'json-compacto':
+        return json.dumps(dados, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    resultados = dados.get('results') or []
+    cabecalho = {k: v for k, v in dados.items() if k != 'results'}
+    linhas = [{'_pagina': pagina, '_registros': len(resultados), **cabecalho}, *resultados]
+    return "".join(
+        json.dumps(linha, separators=(',', ':'), ensure_ascii=False) + "\n" for linha in linhas
+    ).encode('utf-8')
+
+
+def decodificar_ndjson(conteudo):
+    """
+    Lê as páginas de um trecho NDJSON (um membro ou um segmento inteiro)
+    Yields:
+        tuplas (pagina, dados)
+    """
+    linhas = iter(conteudo.decode('utf-8').splitlines())
+    for linha in linhas:
+        if not linha:
+            continue
+        cabecalho = json.loads(linha)
+        pagina = cabecalho.pop('_pagina')
+        quantidade = cabecalho.pop('_registros')
+        cabecalho['results'] = [json.loads(next(linhas)) for _ in range(quantidade)]
+        yield pagina, cabecalho
+
+
+def _membros_gzip(conteudo):
+    """Tamanho de cada membro gzip concatenado, descomprimindo em blocos"""
+    visao = memoryview(conteudo)
+    inicio = 0
+    while inicio < len(conteudo):
+        descompressor = zlib.decompressobj(31)
+        lido = inicio
+        while not descompressor.eof and lido < len(conteudo):
+            descompressor.decompress(visao[lido:lido + 65536])
+            lido = min(lido + 65536, len(conteudo))
+        fim = lido - len(descompressor.unused_data)
+        yield inicio, fim - inicio
+        inicio = fim
+
+
+def _membros_zstd(conteudo):
+    """Tamanho de cada frame zstd concatenado, pelos cabeçalhos de frame e de bloco"""
+    inicio = 0
+    while inicio < len(conteudo):
+        descritor = conteudo[inicio + 4]
+        posicao = inicio + 5
+        posicao += 0 if descritor & 0x20 else 1                       # window descriptor
+        posicao += (0, 1, 2, 4)[descritor & 0x03]                    # dictionary id
+        posicao += (1 if descritor & 0x20 else 0, 2, 4, 8)[descritor >> 6]  # content size
+        while True:
+            cabecalho = int.from_bytes(conteudo[posicao:posicao + 3], 'little')
+            tipo, tamanho = (cabecalho >> 1) & 0x03, cabecalho >> 3
+            posicao += 3 + (1 if tipo == 1 else tamanho)
+            if cabecalho & 0x01:
+                break
+        posicao += 4 if descritor & 0x04 else 0                       # checksum
+        yield inicio, posicao - inicio
+        inicio = posicao
+
+
+def ler_arquivo_raw(arquivo):
+    """
+    Lê todas as páginas de um arquivo da raw, em qualquer layout
+    Yields:
+        tuplas (pagina, dados, posicao); posicao é um dict com offset (None nos
+        arquivos por página), bytes_comprimido e bytes_descomprimido
+    """
+    arquivo = Path(arquivo)
+    codec = codec_do_arquivo(arquivo)
+    conteudo = arquivo.read_bytes()
+
+    if not eh_segmento(arquivo):
+        pagina = int(arquivo.name.split("_page_")[1].split(".")[0])
+        descomprimido = descomprimir(conteudo, codec)
+        yield pagina, json.loads(descomprimido), {
+            'offset': None, 'bytes_comprimido': len(conteudo), 'bytes_descomprimido': len(descomprimido),
+        }
+        return
+
+    membros = _membros_gzip(conteudo) if codec == 'gzip' else _membros_zstd(conteudo)
+    for offset, tamanho in membros:
+        descomprimido = descomprimir(conteudo[offset:offset + tamanho], codec)
+        for pagina, dados in decodificar_ndjson(descomprimido):
+            yield pagina, dados, {
+                'offset': offset, 'bytes_comprimido': tamanho, 'bytes_descomprimido': len(descomprimido),
+            }
+
+
+def ler_pagina_raw(entrada, raw_path="dataset/raw"):
+    """
+    Lê uma página a partir da sua entrada no índice; em segmentos com offset
+    apenas o membro da página é lido e descomprimido
+    Returns:
+        dict com o JSON da página
+    """
+    arquivo = Path(raw_path) / entrada['arquivo']
+    codec = entrada.get('codec', 'gzip')
+
+    if entrada.get('offset') is not None:
+        with open(arquivo, 'rb') as f:
+            f.seek(entrada['offset'])
+            membro = f.read(entrada['bytes_comprimido'])
+        _, dados = next(decodificar_ndjson(descomprimir(membro, codec, entrada['bytes_descomprimido'])))
+        return dados
+
+    for pagina, dados, _ in ler_arquivo_raw(arquivo):
+        if pagina == entrada['pagina']:
+            return dados
+    raise FileNotFoundError(f"Página {entrada['pagina']} não encontrada em {arquivo.name}")
+
+
+class EscritorRaw:
+    """
+    Grava páginas na raw no formato e codec configurados
+    No formato ndjson as páginas são acrescentadas ao segmento aberto, que é
+    trocado a cada `paginas_por_segmento` páginas; cada execução começa um
+    segmento novo, então um segmento nunca recebe páginas depois de uma falha.
+    Args:
+        raw_path: diretório da camada raw
+        formato: json, json-compacto ou ndjson
+        codec: gzip ou zstd
+        nivel: nível de compressão do codec
+        paginas_por_segmento: páginas por segmento (formato ndjson)
+    """
+
+    def __init__(self, raw_path="dataset/raw", formato=FORMATO_RAW, codec=CODEC_RAW,
+                 nivel=NIVEL_COMPRESSAO_RAW, paginas_por_segmento=PAGINAS_POR_SEGMENTO):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato raw inválido: {formato}. Opções: {', '.join(FORMATOS)}")
+        if codec not in EXTENSOES_CODEC:
+            raise ValueError(f"Codec inválido: {codec}. Opções: {', '.join(EXTENSOES_CODEC)}")
+        self.raw_path = Path(raw_path)
+        self.formato = formato
+        self.codec = codec
+        self.nivel = nivel
+        self.paginas_por_segmento = paginas_por_segmento
+        self.segmento = None
+        self.arquivo_segmento = None
+        self.paginas_no_segmento = 0
+        self.trava = threading.Lock()
+
+    def salvar(self, dados, pagina):
+        """
+        Grava uma página
+        Returns:
+            dict com arquivo, offset (None fora de segmentos), bytes_comprimido,
+            bytes_descomprimido, formato e codec — a base da entrada no índice
+        """
+        conteudo = codificar_pagina(dados, pagina, self.formato)
+        comprimido = comprimir(conteudo, self.codec, self.nivel)
+
+        with self.trava:
+            if self.formato == 'ndjson':
+                arquivo, offset = self._acrescentar_segmento(comprimido)
+            else:
+                arquivo = self.raw_path / f"gastos_diretos_page_{pagina}.json{EXTENSOES_CODEC[self.codec]}"
+                temporario = arquivo.with_name(f".{arquivo.name}.tmp")
+                temporario.write_bytes(comprimido)
+                os.replace(temporario, arquivo)
+                offset = None
+
+        return {
+            'arquivo': arquivo, 'offset': offset,
+            'bytes_comprimido': len(comprimido), 'bytes_descomprimido': len(conteudo),
+            'formato': self.formato, 'codec': self.codec,
+        }
+
+    def _acrescentar_segmento(self, comprimido):
+        if self.segmento is None or self.paginas_no_segmento >= self.paginas_por_segmento:
+            self._fechar_segmento()
+            self.arquivo_segmento = self._proximo_segmento()
+            self.segmento = open(self.arquivo_segmento, 'ab')
+        offset = self.segmento.tell()
+        self.segmento.write(comprimido)
+        self.segmento.flush()
+        self.paginas_no_segmento += 1
+        return self.arquivo_segmento, offset
+
+    def _proximo_segmento(self):
+        numeros = [
+            int(m.group(1)) for a in self.raw_path.glob("gastos_diretos_seg_*")
+            if (m := _NOME_SEGMENTO.match(a.name))
+        ]
+        numero = max(numeros, default=0) + 1
+        return self.raw_path / f"gastos_diretos_seg_{numero:06d}.ndjson{EXTENSOES_CODEC[self.codec]}"
+
+    def _fechar_segmento(self):
+        if self.segmento is not None:
+            os.fsync(self.segmento.fileno())
+            self.segmento.close()
+            self.segmento = None
+            self.paginas_no_segmento = 0
+
+    def fechar(self):
+        with self.trava:
+            self._fechar_segmento()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
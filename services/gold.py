@@ -0,0 +1,209 @@
+"""
+Módulo da camada Gold
+Materializa agregações por mês a partir da silver (gastos por órgão, por UF e
+maiores favorecidos). Cada agregado é particionado por ano_mes e só os meses
+cuja partição silver mudou são recalculados.
+"""
+
+import logging
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from services.bronze_writer import gravar_parquet_atomico
+from services.metricas import execucao
+from services.particoes import carregar_estado, impressao_digital, salvar_estado
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_ESTADO_GOLD = "dataset/gold/_estado.json"
+# Mudar a versão (ou os agregados) força o recálculo de todos os meses
+VERSAO_GOLD = 1
+
+# Quantos favorecidos entram no ranking de cada mês
+TOP_FAVORECIDOS = 100
+
+# Nome da dimensão na gold -> colunas da silver que podem fornecê-la, em ordem
+# de preferência (a API entrega os nomes como nome_orgao/nome_favorecido)
+CANDIDATOS_DIMENSAO = {
+    'orgao': ['orgao', 'nome_orgao'],
+    'favorecido': ['favorecido', 'nome_favorecido'],
+    'uf_favorecido': ['uf_favorecido'],
+}
+
+# Agregados materializados: dimensão agrupada e, opcionalmente, o tamanho do ranking
+AGREGADOS = {
+    'gastos_orgao_mes': {'dimensao': 'orgao'},
+    'gastos_uf_mes': {'dimensao': 'uf_favorecido'},
+    'top_favorecidos_mes': {'dimensao': 'favorecido', 'top': TOP_FAVORECIDOS},
+}
+
+
+def coluna_dimensao(dimensao, colunas):
+    """Primeira coluna da silver que fornece a dimensão (None se nenhuma existir)"""
+    for candidata in CANDIDATOS_DIMENSAO[dimensao]:
+        if candidata in colunas:
+            return candidata
+    return None
+
+
+def ler_particao_silver(particao):
+    """
+    Lê de uma partição silver apenas `valor` e as colunas de dimensão
+    Args:
+        particao: diretório ano_mes=YYYY_MM da silver
+    Returns:
+        DataFrame com valor e as dimensões disponíveis, já renomeadas
+    """
+    dfs = []
+    for arquivo in sorted(Path(particao).glob("*.parquet")):
+        nomes = pq.read_schema(arquivo).names
+        colunas = {
+            coluna_dimensao(dimensao, nomes): dimensao
+            for dimensao in CANDIDATOS_DIMENSAO
+            if coluna_dimensao(dimensao, nomes)
+        }
+        df = pd.read_parquet(arquivo, columns=['valor', *colunas])
+        dfs.append(df.rename(columns=colunas))
+    return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame(columns=['valor'])
+
+
+def agregar_mes(df, dimensao, top=None):
+    """
+    Soma os gastos de um mês por uma dimensão
+    Args:
+        df: DataFrame retornado por ler_particao_silver
+        dimensao: coluna agrupada
+        top: se informado, mantém só as N maiores somas com a posição no ranking
+    Returns:
+        DataFrame com dimensao, valor_total, quantidade e valor_medio
+        (None se a dimensão não existir na silver)
+    """
+    if dimensao not in df.columns:
+        return None
+
+    agregado = (
+        df.groupby(df[dimensao].astype(object), dropna=False)['valor']
+        .agg(valor_total='sum', quantidade='count')
+        .reset_index()
+    )
+    agregado['valor_medio'] = agregado['valor_total'] / agregado['quantidade']
+    agregado = agregado.sort_values(['valor_total', dimensao], ascending=[False, True], ignore_index=True)
+
+    if top:
+        agregado = agregado.head(top)
+        agregado.insert(0, 'posicao', range(1, len(agregado) + 1))
+    return agregado
+
+
+def atualizar_mes(particao, gold_path):
+    """
+    Recalcula todos os agregados de um mês da silver
+    Returns:
+        dict {agregado: linhas gravadas} (agregados sem a dimensão ficam de fora)
+    """
+    ano_mes = particao.name.replace("ano_mes=", "")
+    df = ler_particao_silver(particao)
+
+    gravados = {}
+    for nome, config in AGREGADOS.items():
+        destino = gold_path / nome / f"ano_mes={ano_mes}"
+        agregado = agregar_mes(df, config['dimensao'], config.get('top'))
+        if agregado is None:
+            shutil.rmtree(destino, ignore_errors=True)
+            continue
+        destino.mkdir(parents=True, exist_ok=True)
+        gravar_parquet_atomico(
+            pa.Table.from_pandas(agregado, preserve_index=False), destino / "dados_gold.parquet"
+        )
+        # Arquivos de outro motor (ex.: Spark) na mesma partição
+        for arquivo in destino.glob("*.parquet"):
+            if arquivo.name != "dados_gold.parquet":
+                arquivo.unlink()
+        gravados[nome] = len(agregado)
+    return gravados
+
+
+@execucao("gold")
+def executar_gold(silver_path="dataset/silver", gold_path="dataset/gold", incremental=True, motor="pandas"):
+    """
+    Atualiza a camada gold a partir da silver
+    Args:
+        silver_path: diretório da camada silver
+        gold_path: diretório da camada gold
+        incremental: recalcula só os meses cuja partição silver mudou
+        motor: "pandas" ou "spark" (jobs PySpark, sempre full refresh)
+    Returns:
+        dict com os meses 'atualizados', 'removidos' e 'em_cache'
+    """
+    if motor == "spark":
+        from services.motor_spark import executar_gold_spark
+        return executar_gold_spark(silver_path, gold_path)
+
+    silver_path = Path(silver_path)
+    gold_path = Path(gold_path)
+    estado_arquivo = gold_path / Path(ARQUIVO_ESTADO_GOLD).name
+
+    particoes = sorted(silver_path.glob("ano_mes=*/"))
+    if not particoes:
+        raise FileNotFoundError("Nenhuma partição encontrada na silver. Execute primeiro o pipeline silver.")
+
+    estado_anterior = carregar_estado(estado_arquivo) if incremental else {}
+    estado = {}
+    atualizados = []
+
+    for particao in particoes:
+        ano_mes = particao.name.replace("ano_mes=", "")
+        impressao = impressao_digital(particao)
+        anterior = estado_anterior.get(ano_mes)
+
+        if anterior and anterior['versao'] == VERSAO_GOLD and anterior['impressao'] == impressao:
+            estado[ano_mes] = anterior
+            continue
+
+        gravados = atualizar_mes(particao, gold_path)
+        logger.info(f"  -> Gold {ano_mes}: " + ", ".join(f"{n} ({q} linhas)" for n, q in gravados.items()))
+        estado[ano_mes] = {'impressao': impressao, 'versao': VERSAO_GOLD, 'agregados': gravados}
+        atualizados.append(ano_mes)
+        salvar_estado(estado_arquivo, {**estado_anterior, **estado})
+
+    # Meses que saíram da silver (ou todos os antigos, num full refresh)
+    removidos = []
+    for nome in AGREGADOS:
+        for destino in (gold_path / nome).glob("ano_mes=*/"):
+            ano_mes = destino.name.replace("ano_mes=", "")
+            if ano_mes not in estado:
+                shutil.rmtree(destino)
+                removidos.append(ano_mes)
+    salvar_estado(estado_arquivo, dict(sorted(estado.items())))
+
+    logger.info(f"Gold: {len(atualizados)} de {len(particoes)} meses recalculados")
+    return {
+        'atualizados': atualizados,
+        'removidos': sorted(set(removidos)),
+        'em_cache': len(particoes) - len(atualizados),
+    }
+
+
+def ler_gold(agregado, gold_path="dataset/gold"):
+    """
+    Lê um agregado da gold (todas as partições)
+    Args:
+        agregado: nome em AGREGADOS, ex.: 'gastos_orgao_mes'
+    Returns:
+        DataFrame com a coluna ano_mes
+    """
+    if agregado not in AGREGADOS:
+        raise ValueError(f"Agregado desconhecido: {agregado}. Opções: {', '.join(AGREGADOS)}")
+
+    dfs = []
+    for arquivo in sorted((Path(gold_path) / agregado).glob("ano_mes=*/*.parquet")):
+        df = pd.read_parquet(arquivo)
+        df.insert(0, 'ano_mes', arquivo.parent.name.replace("ano_mes=", ""))
+        dfs.append(df)
+    if not dfs:
+        raise FileNotFoundError(f"Agregado {agregado} ainda não materializado. Execute a atualização da gold.")
+    return pd.concat(dfs, ignore_index=True)
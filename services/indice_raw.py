@@ -0,0 +1,154 @@
+"""
+Índice dos arquivos da camada Raw
+Mantém, para cada página salva, o número de registros, os tamanhos comprimido
+e descomprimido e o intervalo de ano_mes, para que listagens e verificações
+não precisem descomprimir os arquivos
+"""
+
+from pathlib import Path
+
+from services.formato_raw import codec_do_arquivo, eh_segmento, ler_arquivo_raw, ler_pagina_raw, listar_arquivos_raw_disco
+from services.registro_jsonl import anexar_registro, ler_registros, reescrever_registros
+
+ARQUIVO_INDICE = "dataset/raw/indice_raw.jsonl"
+
+
+def descrever_pagina(dados, pagina, arquivo, bytes_descomprimido, bytes_comprimido=None,
+                     offset=None, formato=None, codec=None):
+    """
+    Monta a entrada do índice para uma página
+    Args:
+        dados: JSON da página
+        pagina: número da página
+        arquivo: caminho do arquivo salvo (a própria página ou o segmento)
+        bytes_descomprimido: tamanho do JSON antes da compressão
+        bytes_comprimido: tamanho gravado (padrão: tamanho do arquivo)
+        offset: início do membro da página dentro do segmento
+        formato / codec: layout gravado (entradas antigas: json + gzip)
+    """
+    resultados = dados.get('results') or []
+    chaves = sorted({
+        f"{r['ano']}_{int(r['mes']):02d}"
+        for r in resultados
+        if r.get('ano') is not None and r.get('mes') is not None
+    })
+    entrada = {
+        'pagina': pagina,
+        'arquivo': Path(arquivo).name,
+        'registros': len(resultados),
+        'bytes_comprimido': Path(arquivo).stat().st_size if bytes_comprimido is None else bytes_comprimido,
+        'bytes_descomprimido': bytes_descomprimido,
+        'ano_mes_min': chaves[0] if chaves else None,
+        'ano_mes_max': chaves[-1] if chaves else None,
+    }
+    if formato is not None:
+        entrada.update(formato=formato, codec=codec, offset=offset)
+    elif codec not in (None, 'gzip'):
+        entrada['codec'] = codec
+    return entrada
+
+
+def registrar_pagina_raw(entrada, caminho=ARQUIVO_INDICE):
+    """Acrescenta a entrada de uma página ao índice"""
+    anexar_registro(caminho, entrada)
+
+
+def carregar_indice(caminho=ARQUIVO_INDICE):
+    """
+    Returns:
+        dict {pagina: entrada}; a entrada mais recente de cada página prevalece
+    """
+    return {entrada['pagina']: entrada for entrada in ler_registros(caminho)}
+
+
+def reconstruir_indice_raw(raw_path="dataset/raw", caminho=ARQUIVO_INDICE):
+    """
+    Regenera o índice lendo todos os arquivos da raw (páginas avulsas e segmentos)
+    Returns:
+        número de páginas indexadas
+    """
+    entradas = {}
+    for arquivo in listar_arquivos_raw_disco(raw_path):
+        try:
+            segmento = eh_segmento(arquivo)
+            for pagina, dados, posicao in ler_arquivo_raw(arquivo):
+                entradas[pagina] = descrever_pagina(
+                    dados, pagina, arquivo, posicao['bytes_descomprimido'], posicao['bytes_comprimido'],
+                    posicao['offset'], 'ndjson' if segmento else None, codec_do_arquivo(arquivo),
+                )
+        except Exception as e:
+            print(f"{arquivo.name}: Erro ao ler arquivo ({e})")
+            continue
+
+    reescrever_registros(caminho, [entradas[p] for p in sorted(entradas)])
+    return len(entradas)
+
+
+def verificar_integridade_raw(raw_path="dataset/raw", caminho=ARQUIVO_INDICE):
+    """
+    Compara o índice com os arquivos em disco (existência e tamanho), sem descomprimir
+    Returns:
+        dict com listas de páginas 'sem_arquivo', 'sem_indice' e 'tamanho_divergente';
+        'sem_indice' inclui, para segmentos, os nomes dos segmentos sem nenhuma página indexada
+    """
+    indice = carregar_indice(caminho)
+    arquivos = {a.name: a for a in listar_arquivos_raw_disco(raw_path)}
+
+    problemas = {'sem_arquivo': [], 'sem_indice': [], 'tamanho_divergente': []}
+    referenciados = set()
+    for pagina, entrada in indice.items():
+        arquivo = arquivos.get(entrada['arquivo'])
+        referenciados.add(entrada['arquivo'])
+        if arquivo is None:
+            problemas['sem_arquivo'].append(pagina)
+        elif entrada.get('offset') is not None:
+            # Segmento: o membro da página precisa caber no arquivo
+            if arquivo.stat().st_size < entrada['offset'] + entrada['bytes_comprimido']:
+                problemas['tamanho_divergente'].append(pagina)
+        elif not eh_segmento(arquivo) and arquivo.stat().st_size != entrada['bytes_comprimido']:
+            problemas['tamanho_divergente'].append(pagina)
+
+    for nome, arquivo in arquivos.items():
+        if eh_segmento(arquivo):
+            if nome not in referenciados:
+                problemas['sem_indice'].append(nome)
+        elif numero_pagina(arquivo) not in indice:
+            problemas['sem_indice'].append(numero_pagina(arquivo))
+
+    return {tipo: sorted(paginas, key=str) for tipo, paginas in problemas.items()}
+
+
+def numero_pagina(arquivo):
+    """Extrai o número da página do nome gastos_diretos_page_N.json.gz"""
+    return int(Path(arquivo).name.split("_page_")[1].split(".")[0])
+
+
+def iterar_paginas_raw(raw_path="dataset/raw", paginas=None):
+    """
+    Percorre as páginas da raw em qualquer layout, arquivo por arquivo
+    Páginas gravadas mais de uma vez (reingestão) saem uma vez só, do arquivo
+    apontado pelo índice
+    Args:
+        paginas: conjunto de páginas desejadas (padrão: todas)
+    Yields:
+        tuplas (pagina, dados)
+    """
+    indice = carregar_indice(Path(raw_path) / Path(ARQUIVO_INDICE).name)
+    if paginas is not None and all(p in indice for p in paginas):
+        # Acesso direto: só o arquivo (ou o membro do segmento) de cada página é lido
+        for pagina in sorted(paginas):
+            yield pagina, ler_pagina_raw(indice[pagina], raw_path)
+        return
+
+    arquivos = listar_arquivos_raw_disco(raw_path)
+    existentes = {a.name for a in arquivos}
+    vistas = set()
+    for arquivo in arquivos:
+        for pagina, dados, _ in ler_arquivo_raw(arquivo):
+            if pagina in vistas or (paginas is not None and pagina not in paginas):
+                continue
+            indicado = indice.get(pagina, {}).get('arquivo')
+            if indicado in existentes and indicado != arquivo.name:
+                continue
+            vistas.add(pagina)
+            yield pagina, dados
@@ -0,0 +1,151 @@
+"""
+Leitura da camada Silver
+Varredura preguiçosa (pyarrow.dataset) com projeção de colunas, filtro por
+intervalo de ano_mes e limite de linhas: só as partições, colunas e lotes
+necessários são lidos.
+"""
+
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from services.esquema import COLUNAS_TEXTO
+from services.metricas import METRICAS
+
+SILVER_PATH = "dataset/silver"
+
+
+def selecionar_particoes(base_path, ano_mes_inicio=None, ano_mes_fim=None):
+    """
+    Poda por partição: diretórios ano_mes=YYYY_MM dentro do intervalo (inclusivo)
+    Returns:
+        lista ordenada de diretórios
+    """
+    particoes = []
+    for particao in sorted(Path(base_path).glob("ano_mes=*/")):
+        ano_mes = particao.name.replace("ano_mes=", "")
+        if ano_mes_inicio and ano_mes < ano_mes_inicio:
+            continue
+        if ano_mes_fim and ano_mes > ano_mes_fim:
+            continue
+        particoes.append(particao)
+    return particoes
+
+
+def _tipo_leitura(campo):
+    """
+    Tipo de uma coluna no esquema unificado: colunas de texto padronizadas e
+    colunas dictionary voltam como dictionary de índices int32, mesmo nos
+    arquivos gravados como string (motores DuckDB/Spark)
+    """
+    tipo = campo.type
+    if pa.types.is_dictionary(tipo):
+        tipo = tipo.value_type
+    if campo.name in COLUNAS_TEXTO or pa.types.is_dictionary(campo.type):
+        if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+            return pa.dictionary(pa.int32(), pa.string())
+    return tipo
+
+
+def abrir_dataset(base_path, particoes):
+    """
+    Dataset pyarrow dos parquets das partições, com ano_mes vindo do caminho.
+    Arquivos com esquemas diferentes (colunas novas, dictionary x string) são
+    lidos com um esquema unificado em que as colunas categóricas continuam
+    dictionary. Nada é lido além dos rodapés.
+    Returns:
+        pyarrow.dataset.Dataset (None se não houver arquivos)
+    """
+    arquivos = [str(a) for p in particoes for a in sorted(p.glob("*.parquet"))]
+    if not arquivos:
+        return None
+
+    esquemas = [pq.read_schema(a).remove_metadata() for a in arquivos]
+    esquema = pa.unify_schemas([
+        pa.schema([campo.with_type(_tipo_leitura(campo)) for campo in e])
+        for e in esquemas
+    ], promote_options='permissive')
+    esquema = esquema.append(pa.field('ano_mes', pa.string()))
+
+    return ds.dataset(
+        arquivos, schema=esquema, format="parquet",
+        partitioning=ds.partitioning(pa.schema([('ano_mes', pa.string())]), flavor="hive"),
+        partition_base_dir=str(base_path),
+    )
+
+
+def ler_silver(colunas=None, ano_mes_inicio=None, ano_mes_fim=None, limite=None, filtro=None,
+               silver_path=SILVER_PATH):
+    """
+    Lê a silver com projeção, intervalo de partições e limite
+    Args:
+        colunas: colunas lidas (padrão: todas, mais ano_mes)
+        ano_mes_inicio / ano_mes_fim: intervalo de partições (YYYY_MM, inclusivo)
+        limite: número máximo de linhas; a leitura para assim que ele é atingido
+        filtro: expressão pyarrow.dataset adicional, ex.: ds.field('valor') > 1000
+    Returns:
+        DataFrame (vazio se não houver dados no intervalo)
+    """
+    dataset = abrir_dataset(silver_path, selecionar_particoes(silver_path, ano_mes_inicio, ano_mes_fim))
+    if dataset is None:
+        return pa.table({c: [] for c in colunas or []}).to_pandas()
+
+    if limite is not None:
+        tabela = dataset.head(limite, columns=colunas, filter=filtro)
+    else:
+        tabela = dataset.to_table(columns=colunas, filter=filtro)
+    return tabela.to_pandas()
+
+
+def contar_registros(particoes):
+    """Número de registros das partições lido só dos rodapés dos parquets"""
+    return sum(pq.read_metadata(a).num_rows for p in particoes for a in p.glob("*.parquet"))
+
+
+@METRICAS.etapa("listagem_silver")
+def resumo_silver(tamanho_amostra=10, silver_path=SILVER_PATH):
+    """
+    Visão geral da silver com memória constante: contagem pelos metadados,
+    estatísticas de valor/ano varrendo só essas colunas lote a lote e uma
+    amostra das primeiras linhas
+    Returns:
+        dict com total_registros, particoes, colunas, valor_total, valor_medio,
+        valor_maximo, ano_min, ano_max e amostra (DataFrame); None se a silver
+        estiver vazia
+    """
+    particoes = selecionar_particoes(silver_path)
+    dataset = abrir_dataset(silver_path, particoes)
+    if dataset is None:
+        return None
+
+    resumo = {
+        'total_registros': contar_registros(particoes),
+        'particoes': len(particoes),
+        'colunas': dataset.schema.names,
+        'valor_total': None, 'valor_medio': None, 'valor_maximo': None,
+        'ano_min': None, 'ano_max': None,
+    }
+
+    colunas = [c for c in ('valor', 'ano') if c in dataset.schema.names]
+    soma, contagem, maximo, ano_min, ano_max = 0.0, 0, None, None, None
+    for lote in dataset.to_batches(columns=colunas):
+        if 'valor' in colunas:
+            soma += pc.sum(lote['valor']).as_py() or 0.0
+            contagem += pc.count(lote['valor']).as_py()
+            maximo_lote = pc.max(lote['valor']).as_py()
+            if maximo_lote is not None:
+                maximo = maximo_lote if maximo is None else max(maximo, maximo_lote)
+        if 'ano' in colunas:
+            extremos = pc.min_max(lote['ano']).as_py()
+            if extremos['min'] is not None:
+                ano_min = extremos['min'] if ano_min is None else min(ano_min, extremos['min'])
+                ano_max = extremos['max'] if ano_max is None else max(ano_max, extremos['max'])
+
+    if 'valor' in colunas:
+        resumo.update(valor_total=soma, valor_medio=soma / contagem if contagem else None, valor_maximo=maximo)
+    resumo.update(ano_min=ano_min, ano_max=ano_max)
+    resumo['amostra'] = dataset.head(tamanho_amostra).to_pandas()
+    return resumo
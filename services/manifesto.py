@@ -0,0 +1,156 @@
+"""
+Manifesto de ingestão
+Registra cada página concluída (número de registros e hash do conteúdo) em um
+arquivo append-only, permitindo baixar páginas fora de ordem e retomar apenas
+as que faltam após uma interrupção
+"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+
+from services.metricas import METRICAS
+from services.registro_jsonl import anexar_registro, ler_registros, reescrever_registros
+
+ARQUIVO_MANIFESTO = "dataset/raw/manifesto.jsonl"
+ARQUIVO_CHECKPOINT_LEGADO = "dataset/raw/checkpoint.txt"
+PAGINA_INICIAL = 1
+
+
+def hash_conteudo(dados):
+    """SHA-256 dos registros da página em forma canônica"""
+    canonico = json.dumps(dados.get('results') or [], sort_keys=True,
+                          separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+
+def agrupar_faixas(paginas):
+    """
+    Agrupa números de página em faixas contíguas
+    Returns:
+        lista de tuplas (inicio, fim) inclusivas
+    """
+    faixas = []
+    for pagina in sorted(paginas):
+        if faixas and pagina == faixas[-1][1] + 1:
+            faixas[-1][1] = pagina
+        else:
+            faixas.append([pagina, pagina])
+    return [tuple(f) for f in faixas]
+
+
+def _paginas_checkpoint_legado():
+    """Páginas do checkpoint de inteiro único (2..N-1 concluídas); vazio se não houver"""
+    try:
+        with open(ARQUIVO_CHECKPOINT_LEGADO, 'r') as f:
+            proxima = int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return {}
+    return {
+        pagina: {'pagina': pagina, 'registros': None, 'sha256': None, 'origem': 'checkpoint'}
+        for pagina in range(2, proxima)
+    }
+
+
+class ManifestoIngestao:
+    """
+    Conjunto durável de páginas concluídas
+    Args:
+        caminho: arquivo JSON Lines do manifesto
+    """
+
+    def __init__(self, caminho=ARQUIVO_MANIFESTO):
+        self.caminho = Path(caminho)
+        self.paginas = {}
+        self.total_paginas = None
+
+        for registro in ler_registros(self.caminho):
+            if 'total_paginas' in registro:
+                self.total_paginas = registro['total_paginas']
+            elif 'pagina' in registro:
+                self.paginas[registro['pagina']] = registro
+
+        # Sem manifesto, as páginas do checkpoint antigo valem em memória; o
+        # arquivo só é criado na primeira gravação, e a leitura não tem efeitos
+        self._migracao_pendente = False
+        if not self.caminho.exists():
+            self.paginas = _paginas_checkpoint_legado()
+            self._migracao_pendente = bool(self.paginas)
+
+    def _persistir_migracao(self):
+        """Grava no manifesto as páginas importadas do checkpoint antigo"""
+        if self._migracao_pendente:
+            self.compactar()
+
+    def definir_total(self, total_paginas):
+        """Guarda o total de páginas conhecido na última consulta à API"""
+        if total_paginas != self.total_paginas:
+            self._persistir_migracao()
+            anexar_registro(self.caminho, {'total_paginas': total_paginas})
+            self.total_paginas = total_paginas
+
+    def registrar(self, pagina, registros, sha256):
+        """
+        Marca uma página como concluída
+        Args:
+            pagina: número da página
+            registros: quantidade de registros da página
+            sha256: hash do conteúdo (hash_conteudo)
+        """
+        registro = {
+            'pagina': pagina,
+            'registros': registros,
+            'sha256': sha256,
+            'concluida_em': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        self._persistir_migracao()
+        anexar_registro(self.caminho, registro)
+        self.paginas[pagina] = registro
+
+    def concluida(self, pagina):
+        return pagina in self.paginas
+
+    def faltantes(self, total_paginas=None, inicio=PAGINA_INICIAL):
+        """Páginas ainda não concluídas entre `inicio` e o total"""
+        total_paginas = total_paginas or self.total_paginas or 0
+        return [p for p in range(inicio, total_paginas + 1) if p not in self.paginas]
+
+    def compactar(self):
+        """Reescreve o manifesto com uma linha por página, sem histórico"""
+        registros = []
+        if self.total_paginas is not None:
+            registros.append({'total_paginas': self.total_paginas})
+        registros.extend(self.paginas[p] for p in sorted(self.paginas))
+        reescrever_registros(self.caminho, registros)
+        self._migracao_pendente = False
+
+
+@METRICAS.etapa("listagem_faltantes")
+def relatorio_faltantes(total_paginas=None, caminho=ARQUIVO_MANIFESTO):
+    """
+    Exibe as páginas que faltam ingerir, agrupadas em faixas
+    Args:
+        total_paginas: total de páginas (padrão: último total gravado no manifesto)
+    """
+    manifesto = ManifestoIngestao(caminho)
+    total = total_paginas or manifesto.total_paginas
+
+    if not total:
+        print("Total de paginas desconhecido. Execute a ingestao ao menos uma vez.")
+        return
+
+    faltantes = manifesto.faltantes(total)
+    concluidas = len([p for p in manifesto.paginas if p <= total])
+    registros = sum(r.get('registros') or 0 for r in manifesto.paginas.values())
+
+    print("Manifesto de ingestao:")
+    print("=" * 50)
+    print(f"Paginas concluidas: {concluidas:,} de {total:,} ({registros:,} registros)")
+    print(f"Paginas faltantes: {len(faltantes):,}")
+
+    faixas = agrupar_faixas(faltantes)
+    for inicio, fim in faixas[:20]:
+        print(f"  {inicio}" if inicio == fim else f"  {inicio}-{fim}")
+    if len(faixas) > 20:
+        print(f"  ... e mais {len(faixas) - 20} faixa(s)")
@@ -0,0 +1,324 @@
+"""
+Instrumentação do pipeline
+Registra a duração de cada etapa (spans e histogramas), contadores de
+registros e bytes, e exporta tudo em um relatório JSON por execução e em um
+arquivo texto no formato do Prometheus (textfile collector). Uma etapa pode
+ser perfilada com cProfile ou pyinstrument via PERFILAR_ETAPAS.
+
+Uso:
+    with METRICAS.etapa("bronze_gravacao", particao=ano_mes):
+        ...
+    @METRICAS.etapa("silver_validacao")   # cada chamada vira um span
+    def validar_qualidade(df): ...
+    METRICAS.contar("bytes", len(conteudo), etapa="raw_gravacao")
+
+    @execucao("ingestao")   # zera ao entrar e, no final, grava JSON + Prometheus
+    def ingestão_gastos_diretos(...): ...
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+DIRETORIO_METRICAS = os.getenv("DIRETORIO_METRICAS", "dataset/metricas")
+# Um arquivo etl_<execucao>.prom por tipo de execução (diretório do textfile collector)
+DIRETORIO_PROMETHEUS = os.getenv("DIRETORIO_PROMETHEUS", DIRETORIO_METRICAS)
+
+# Etapas perfiladas (separadas por vírgula) e perfilador: cprofile ou pyinstrument
+PERFILAR_ETAPAS = {e.strip() for e in os.getenv("PERFILAR_ETAPAS", "").split(",") if e.strip()}
+PERFILADOR = os.getenv("PERFILADOR", "cprofile")
+
+# Limites (s) dos buckets dos histogramas e spans guardados no relatório
+BUCKETS_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LIMITE_SPANS = 10_000
+
+
+class Histograma:
+    """Contagem por bucket, soma, mínimo e máximo das durações de uma etapa"""
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS_SEGUNDOS)
+        self.quantidade = 0
+        self.soma = 0.0
+        self.minimo = None
+        self.maximo = None
+
+    def observar(self, valor):
+        for i, limite in enumerate(BUCKETS_SEGUNDOS):
+            if valor <= limite:
+                self.buckets[i] += 1
+                break
+        self.quantidade += 1
+        self.soma += valor
+        self.minimo = valor if self.minimo is None else min(self.minimo, valor)
+        self.maximo = valor if self.maximo is None else max(self.maximo, valor)
+
+    def combinar(self, outro):
+        self.buckets = [a + b for a, b in zip(self.buckets, outro['buckets'])]
+        self.quantidade += outro['quantidade']
+        self.soma += outro['soma']
+        for chave, funcao in (('minimo', min), ('maximo', max)):
+            if outro[chave] is not None:
+                atual = getattr(self, chave)
+                setattr(self, chave, outro[chave] if atual is None else funcao(atual, outro[chave]))
+
+    def quantil(self, q):
+        """Limite superior do bucket que contém o quantil q (estimativa)"""
+        alvo = q * self.quantidade
+        acumulado = 0
+        for limite, contagem in zip(BUCKETS_SEGUNDOS, self.buckets):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+    def resumo(self):
+        return {
+            'quantidade': self.quantidade,
+            'soma': self.soma,
+            'media': self.soma / self.quantidade if self.quantidade else None,
+            'minimo': self.minimo,
+            'maximo': self.maximo,
+            'p50': self.quantil(0.5) if self.quantidade else None,
+            'p95': self.quantil(0.95) if self.quantidade else None,
+            'buckets': list(self.buckets),
+        }
+
+
+class RegistroMetricas:
+    """
+    Métricas de uma execução, compartilhadas entre threads
+    Processos filhos devolvem `estado()` para o processo principal `combinar()`
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.inicio = time.time()
+            self._referencia = time.perf_counter()
+            self.histogramas = {}
+            self.contadores = {}
+            self.spans = []
+            self.spans_descartados = 0
+
+    @contextlib.contextmanager
+    def etapa(self, nome, **atributos):
+        """Mede o bloco como um span da etapa `nome` (perfilado se estiver em PERFILAR_ETAPAS)"""
+        perfil = perfilar(nome) if nome in PERFILAR_ETAPAS else contextlib.nullcontext()
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            with perfil:
+                yield
+        except BaseException as e:
+            erro = type(e).__name__
+            raise
+        finally:
+            self.registrar_span(nome, inicio, time.perf_counter() - inicio, erro, atributos)
+
+    def registrar_span(self, nome, inicio, duracao, erro=None, atributos=None):
+        with self._lock:
+            self.histogramas.setdefault(nome, Histograma()).observar(duracao)
+            if len(self.spans) < LIMITE_SPANS:
+                span = {
+                    'etapa': nome,
+                    'inicio': round(inicio - self._referencia, 6),
+                    'duracao': round(duracao, 6),
+                    'thread': threading.current_thread().name,
+                }
+                if erro:
+                    span['erro'] = erro
+                if atributos:
+                    span['atributos'] = atributos
+                self.spans.append(span)
+            else:
+                self.spans_descartados += 1
+
+    def contar(self, nome, valor=1, etapa=""):
+        """Soma `valor` ao contador `nome` da etapa (ex.: registros, bytes)"""
+        with self._lock:
+            chave = (nome, etapa)
+            self.contadores[chave] = self.contadores.get(chave, 0) + valor
+
+    def estado(self):
+        """Estado serializável (para enviar de um processo filho ao principal)"""
+        with self._lock:
+            return {
+                'histogramas': {n: vars(h).copy() for n, h in self.histogramas.items()},
+                'contadores': [[n, e, v] for (n, e), v in self.contadores.items()],
+                'spans': list(self.spans),
+                'spans_descartados': self.spans_descartados,
+            }
+
+    def combinar(self, estado, processo=None):
+        """Soma o estado de outro registro (ex.: de um worker) a este"""
+        with self._lock:
+            for nome, dados in estado['histogramas'].items():
+                self.histogramas.setdefault(nome, Histograma()).combinar(dados)
+            for nome, etapa, valor in estado['contadores']:
+                self.contadores[(nome, etapa)] = self.contadores.get((nome, etapa), 0) + valor
+            espaco = max(LIMITE_SPANS - len(self.spans), 0)
+            for span in estado['spans'][:espaco]:
+                self.spans.append({**span, 'processo': processo} if processo else span)
+            self.spans_descartados += estado['spans_descartados'] + max(len(estado['spans']) - espaco, 0)
+
+    def relatorio(self, nome_execucao=None):
+        with self._lock:
+            etapas = {nome: h.resumo() for nome, h in sorted(self.histogramas.items())}
+            contadores = {}
+            for (nome, etapa), valor in sorted(self.contadores.items()):
+                contadores.setdefault(etapa or "geral", {})[nome] = valor
+            return {
+                'execucao': nome_execucao,
+                'inicio': time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.inicio)),
+                'duracao': time.perf_counter() - self._referencia,
+                'etapas': etapas,
+                'contadores': contadores,
+                'spans': list(self.spans),
+                'spans_descartados': self.spans_descartados,
+            }
+
+    def prometheus(self, nome_execucao=None):
+        """Métricas no formato texto do Prometheus"""
+        execucao = f',execucao="{nome_execucao}"' if nome_execucao else ""
+        linhas = [
+            "# HELP etl_etapa_segundos Duração das etapas do pipeline",
+            "# TYPE etl_etapa_segundos histogram",
+        ]
+        with self._lock:
+            for nome, h in sorted(self.histogramas.items()):
+                rotulo = f'etapa="{nome}"{execucao}'
+                acumulado = 0
+                for limite, contagem in zip(BUCKETS_SEGUNDOS, h.buckets):
+                    acumulado += contagem
+                    linhas.append(f'etl_etapa_segundos_bucket{{{rotulo},le="{limite}"}} {acumulado}')
+                linhas.append(f'etl_etapa_segundos_bucket{{{rotulo},le="+Inf"}} {h.quantidade}')
+                linhas.append(f"etl_etapa_segundos_sum{{{rotulo}}} {h.soma:.6f}")
+                linhas.append(f"etl_etapa_segundos_count{{{rotulo}}} {h.quantidade}")
+
+            declarados = set()
+            for (nome, etapa), valor in sorted(self.contadores.items()):
+                metrica = f"etl_{nome}_total"
+                if metrica not in declarados:
+                    linhas.append(f"# TYPE {metrica} counter")
+                    declarados.add(metrica)
+                linhas.append(f'{metrica}{{etapa="{etapa}"{execucao}}} {valor}')
+        linhas.append("# TYPE etl_ultima_execucao_timestamp_segundos gauge")
+        linhas.append(f"etl_ultima_execucao_timestamp_segundos{{{execucao.lstrip(',')}}} {time.time():.0f}")
+        return "\n".join(linhas) + "\n"
+
+    def exportar(self, nome_execucao, diretorio=DIRETORIO_METRICAS, diretorio_prometheus=DIRETORIO_PROMETHEUS):
+        """
+        Grava o relatório JSON da execução e o arquivo do Prometheus
+        (substituído a cada execução do mesmo tipo)
+        Returns:
+            caminho do relatório JSON
+        """
+        diretorio = Path(diretorio)
+        diretorio.mkdir(parents=True, exist_ok=True)
+        relatorio = diretorio / f"{nome_execucao}_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        _gravar_atomico(relatorio, json.dumps(self.relatorio(nome_execucao), ensure_ascii=False, indent=2))
+        if diretorio_prometheus:
+            Path(diretorio_prometheus).mkdir(parents=True, exist_ok=True)
+            _gravar_atomico(Path(diretorio_prometheus) / f"etl_{nome_execucao}.prom", self.prometheus(nome_execucao))
+        return relatorio
+
+
+def _gravar_atomico(caminho, texto):
+    caminho = Path(caminho)
+    temporario = caminho.with_name(f".{caminho.name}.tmp")
+    temporario.write_text(texto, encoding="utf-8")
+    os.replace(temporario, caminho)
+
+
+METRICAS = RegistroMetricas()
+
+_execucoes_ativas = 0
+_lock_execucao = threading.Lock()
+
+
+@contextlib.contextmanager
+def execucao(nome, exportar=True):
+    """
+    Delimita uma execução: zera as métricas ao entrar e exporta ao sair.
+    Execuções aninhadas (ex.: ingestão dentro de um ciclo agendado) somam na
+    execução externa, que é a única a exportar.
+    """
+    global _execucoes_ativas
+    with _lock_execucao:
+        externa = _execucoes_ativas == 0
+        _execucoes_ativas += 1
+    if externa:
+        METRICAS.reiniciar()
+    try:
+        with METRICAS.etapa(nome):
+            yield METRICAS
+    finally:
+        with _lock_execucao:
+            _execucoes_ativas -= 1
+        if externa and exportar:
+            try:
+                relatorio = METRICAS.exportar(nome)
+                print(f"Metricas da execucao em {relatorio}")
+            except OSError as e:
+                print(f"Nao foi possivel gravar as metricas: {e}")
+
+
+def executar_medido(funcao, *args, **kwargs):
+    """
+    Executa `funcao` em um processo filho com as métricas zeradas
+    Returns:
+        tupla (resultado, estado das métricas) para o processo principal combinar
+    """
+    METRICAS.reiniciar()
+    resultado = funcao(*args, **kwargs)
+    return resultado, METRICAS.estado()
+
+
+_lock_perfil = threading.Lock()
+
+
+@contextlib.contextmanager
+def perfilar(nome, diretorio=DIRETORIO_METRICAS, perfilador=PERFILADOR):
+    """
+    Perfila o bloco com cProfile (.prof, abrir com snakeviz/pstats) ou
+    pyinstrument (.html). Só um bloco é perfilado por vez; chamadas
+    concorrentes da mesma etapa rodam sem perfil.
+    """
+    if not _lock_perfil.acquire(blocking=False):
+        yield
+        return
+    try:
+        Path(diretorio).mkdir(parents=True, exist_ok=True)
+        base = Path(diretorio) / f"perfil_{nome}_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        if perfilador == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                print("pyinstrument nao instalado; usando cProfile")
+            else:
+                perfil = Profiler()
+                perfil.start()
+                try:
+                    yield
+                finally:
+                    perfil.stop()
+                    Path(f"{base}.html").write_text(perfil.output_html(), encoding="utf-8")
+                return
+
+        import cProfile
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            perfil.dump_stats(f"{base}.prof")
+    finally:
+        _lock_perfil.release()
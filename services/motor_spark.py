@@ -0,0 +1,304 @@
+"""
+Motor PySpark para as camadas Silver e Gold
+Executa os mesmos passos do motor pandas (deduplicação, tipos do esquema
+declarado, padronização de textos, filtro valor > 0, ano_mes e validação) e as
+agregações da gold como jobs Spark sobre o layout particionado da bronze.
+Por padrão roda em `local[*]`; com SPARK_MASTER (ou via spark-submit) o mesmo
+código roda em um cluster, desde que os caminhos estejam em um armazenamento
+compartilhado.
+"""
+
+import logging
+import os
+import shutil
+from collections import defaultdict
+from functools import reduce
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+from pyspark.sql import SparkSession, Window
+from pyspark.sql import functions as F
+
+from services.bronze_compactor import concluir_compactacoes_pendentes
+from services.deduplicacao import COLUNA_HASH, hash_tabela
+from services.esquema import COLUNAS_TEXTO, ESQUEMA_GASTOS
+from services.gold import AGREGADOS, ARQUIVO_ESTADO_GOLD, coluna_dimensao
+from services.qualidade import COLUNAS_ESTATISTICAS, REGRAS_QUALIDADE, EstatisticasQualidade, verificar_colunas
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Master do Spark (ex.: spark://host:7077, yarn); sem ele vale o do spark-submit ou local[*]
+SPARK_MASTER = os.getenv("SPARK_MASTER")
+# Partições dos shuffles (deduplicação e agregações); o padrão do Spark (200) é grande para um host
+SPARK_PARTICOES_SHUFFLE = os.getenv("SPARK_PARTICOES_SHUFFLE", "16")
+# Memória do driver; só tem efeito quando a sessão é criada aqui (modo local)
+SPARK_MEMORIA_DRIVER = os.getenv("SPARK_MEMORIA_DRIVER")
+
+# Tipos Arrow do esquema declarado -> tipos SQL do Spark
+_TIPOS_SPARK = {
+    pa.int8(): 'tinyint', pa.int16(): 'smallint', pa.int32(): 'int', pa.int64(): 'bigint',
+    pa.float64(): 'double', pa.string(): 'string', pa.date32(): 'date',
+}
+
+
+def obter_sessao():
+    """SparkSession compartilhada (criada na primeira chamada)"""
+    construtor = SparkSession.builder.appName("etl-gastos-diretos")
+    if SPARK_MASTER:
+        construtor = construtor.master(SPARK_MASTER)
+    if SPARK_MEMORIA_DRIVER:
+        construtor = construtor.config("spark.driver.memory", SPARK_MEMORIA_DRIVER)
+    return (
+        construtor
+        .config("spark.sql.shuffle.partitions", SPARK_PARTICOES_SHUFFLE)
+        .config("spark.sql.session.timeZone", "UTC")
+        .config("spark.sql.parquet.outputTimestampType", "TIMESTAMP_MICROS")
+        # mes_ano da bronze antiga é timestamp[ns], que o Spark não lê como data;
+        # a coluna é recalculada a partir de ano/mes
+        .config("spark.sql.legacy.parquet.nanosAsLong", "true")
+        # Disco local sem os arquivos .crc, que ficariam órfãos quando o motor pandas regrava a partição
+        .config("spark.hadoop.fs.file.impl", "org.apache.hadoop.fs.RawLocalFileSystem")
+        .getOrCreate()
+    )
+
+
+def _conformar(df, nulas=()):
+    """
+    Converte as colunas do esquema declarado para os tipos declarados (inválidos viram nulo)
+    Args:
+        df: DataFrame Spark lido da bronze
+        nulas: colunas gravadas com o tipo null do Arrow (sempre vazias), que o Spark lê como int
+    """
+    colunas = []
+    for nome, tipo in df.dtypes:
+        if nome in ESQUEMA_GASTOS.names:
+            declarado = _TIPOS_SPARK[ESQUEMA_GASTOS.field(nome).type]
+            if nome in nulas:
+                colunas.append(F.lit(None).cast(declarado).alias(nome))
+                continue
+            if tipo != declarado:
+                colunas.append(F.col(nome).try_cast(declarado).alias(nome))
+                continue
+        colunas.append(F.col(nome))
+    return df.select(*colunas)
+
+
+def _arquivos_com_hash(arquivos, diretorio):
+    """
+    Cópias dos arquivos antigos da bronze (gravados sem `_hash_registro`) com
+    o hash de hash_tabela, o mesmo do motor pandas, para que registros
+    antigos e reingeridos sejam deduplicados juntos
+    Args:
+        arquivos: parquets da bronze sem a coluna de hash
+        diretorio: onde gravar as cópias (acessível aos executores)
+    Returns:
+        lista com os caminhos das cópias
+    """
+    shutil.rmtree(diretorio, ignore_errors=True)
+    copias = []
+    for arquivo in arquivos:
+        tabela = pq.read_table(arquivo)
+        destino = Path(diretorio) / arquivo.parent.name / arquivo.name
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(tabela.append_column(COLUNA_HASH, hash_tabela(tabela)), destino)
+        copias.append(destino)
+    return copias
+
+
+def ler_bronze(spark, bronze_path="dataset/bronze", diretorio_hashes=None):
+    """
+    Lê todos os parquets da bronze em um DataFrame Spark nos tipos declarados
+    Arquivos com esquemas diferentes (bronze anterior ao esquema declarado,
+    com valor e datas em texto) são lidos em grupos e unidos por nome.
+    Arquivos sem `_hash_registro` são lidos de cópias com o hash calculado
+    em `diretorio_hashes` (padrão: .spark_hashes ao lado da bronze)
+    Returns:
+        pyspark.sql.DataFrame (sem mes_ano, recalculado na transformação)
+    """
+    bronze_path = Path(bronze_path)
+    concluir_compactacoes_pendentes(bronze_path)
+    arquivos = {arquivo: pq.read_schema(arquivo) for arquivo in sorted(bronze_path.glob("ano_mes=*/*.parquet"))}
+    if not arquivos:
+        raise FileNotFoundError("Nenhuma partição encontrada na bronze.")
+
+    sem_hash = [arquivo for arquivo, esquema in arquivos.items() if COLUNA_HASH not in esquema.names]
+    if sem_hash:
+        diretorio_hashes = diretorio_hashes or bronze_path.with_name(".spark_hashes")
+        for arquivo, copia in zip(sem_hash, _arquivos_com_hash(sem_hash, diretorio_hashes)):
+            del arquivos[arquivo]
+            arquivos[copia] = pq.read_schema(copia)
+        logger.info(f"Spark: hash calculado para {len(sem_hash)} arquivo(s) antigo(s) da bronze")
+
+    grupos = defaultdict(list)
+    for arquivo, esquema in arquivos.items():
+        grupos[tuple(zip(esquema.names, map(str, esquema.types)))].append(str(arquivo))
+
+    partes = []
+    for esquema, caminhos in grupos.items():
+        df = spark.read.parquet(*caminhos).drop('mes_ano', 'ano_mes')
+        partes.append(_conformar(df, {nome for nome, tipo in esquema if tipo == 'null'}))
+    logger.info(f"Spark: {len(arquivos)} arquivos da bronze em {len(grupos)} esquema(s)")
+    return reduce(lambda a, b: a.unionByName(b, allowMissingColumns=True), partes)
+
+
+def transformar(df):
+    """Transformações da silver (equivalentes a transformar_dados)"""
+    df = df.dropDuplicates([COLUNA_HASH])
+
+    for coluna in COLUNAS_TEXTO:
+        if coluna in df.columns:
+            texto = F.upper(F.trim(F.col(coluna).cast('string')))
+            df = df.withColumn(coluna, F.when(texto.isin('NAN', 'NONE', ''), None).otherwise(texto))
+
+    # Datas como timestamp sem fuso, como no DataFrame do motor pandas
+    for campo in ESQUEMA_GASTOS:
+        if campo.type == pa.date32() and campo.name in df.columns:
+            df = df.withColumn(campo.name, F.col(campo.name).cast('timestamp_ntz'))
+
+    if 'ano' in df.columns and 'mes' in df.columns:
+        df = (
+            df.withColumn('mes_ano', F.make_date('ano', 'mes', F.lit(1)).cast('timestamp_ntz'))
+            .withColumn('ano_mes', F.format_string('%d_%02d', 'ano', 'mes'))
+        )
+    if 'valor' in df.columns:
+        df = df.filter(F.col('valor') > 0)
+    return df
+
+
+def _expressoes_validacao(colunas):
+    """Agregações de uma passada com nulos, violações de regras e estatísticas"""
+    verificar_colunas(colunas)
+    expressoes = [F.count(F.lit(1)).alias('total')]
+    for c in colunas:
+        expressoes.append(F.count_if(F.col(c).isNull()).alias(f'nulos:{c}'))
+    for regra in REGRAS_QUALIDADE:
+        if regra['coluna'] not in colunas:
+            continue
+        col = F.col(regra['coluna'])
+        condicao = F.lit(False)
+        if 'minimo' in regra:
+            abaixo = col <= regra['minimo'] if regra.get('minimo_exclusivo') else col < regra['minimo']
+            condicao = condicao | abaixo
+        if 'maximo' in regra:
+            condicao = condicao | (col > regra['maximo'])
+        expressoes.append(F.count_if(F.coalesce(condicao, F.lit(False))).alias(f"regra:{regra['nome']}"))
+    for c in COLUNAS_ESTATISTICAS:
+        if c in colunas:
+            expressoes += [
+                F.min(c).cast('double').alias(f'min:{c}'), F.max(c).cast('double').alias(f'max:{c}'),
+                F.sum(c).cast('double').alias(f'soma:{c}'), F.count(c).alias(f'contagem:{c}'),
+            ]
+    return expressoes
+
+
+def validar(df):
+    """
+    Validação da silver em uma única agregação
+    Returns:
+        dict de validação no formato de validar_qualidade
+    """
+    linha = df.agg(*_expressoes_validacao(df.columns)).first().asDict()
+
+    acumulador = EstatisticasQualidade()
+    acumulador.total = linha.pop('total')
+    for chave, valor in linha.items():
+        tipo, nome = chave.split(':', 1)
+        if tipo == 'nulos':
+            acumulador.nulos[nome] = int(valor)
+        elif tipo == 'regra':
+            acumulador.invalidos[nome] = int(valor)
+        elif tipo == 'contagem' and valor:
+            acumulador.estatisticas[nome] = {
+                'min': linha[f'min:{nome}'], 'max': linha[f'max:{nome}'],
+                'soma': linha[f'soma:{nome}'], 'contagem': int(valor),
+            }
+    return acumulador.resultado()
+
+
+def executar_pipeline_spark(bronze_path="dataset/bronze", silver_path="dataset/silver"):
+    """
+    Executa o pipeline Bronze -> Silver no Spark (sempre um full refresh)
+    Args:
+        bronze_path: diretório da camada bronze
+        silver_path: diretório da camada silver
+    Returns:
+        dict de validação no formato de validar_qualidade
+    """
+    spark = obter_sessao()
+    diretorio_hashes = Path(bronze_path).with_name(".spark_hashes")
+    try:
+        silver = transformar(ler_bronze(spark, bronze_path, diretorio_hashes))
+
+        # Full refresh: o overwrite substitui a silver inteira, inclusive o estado
+        # incremental e os índices de deduplicação do motor pandas
+        silver.repartition('ano_mes').write.mode('overwrite').partitionBy('ano_mes').parquet(str(silver_path))
+    finally:
+        shutil.rmtree(diretorio_hashes, ignore_errors=True)
+    logger.info(f"Spark: silver gravada em {silver_path}")
+
+    gravada = spark.read.parquet(str(silver_path)).drop('ano_mes')
+    return validar(gravada)
+
+
+def agregar(silver, dimensao, top=None):
+    """
+    Soma os gastos de cada mês por uma dimensão (equivalente a agregar_mes)
+    Args:
+        silver: DataFrame Spark com ano_mes, valor e a dimensão
+        dimensao: coluna agrupada
+        top: se informado, mantém só as N maiores somas de cada mês com a posição no ranking
+    """
+    agregado = (
+        silver.groupBy('ano_mes', dimensao)
+        .agg(F.sum('valor').alias('valor_total'), F.count('valor').alias('quantidade'))
+        .withColumn('valor_medio', F.col('valor_total') / F.col('quantidade'))
+    )
+    if not top:
+        return agregado
+    ordem = Window.partitionBy('ano_mes').orderBy(F.desc('valor_total'), F.asc_nulls_last(dimensao))
+    return (
+        agregado.withColumn('posicao', F.row_number().over(ordem).cast('bigint'))
+        .filter(F.col('posicao') <= top)
+        .select('ano_mes', 'posicao', dimensao, 'valor_total', 'quantidade', 'valor_medio')
+    )
+
+
+def executar_gold_spark(silver_path="dataset/silver", gold_path="dataset/gold"):
+    """
+    Recalcula todos os agregados da gold no Spark (sempre um full refresh)
+    Returns:
+        dict com os meses 'atualizados', 'removidos' e 'em_cache' (como executar_gold)
+    """
+    spark = obter_sessao()
+    gold_path = Path(gold_path)
+    if not list(Path(silver_path).glob("ano_mes=*/")):
+        raise FileNotFoundError("Nenhuma partição encontrada na silver. Execute primeiro o pipeline silver.")
+
+    silver = spark.read.option("mergeSchema", "true").parquet(str(silver_path))
+    colunas = {
+        coluna_dimensao(dimensao, silver.columns): dimensao
+        for dimensao in {config['dimensao'] for config in AGREGADOS.values()}
+        if coluna_dimensao(dimensao, silver.columns)
+    }
+    silver = silver.select('ano_mes', 'valor', *[F.col(c).alias(d) for c, d in colunas.items()]).cache()
+
+    for nome, config in AGREGADOS.items():
+        destino = gold_path / nome
+        if config['dimensao'] not in silver.columns:
+            shutil.rmtree(destino, ignore_errors=True)
+            continue
+        agregado = agregar(silver, config['dimensao'], config.get('top'))
+        agregado.repartition('ano_mes').sortWithinPartitions(
+            'ano_mes', F.desc('valor_total'), F.asc_nulls_last(config['dimensao'])
+        ).write.mode('overwrite').partitionBy('ano_mes').parquet(str(destino))
+        logger.info(f"  -> Gold {nome} gravada pelo Spark")
+
+    meses = sorted(linha['ano_mes'] for linha in silver.select('ano_mes').distinct().collect())
+    silver.unpersist()
+    # O estado incremental do motor pandas não descreve estes arquivos
+    (gold_path / Path(ARQUIVO_ESTADO_GOLD).name).unlink(missing_ok=True)
+    return {'atualizados': meses, 'removidos': [], 'em_cache': 0}
@@ -0,0 +1,55 @@
+"""
+Utilitários de partições do data lake
+Impressão digital de partições (para detectar mudanças) e arquivos de estado
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+def assinaturas_arquivos(particao):
+    """
+    Returns:
+        dict {nome do arquivo parquet: "tamanho:mtime_ns"} da partição
+    """
+    assinaturas = {}
+    for arquivo in sorted(Path(particao).glob("*.parquet")):
+        info = arquivo.stat()
+        assinaturas[arquivo.name] = f"{info.st_size}:{info.st_mtime_ns}"
+    return assinaturas
+
+
+def impressao_digital(particao):
+    """
+    Resume o conteúdo de uma partição pelos nomes, tamanhos e mtimes dos
+    arquivos parquet; muda sempre que um arquivo é criado, removido ou reescrito
+    Args:
+        particao: diretório ano_mes=YYYY_MM
+    Returns:
+        str hexadecimal
+    """
+    h = hashlib.sha256()
+    for nome, assinatura in assinaturas_arquivos(particao).items():
+        h.update(f"{nome}:{assinatura}\n".encode())
+    return h.hexdigest()
+
+
+def carregar_estado(caminho):
+    """Lê um arquivo de estado JSON (dict vazio se não existir)"""
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def salvar_estado(caminho, estado):
+    """Grava o arquivo de estado JSON de forma atômica"""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(f".{caminho.name}.tmp")
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
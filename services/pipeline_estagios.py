@@ -0,0 +1,198 @@
+"""
+Pipeline de estágios com filas limitadas
+Cada estágio roda em uma ou mais threads, consome a fila de entrada e entrega
+o resultado na fila do próximo estágio. As filas têm capacidade fixa: quando
+um estágio atrasa, os anteriores bloqueiam (backpressure) em vez de acumular
+páginas na memória. Profundidade das filas e vazão de cada estágio são
+reportadas periodicamente.
+"""
+
+import queue
+import threading
+import time
+
+# Marca de fim de fluxo passada de estágio em estágio
+FIM = object()
+
+# Intervalo (s) das esperas em filas, para perceber um cancelamento
+_ESPERA = 0.2
+
+
+class Estagio:
+    """
+    Etapa do pipeline
+    Args:
+        nome: nome exibido nos relatórios
+        funcao: recebe um item e devolve o item do próximo estágio (None descarta)
+        threads: threads consumindo a fila de entrada
+    """
+
+    def __init__(self, nome, funcao, threads=1):
+        self.nome = nome
+        self.funcao = funcao
+        self.threads = threads
+        self.entrada = None
+        self.saida = None
+        self.itens = 0
+        self.ocupado = 0.0
+        self.inicio = None
+        self.fim = None
+        self._ativas = threads
+        self._trava = threading.Lock()
+
+    def vazao(self):
+        """Itens por segundo desde o início do estágio"""
+        if self.inicio is None:
+            return 0.0
+        decorrido = (self.fim or time.perf_counter()) - self.inicio
+        return self.itens / decorrido if decorrido > 0 else 0.0
+
+    def resumo(self):
+        decorrido = ((self.fim or time.perf_counter()) - self.inicio) if self.inicio else 0.0
+        return {
+            'itens': self.itens,
+            'vazao': self.vazao(),
+            # Fração do tempo em que as threads do estágio estavam trabalhando
+            'ocupacao': self.ocupado / (decorrido * self.threads) if decorrido else 0.0,
+        }
+
+
+class PipelineEstagios:
+    """
+    Encadeia estágios com filas limitadas entre eles
+    Args:
+        capacidade_fila: itens por fila entre estágios
+    """
+
+    def __init__(self, capacidade_fila=16):
+        self.capacidade_fila = capacidade_fila
+        self.estagios = []
+        self.cancelado = threading.Event()
+        self.erro = None
+
+    def adicionar_estagio(self, nome, funcao, threads=1):
+        estagio = Estagio(nome, funcao, threads)
+        if self.estagios:
+            # Fila limitada entre o estágio anterior e este
+            fila = queue.Queue(maxsize=self.capacidade_fila)
+            self.estagios[-1].saida = fila
+            estagio.entrada = fila
+        else:
+            estagio.entrada = queue.Queue()
+        self.estagios.append(estagio)
+        return self
+
+    def _colocar(self, fila, item):
+        while not self.cancelado.is_set():
+            try:
+                fila.put(item, timeout=_ESPERA)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _retirar(self, fila):
+        while not self.cancelado.is_set():
+            try:
+                return fila.get(timeout=_ESPERA)
+            except queue.Empty:
+                continue
+        return FIM
+
+    def _executar_estagio(self, estagio):
+        with estagio._trava:
+            if estagio.inicio is None:
+                estagio.inicio = time.perf_counter()
+        try:
+            while True:
+                item = self._retirar(estagio.entrada)
+                if item is FIM:
+                    # Devolve a marca para as outras threads do mesmo estágio; após
+                    # um cancelamento elas já param sozinhas, e um put bloqueante em
+                    # uma fila cheia travaria o join
+                    if not self.cancelado.is_set():
+                        self._colocar(estagio.entrada, FIM)
+                    break
+                comeco = time.perf_counter()
+                resultado = estagio.funcao(item)
+                with estagio._trava:
+                    estagio.ocupado += time.perf_counter() - comeco
+                    estagio.itens += 1
+                if resultado is not None and estagio.saida is not None:
+                    if not self._colocar(estagio.saida, resultado):
+                        break
+        except BaseException as e:
+            if self.erro is None:
+                self.erro = e
+            self.cancelado.set()
+        finally:
+            with estagio._trava:
+                estagio._ativas -= 1
+                ultima = estagio._ativas == 0
+                if ultima:
+                    estagio.fim = time.perf_counter()
+            if ultima and estagio.saida is not None:
+                self._colocar(estagio.saida, FIM)
+
+    def relatorio(self):
+        """Linha com itens e vazão de cada estágio e a ocupação das filas"""
+        partes = []
+        for estagio in self.estagios:
+            if estagio is not self.estagios[0]:
+                partes.append(f"fila {estagio.entrada.qsize()}/{self.capacidade_fila}")
+            partes.append(f"{estagio.nome}: {estagio.itens} ({estagio.vazao():.1f}/s)")
+        return " | ".join(partes)
+
+    def executar(self, itens, intervalo_relatorio=10.0, relatar=print):
+        """
+        Alimenta o primeiro estágio com `itens` e espera todos terminarem
+        Args:
+            itens: entradas do primeiro estágio
+            intervalo_relatorio: segundos entre relatórios de progresso (None desativa)
+            relatar: função que recebe a linha do relatório
+        Returns:
+            dict {estagio: {'itens', 'vazao', 'ocupacao'}}
+        Raises:
+            a primeira exceção levantada por qualquer estágio
+        """
+        primeira = self.estagios[0].entrada
+        for item in itens:
+            primeira.put(item)
+        primeira.put(FIM)
+
+        threads = {
+            estagio.nome: [
+                threading.Thread(target=self._executar_estagio, args=(estagio,),
+                                 name=f"{estagio.nome}-{i}", daemon=True)
+                for i in range(estagio.threads)
+            ]
+            for estagio in self.estagios
+        }
+        todas = [t for lista in threads.values() for t in lista]
+        for thread in todas:
+            thread.start()
+
+        ultimo_relatorio = time.perf_counter()
+        interrompido = False
+        try:
+            while any(t.is_alive() for t in todas) and not self.cancelado.is_set():
+                time.sleep(_ESPERA)
+                if intervalo_relatorio and time.perf_counter() - ultimo_relatorio >= intervalo_relatorio:
+                    relatar(f"[pipeline] {self.relatorio()}")
+                    ultimo_relatorio = time.perf_counter()
+        except KeyboardInterrupt:
+            interrompido = True
+            self.cancelado.set()
+        finally:
+            # Após um cancelamento, espera os estágios de gravação terminarem o
+            # item atual; o primeiro estágio (rede) pode estar preso em uma espera
+            # longa e roda em threads daemon
+            for estagio in self.estagios[1:]:
+                for thread in threads[estagio.nome]:
+                    thread.join()
+
+        if interrompido:
+            raise KeyboardInterrupt
+        if self.erro is not None:
+            raise self.erro
+        return {estagio.nome: estagio.resumo() for estagio in self.estagios}
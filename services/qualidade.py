@@ -0,0 +1,175 @@
+"""
+Motor de estatísticas de qualidade
+Calcula em uma única passada por coluna os nulos, as violações das regras
+declaradas e estatísticas básicas (min/max/soma/contagem). Os acumuladores são
+combináveis: resultados de lotes ou partições somados equivalem ao resultado
+do conjunto inteiro.
+"""
+
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Colunas que não devem ter nulos e a fração tolerada antes do ALERTA
+COLUNAS_CRITICAS = ['valor', 'ano', 'mes', 'nome_orgao', 'nome_favorecido']
+LIMITE_NULOS_CRITICOS = 0.05
+
+# Último ano aceito (padrão: ano corrente)
+ANO_MAXIMO = int(os.getenv("ANO_MAXIMO_VALIDO", date.today().year))
+
+# Regras de faixa válida: registros fora dela contam como inválidos
+# (valores nulos não entram na contagem)
+REGRAS_QUALIDADE = [
+    {'nome': 'valor_negativo_ou_zero', 'coluna': 'valor', 'minimo': 0, 'minimo_exclusivo': True},
+    {'nome': 'ano_fora_intervalo', 'coluna': 'ano', 'minimo': 2000, 'maximo': ANO_MAXIMO},
+    {'nome': 'mes_invalido', 'coluna': 'mes', 'minimo': 1, 'maximo': 12},
+]
+
+# Colunas numéricas com min/max/soma/contagem
+COLUNAS_ESTATISTICAS = ['valor', 'ano', 'mes']
+
+
+def _percentual(parte, total):
+    return round(parte / total * 100, 2) if total else 0.0
+
+
+def _violacoes(valores, regra):
+    """Conta os valores (não nulos) fora da faixa da regra"""
+    fora = np.zeros(len(valores), dtype=bool)
+    if 'minimo' in regra:
+        fora |= valores <= regra['minimo'] if regra.get('minimo_exclusivo') else valores < regra['minimo']
+    if 'maximo' in regra:
+        fora |= valores > regra['maximo']
+    return int(fora.sum())
+
+
+def verificar_colunas(colunas, regras=None, colunas_criticas=None):
+    """
+    Falha se uma coluna de regra ou crítica não existe na tabela: uma coluna
+    ausente (ou com nome errado) seria ignorada em silêncio pela validação
+    Raises:
+        ValueError: com as colunas configuradas que faltam
+    """
+    regras = REGRAS_QUALIDADE if regras is None else regras
+    colunas_criticas = COLUNAS_CRITICAS if colunas_criticas is None else colunas_criticas
+    configuradas = dict.fromkeys([r['coluna'] for r in regras] + list(colunas_criticas))
+    ausentes = [c for c in configuradas if c not in set(colunas)]
+    if ausentes:
+        raise ValueError(f"Colunas da validação de qualidade ausentes da tabela: {', '.join(ausentes)}")
+
+
+class EstatisticasQualidade:
+    """
+    Acumulador combinável de estatísticas de qualidade
+    Args:
+        regras: lista de regras de faixa (padrão: REGRAS_QUALIDADE)
+        colunas_criticas: colunas que disparam ALERTA com nulos em excesso
+    """
+
+    def __init__(self, regras=None, colunas_criticas=None):
+        self.regras = REGRAS_QUALIDADE if regras is None else regras
+        self.colunas_criticas = COLUNAS_CRITICAS if colunas_criticas is None else colunas_criticas
+        self.total = 0
+        self.nulos = {}
+        self.invalidos = {}
+        self.estatisticas = {}
+
+    def atualizar(self, df):
+        """Acumula um DataFrame ou uma pyarrow.Table (lote, página ou partição)"""
+        arrow = hasattr(df, 'column_names')
+        verificar_colunas(df.column_names if arrow else df.columns, self.regras, self.colunas_criticas)
+        self.total += df.num_rows if arrow else len(df)
+
+        nulos_colunas = ((col, df.column(col).null_count) for col in df.column_names) if arrow \
+            else df.isna().sum().items()
+        for col, nulos in nulos_colunas:
+            self.nulos[col] = self.nulos.get(col, 0) + int(nulos)
+
+        # Cada coluna numérica é convertida uma vez e usada por todas as regras e estatísticas
+        colunas = {r['coluna'] for r in self.regras} | set(COLUNAS_ESTATISTICAS)
+        for col in [c for c in (df.column_names if arrow else df.columns) if c in colunas]:
+            serie = df.column(col).to_pandas() if arrow else df[col]
+            valores = pd.to_numeric(serie, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+            valores = valores[~np.isnan(valores)]
+
+            for regra in self.regras:
+                if regra['coluna'] == col:
+                    self.invalidos[regra['nome']] = self.invalidos.get(regra['nome'], 0) + _violacoes(valores, regra)
+
+            if col in COLUNAS_ESTATISTICAS and len(valores):
+                self._combinar_estatistica(col, {
+                    'min': float(valores.min()),
+                    'max': float(valores.max()),
+                    'soma': float(valores.sum()),
+                    'contagem': int(len(valores)),
+                })
+        return self
+
+    def _combinar_estatistica(self, col, nova):
+        atual = self.estatisticas.get(col)
+        if atual is None:
+            self.estatisticas[col] = dict(nova)
+            return
+        atual['min'] = min(atual['min'], nova['min'])
+        atual['max'] = max(atual['max'], nova['max'])
+        atual['soma'] += nova['soma']
+        atual['contagem'] += nova['contagem']
+
+    def combinar(self, outro):
+        """Soma outro acumulador a este"""
+        self.total += outro.total
+        for col, nulos in outro.nulos.items():
+            self.nulos[col] = self.nulos.get(col, 0) + nulos
+        for nome, qtd in outro.invalidos.items():
+            self.invalidos[nome] = self.invalidos.get(nome, 0) + qtd
+        for col, stats in outro.estatisticas.items():
+            self._combinar_estatistica(col, stats)
+        return self
+
+    def resultado(self):
+        """
+        Returns:
+            dict de validação (formato de validar_qualidade), que também serve
+            para reconstruir o acumulador com de_resultado
+        """
+        validacao = {
+            'total_registros': self.total,
+            'colunas_criticas': {},
+            'valores_nulos': {},
+            'valores_invalidos': dict(self.invalidos),
+            'estatisticas': {
+                col: {**stats, 'media': stats['soma'] / stats['contagem'] if stats['contagem'] else None}
+                for col, stats in self.estatisticas.items()
+            },
+            'status': 'OK'
+        }
+
+        for col in self.colunas_criticas:
+            if col in self.nulos:
+                nulos = self.nulos[col]
+                validacao['colunas_criticas'][col] = {'nulos': nulos, 'percentual': _percentual(nulos, self.total)}
+                if self.total and nulos / self.total > LIMITE_NULOS_CRITICOS:
+                    validacao['status'] = 'ALERTA'
+
+        for col, nulos in self.nulos.items():
+            if nulos > 0:
+                validacao['valores_nulos'][col] = {'nulos': nulos, 'percentual': _percentual(nulos, self.total)}
+
+        return validacao
+
+    @classmethod
+    def de_resultado(cls, validacao, regras=None, colunas_criticas=None):
+        """Reconstrói um acumulador a partir de um dict de validação"""
+        acumulador = cls(regras, colunas_criticas)
+        acumulador.total = validacao['total_registros']
+        for chave in ('colunas_criticas', 'valores_nulos'):
+            for col, stats in validacao[chave].items():
+                acumulador.nulos[col] = stats['nulos']
+        acumulador.invalidos = dict(validacao['valores_invalidos'])
+        acumulador.estatisticas = {
+            col: {k: v for k, v in stats.items() if k != 'media'}
+            for col, stats in validacao.get('estatisticas', {}).items()
+        }
+        return acumulador
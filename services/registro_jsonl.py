@@ -0,0 +1,80 @@
+"""
+Arquivos JSON Lines append-only usados como catálogos/manifestos do data lake
+Cada linha é gravada com flush + fsync; uma última linha truncada por queda
+do processo é ignorada na leitura e descartada antes da próxima gravação
+"""
+
+import json
+import os
+from pathlib import Path
+
+
+def _descartar_linha_incompleta(caminho):
+    """
+    Trunca o arquivo até a última linha completa: uma gravação interrompida
+    deixa a última linha sem o \\n, e o próximo registro seria colado nela
+    """
+    try:
+        with open(caminho, "rb+") as f:
+            fim = f.seek(0, os.SEEK_END)
+            if fim == 0:
+                return
+            f.seek(fim - 1)
+            if f.read(1) == b"\n":
+                return
+            # Procurar o último \n de trás para frente, em blocos
+            posicao = fim
+            while posicao > 0:
+                tamanho = min(4096, posicao)
+                posicao -= tamanho
+                f.seek(posicao)
+                quebra = f.read(tamanho).rfind(b"\n")
+                if quebra >= 0:
+                    f.truncate(posicao + quebra + 1)
+                    return
+            f.truncate(0)
+    except FileNotFoundError:
+        pass
+
+
+def anexar_registro(caminho, registro):
+    """Acrescenta um registro ao final do arquivo de forma durável"""
+    Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+    linha = json.dumps(registro, ensure_ascii=False, separators=(",", ":")) + "\n"
+    _descartar_linha_incompleta(caminho)
+    with open(caminho, "a", encoding="utf-8") as f:
+        f.write(linha)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def ler_registros(caminho):
+    """
+    Lê todos os registros válidos do arquivo
+    Returns:
+        lista de dicts (vazia se o arquivo não existir)
+    """
+    registros = []
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    registros.append(json.loads(linha))
+                except json.JSONDecodeError:
+                    continue  # linha parcial de uma gravação interrompida
+    except FileNotFoundError:
+        pass
+    return registros
+
+
+def reescrever_registros(caminho, registros):
+    """Substitui o arquivo inteiro de forma atômica (temporário + rename)"""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(f".{caminho.name}.tmp")
+    with open(temporario, "w", encoding="utf-8") as f:
+        for registro in registros:
+            f.write(json.dumps(registro, ensure_ascii=False, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
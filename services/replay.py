@@ -0,0 +1,242 @@
+"""
+Replay Raw -> Bronze
+Reconstrói a bronze a partir das páginas já salvas na raw, sem acessar a API.
+A descompressão e a normalização rodam em um pool de processos (um arquivo
+da raw por tarefa) e um único EscritorBronze no processo principal grava as
+partições.
+"""
+
+import os
+import shutil
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from services.bronze_writer import EscritorBronze, com_estatisticas, gravar_parquet_atomico
+from services.formato_raw import ler_arquivo_raw, ler_pagina_raw
+from services.indice_raw import carregar_indice, reconstruir_indice_raw
+from services.manifesto import ManifestoIngestao, agrupar_faixas
+from services.metricas import METRICAS, execucao, executar_medido
+
+# Processos decodificando a raw
+WORKERS_REPLAY = os.cpu_count() or 1
+# Buffer do escritor no replay: arquivos maiores que os da ingestão, já que
+# não há páginas esperando confirmação no manifesto
+LIMITE_LINHAS_REPLAY = 250_000
+
+
+def _normalizar_arquivo(raw_path, nome_arquivo, entradas):
+    """
+    Tarefa do pool: lê as páginas pedidas de um arquivo da raw e as normaliza
+    Args:
+        raw_path: diretório da raw
+        nome_arquivo: arquivo (página avulsa ou segmento)
+        entradas: entradas do índice das páginas desse arquivo
+    Returns:
+        lista de tuplas (pagina, ano_mes, pyarrow.Table)
+    """
+    from services.esquema import particionar
+    from services.request import normalizar_pagina
+
+    if all(e.get('offset') is not None for e in entradas):
+        # Segmento com offsets: descomprime só os membros pedidos
+        paginas = ((e['pagina'], ler_pagina_raw(e, raw_path)) for e in entradas)
+    else:
+        pedidas = {e['pagina'] for e in entradas}
+        paginas = (
+            (pagina, dados) for pagina, dados, _ in ler_arquivo_raw(Path(raw_path) / nome_arquivo)
+            if pagina in pedidas
+        )
+
+    resultado = []
+    for pagina, dados in _medir_leitura(paginas):
+        tabela = normalizar_pagina(dados, pagina)
+        if tabela is None:
+            continue
+        for ano_mes, particao in particionar(tabela):
+            resultado.append((pagina, ano_mes, particao))
+    return resultado
+
+
+def _medir_leitura(paginas):
+    """Mede a leitura/descompressão de cada página da raw como um span"""
+    while True:
+        with METRICAS.etapa("raw_leitura"):
+            item = next(paginas, None)
+        if item is None:
+            return
+        yield item
+
+
+def remover_paginas_bronze(pagina_inicio, pagina_fim, bronze_path="dataset/bronze", preservar=()):
+    """
+    Remove da bronze os registros vindos das páginas do intervalo (inclusivo)
+    Arquivos cujas estatísticas de _pagina_origem não tocam o intervalo não são lidos
+    Args:
+        preservar: arquivos que não são tocados (os recém-gravados pelo replay)
+    Returns:
+        número de registros removidos
+    """
+    preservar = {Path(a) for a in preservar}
+    removidos = 0
+    for arquivo in sorted(Path(bronze_path).glob("ano_mes=*/*.parquet")):
+        if arquivo in preservar:
+            continue
+        metadados = pq.read_metadata(arquivo)
+        indice_coluna = metadados.schema.names.index('_pagina_origem') \
+            if '_pagina_origem' in metadados.schema.names else None
+        if indice_coluna is None:
+            continue
+
+        afetado = False
+        for i in range(metadados.num_row_groups):
+            estatisticas = metadados.row_group(i).column(indice_coluna).statistics
+            if estatisticas is None or not estatisticas.has_min_max or (
+                    estatisticas.min <= pagina_fim and estatisticas.max >= pagina_inicio):
+                afetado = True
+                break
+        if not afetado:
+            continue
+
+        tabela = pq.read_table(arquivo)
+        paginas = tabela['_pagina_origem']
+        manter = pc.invert(pc.and_(pc.greater_equal(paginas, pagina_inicio), pc.less_equal(paginas, pagina_fim)))
+        restante = tabela.filter(manter)
+        if restante.num_rows == tabela.num_rows:
+            continue
+
+        removidos += tabela.num_rows - restante.num_rows
+        if restante.num_rows:
+            gravar_parquet_atomico(com_estatisticas(restante), arquivo)
+        else:
+            arquivo.unlink()
+    return removidos
+
+
+def paginas_bronze(bronze_path="dataset/bronze"):
+    """Páginas de origem presentes na bronze (lê só a coluna _pagina_origem)"""
+    paginas = set()
+    for arquivo in Path(bronze_path).glob("ano_mes=*/*.parquet"):
+        if '_pagina_origem' in pq.read_schema(arquivo).names:
+            coluna = pq.read_table(arquivo, columns=['_pagina_origem']).column(0)
+            paginas.update(p for p in pc.unique(coluna).to_pylist() if p is not None)
+    return paginas
+
+
+def paginas_sem_raw(indice, pagina_inicio, pagina_fim, raw_path, bronze_path):
+    """
+    Páginas do intervalo que o manifesto de ingestão ou a bronze conhecem mas
+    que não estão no índice da raw: o replay as apagaria da bronze sem repô-las
+    """
+    conhecidas = set(ManifestoIngestao(Path(raw_path) / "manifesto.jsonl").paginas) | paginas_bronze(bronze_path)
+    return sorted(p for p in conhecidas if pagina_inicio <= p <= pagina_fim and p not in indice)
+
+
+@execucao("replay")
+def replay_raw_para_bronze(pagina_inicio=None, pagina_fim=None, workers=WORKERS_REPLAY,
+                           raw_path="dataset/raw", bronze_path="dataset/bronze", forcar=False):
+    """
+    Reconstrói a bronze a partir da raw
+    As páginas são gravadas primeiro em um diretório temporário. Sem
+    intervalo, a bronze inteira é trocada por ele no final; com intervalo, os
+    arquivos novos são movidos para as partições e só então os registros
+    antigos dessas páginas são removidos. Uma falha na decodificação ou na
+    gravação não altera a bronze
+    Args:
+        pagina_inicio / pagina_fim: intervalo de páginas (inclusivo); None = todas
+        workers: processos decodificando a raw
+        forcar: executa mesmo com páginas do manifesto ou da bronze ausentes da
+            raw (elas deixam de existir na bronze)
+    Raises:
+        ValueError: páginas do intervalo ausentes da raw, sem `forcar`
+    Returns:
+        dict com paginas, registros, removidos e segundos
+    """
+    inicio = time.perf_counter()
+    raw_path = Path(raw_path)
+    bronze_path = Path(bronze_path)
+
+    indice = carregar_indice(raw_path / "indice_raw.jsonl")
+    if not indice:
+        print("Indice da raw ausente: reconstruindo a partir dos arquivos...")
+        reconstruir_indice_raw(raw_path, raw_path / "indice_raw.jsonl")
+        indice = carregar_indice(raw_path / "indice_raw.jsonl")
+
+    completo = pagina_inicio is None and pagina_fim is None
+    pagina_inicio = min(indice, default=0) if pagina_inicio is None else pagina_inicio
+    pagina_fim = max(indice, default=0) if pagina_fim is None else pagina_fim
+    selecionadas = [e for p, e in sorted(indice.items()) if pagina_inicio <= p <= pagina_fim]
+
+    # A bronze nova só tem o que está na raw: páginas que só existem na bronze
+    # (ou no manifesto) seriam perdidas
+    sem_raw = paginas_sem_raw(indice, pagina_inicio, pagina_fim, raw_path, bronze_path)
+    if sem_raw:
+        faixas = ", ".join(f"{a}" if a == b else f"{a}-{b}" for a, b in agrupar_faixas(sem_raw)[:10])
+        if not forcar:
+            raise ValueError(
+                f"{len(sem_raw):,} pagina(s) da bronze/manifesto ausentes da raw ({faixas}); "
+                f"o replay as removeria da bronze. Use forcar=True (--forcar) para continuar"
+            )
+        print(f"Aviso: {len(sem_raw):,} pagina(s) ausentes da raw serao removidas da bronze ({faixas})")
+    if not selecionadas:
+        print("Nenhuma pagina da raw no intervalo informado.")
+        return {'paginas': 0, 'registros': 0, 'removidos': 0, 'segundos': 0.0}
+
+    # Uma tarefa por arquivo da raw
+    por_arquivo = defaultdict(list)
+    for entrada in selecionadas:
+        por_arquivo[entrada['arquivo']].append(entrada)
+
+    destino = bronze_path.with_name(f".{bronze_path.name}_replay")
+    shutil.rmtree(destino, ignore_errors=True)
+    removidos = 0
+
+    print(f"Replay de {len(selecionadas):,} pagina(s) de {len(por_arquivo):,} arquivo(s) "
+          f"com {workers} processo(s)")
+
+    registros = 0
+    with EscritorBronze(destino, limite_linhas=LIMITE_LINHAS_REPLAY) as escritor:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futuros = [
+                executor.submit(executar_medido, _normalizar_arquivo, str(raw_path), nome, entradas)
+                for nome, entradas in por_arquivo.items()
+            ]
+            for concluidos, futuro in enumerate(as_completed(futuros), 1):
+                tabelas, metricas = futuro.result()
+                METRICAS.combinar(metricas)
+                for pagina, ano_mes, tabela in tabelas:
+                    escritor.adicionar(ano_mes, tabela, pagina)
+                    registros += tabela.num_rows
+                if concluidos % 50 == 0 or concluidos == len(futuros):
+                    print(f"  {concluidos}/{len(futuros)} arquivo(s) decodificados ({registros:,} registros)")
+
+    if completo:
+        # Troca a bronze inteira só depois que a nova foi gravada por completo
+        antiga = bronze_path.with_name(f".{bronze_path.name}_antiga")
+        shutil.rmtree(antiga, ignore_errors=True)
+        if bronze_path.exists():
+            os.replace(bronze_path, antiga)
+        destino.mkdir(parents=True, exist_ok=True)
+        os.replace(destino, bronze_path)
+        shutil.rmtree(antiga, ignore_errors=True)
+    else:
+        # Os arquivos novos entram antes da remoção dos antigos: uma queda entre
+        # os dois passos deixa registros repetidos (descartados pelo hash na
+        # silver), nunca registros perdidos
+        novos = []
+        for arquivo in sorted(destino.glob("ano_mes=*/*.parquet")):
+            particao = bronze_path / arquivo.parent.name
+            particao.mkdir(parents=True, exist_ok=True)
+            os.replace(arquivo, particao / arquivo.name)
+            novos.append(particao / arquivo.name)
+        removidos = remover_paginas_bronze(pagina_inicio, pagina_fim, bronze_path, preservar=novos)
+        shutil.rmtree(destino, ignore_errors=True)
+
+    segundos = time.perf_counter() - inicio
+    print(f"Replay concluido: {registros:,} registros gravados"
+          + (f", {removidos:,} substituidos" if removidos else "") + f" em {segundos:.1f}s")
+    return {'paginas': len(selecionadas), 'registros': registros, 'removidos': removidos, 'segundos': segundos}
@@ -7,157 +7,298 @@ head:
     Content-Type: application/json
 """
 
-import requests
 import os
 from dotenv import load_dotenv
-import pandas as pd
-import json
-import time
-import gzip
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import math
 from pathlib import Path
 
+from services.bronze_writer import EscritorBronze
+from services.cliente_api import (
+    ARQUIVO_PAGINAS_FALHAS, URL_API, ClienteAPI, FalhaRequisicao, LimitadorTaxa,
+    paginas_com_falha, registrar_pagina_falha, remover_paginas_falhas,
+)
+from services.formato_raw import EscritorRaw
+from services.pipeline_estagios import PipelineEstagios
+from services.metricas import METRICAS, execucao
+from services.manifesto import ManifestoIngestao, hash_conteudo
+from services.indice_raw import descrever_pagina, registrar_pagina_raw
+from services.deduplicacao import COLUNA_HASH, hash_registros
+from services.esquema import coluna_mes_ano, particionar, registros_particionaveis, tabela_registros
+from services.qualidade import EstatisticasQualidade
+
 load_dotenv()
 
-def request_num_pages():
-    url = "https://brasil.io/api/v1/dataset/gastos-diretos/gastos/data"
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-        "Authorization": f"Token {os.getenv('API_KEY')}"
-    }
-    response = requests.get(url, headers=headers)
+TAMANHO_PAGINA = 1000  # Registros por página retornados pela API
+
+# Limites de concorrência acordados com a brasil.io (sobrescritos via .env)
+MAX_REQUISICOES_SIMULTANEAS = int(os.getenv("MAX_REQUISICOES_SIMULTANEAS", "4"))
+REQUISICOES_POR_SEGUNDO = float(os.getenv("REQUISICOES_POR_SEGUNDO", "1.0"))
 
-    if response.status_code == 200:
-        dados = response.json()
-        num_pages = dados['count']
-        return num_pages
+# Páginas em espera entre os estágios do pipeline e intervalo (s) do relatório de progresso
+CAPACIDADE_FILAS_INGESTAO = int(os.getenv("CAPACIDADE_FILAS_INGESTAO", "16"))
+INTERVALO_RELATORIO_INGESTAO = float(os.getenv("INTERVALO_RELATORIO_INGESTAO", "10"))
+
+
+def request_num_pages(cliente=None, url=URL_API):
+    """Retorna o número real de páginas (count / tamanho da página)"""
+    cliente_local = cliente is None
+    if cliente_local:
+        cliente = ClienteAPI(LimitadorTaxa(REQUISICOES_POR_SEGUNDO), max_conexoes=1, url=url)
+    
+    try:
+        dados = cliente.obter(descricao="contagem de paginas")
+    finally:
+        if cliente_local:
+            cliente.fechar()
+    
+    tamanho_pagina = len(dados.get('results') or []) or TAMANHO_PAGINA
+    num_pages = math.ceil(dados['count'] / tamanho_pagina)
+    return num_pages
 
-def processar_dados_streaming(dados, pagina):
-    """Processa dados imediatamente após download e salva particionado"""
+def normalizar_pagina(dados, pagina):
+    """
+    Converte os registros de uma página na tabela tipada gravada na bronze
+    Args:
+        dados: JSON da página
+        pagina: número da página
+    Returns:
+        pyarrow.Table no esquema declarado, com mes_ano, _pagina_origem e o
+        hash de cada registro (None se a página não tiver registros com mes/ano)
+    """
     if 'results' not in dados or not dados['results']:
-        return
+        return None
     
-    # Normalizar os dados
-    df = pd.json_normalize(dados['results'])
+    with METRICAS.etapa("bronze_normalizacao"):
+        tabela = _normalizar_registros(dados, pagina)
+    if tabela is not None:
+        METRICAS.contar("registros", tabela.num_rows, etapa="bronze_normalizacao")
+    return tabela
+
+def _normalizar_registros(dados, pagina):
+    # Converter os registros direto em colunas tipadas pelo esquema declarado
+    registros = dados['results']
+    tabela = tabela_registros(registros)
+    if 'mes' not in tabela.column_names or 'ano' not in tabela.column_names:
+        print(f"Página {pagina}: Dados sem mes/ano - página não particionada")
+        return None
+    hashes = pa.array(hash_registros(registros), type=pa.int64())
+    
+    # Descartar registros sem ano/mes válidos, que não têm partição
+    validos = registros_particionaveis(tabela)
+    descartados = tabela.num_rows - pc.sum(validos).as_py()
+    if descartados == tabela.num_rows:
+        print(f"Página {pagina}: Dados sem mes/ano - página não particionada")
+        return None
+    if descartados:
+        print(f"Página {pagina}: {descartados} registro(s) sem mes/ano válidos descartados")
+        tabela = tabela.filter(validos)
+        hashes = hashes.filter(validos)
     
-    # Verificar se tem as colunas necessárias
-    if 'mes' not in df.columns or 'ano' not in df.columns:
-        print(f"Página {pagina}: Dados sem mes/ano - salvando sem particionamento")
+    # mes_ano (primeiro dia do mês), a página de origem e o hash do registro
+    tabela = tabela.append_column('mes_ano', coluna_mes_ano(tabela))
+    tabela = tabela.append_column('_pagina_origem', pa.array(np.full(tabela.num_rows, pagina, dtype=np.int64)))
+    return tabela.append_column(COLUNA_HASH, hashes)
+
+def processar_dados_streaming(dados, pagina, escritor=None, qualidade=None):
+    """
+    Processa dados imediatamente após download e salva particionado
+    Args:
+        dados: JSON da página
+        pagina: número da página
+        escritor: EscritorBronze compartilhado; sem ele os registros da
+            página são gravados em novos arquivos na hora
+        qualidade: EstatisticasQualidade que acumula a qualidade das páginas
+    """
+    tabela = normalizar_pagina(dados, pagina)
+    if tabela is None:
         return
     
-    # Criar coluna mes_ano
-    df["mes_ano"] = pd.to_datetime(df["ano"].astype(str) + "-" + df["mes"].astype(str), format="%Y-%m")
-    df["ano_mes"] = df["ano"].astype(str) + "_" + df["mes"].astype(str).str.zfill(2)
-    df["_pagina_origem"] = pagina
+    if qualidade is not None:
+        with METRICAS.etapa("bronze_qualidade"):
+            qualidade.atualizar(tabela)
     
-    # Agrupar por ano_mes e salvar particionado
-    grupos = df.groupby('ano_mes')
+    escritor_local = escritor is None
+    if escritor_local:
+        escritor = EscritorBronze()
     
-    for ano_mes, grupo in grupos:
-        # Criar diretório da partição
-        partition_path = Path("dataset/bronze") / f"ano_mes={ano_mes}"
-        partition_path.mkdir(parents=True, exist_ok=True)
+    # Separar pela chave numérica ano*100+mes e enviar ao escritor (append-only, sem reler a partição)
+    for ano_mes, particao in particionar(tabela):
+        escritor.adicionar(ano_mes, particao, pagina)
         
-        # Arquivo parquet da partição
-        arquivo_parquet = partition_path / f"dados_{ano_mes}.parquet"
-        
-        # Remover coluna de particionamento antes de salvar
-        grupo_clean = grupo.drop(columns=['ano_mes'])
-        
-        # Append se já existir
-        if arquivo_parquet.exists():
-            df_existente = pd.read_parquet(arquivo_parquet)
-            df_combined = pd.concat([df_existente, grupo_clean], ignore_index=True)
-            df_combined.to_parquet(arquivo_parquet, index=False)
-        else:
-            grupo_clean.to_parquet(arquivo_parquet, index=False)
-        
-        print(f"  -> Particao {ano_mes}: +{len(grupo_clean)} registros")
-
-def salvar_json_comprimido(dados, pagina):
-    """Salva JSON comprimido na pasta raw"""
-    arquivo_gz = f"dataset/raw/gastos_diretos_page_{pagina}.json.gz"
-    
-    with gzip.open(arquivo_gz, 'wt', encoding='utf-8') as f:
-        json.dump(dados, f, indent=2)
-    
-def salvar_checkpoint(pagina_atual, arquivo_checkpoint="dataset/raw/checkpoint.txt"):
-    """Salva o progresso atual"""
-    Path(arquivo_checkpoint).parent.mkdir(parents=True, exist_ok=True)
-    with open(arquivo_checkpoint, 'w') as f:
-        f.write(str(pagina_atual))
+        print(f"  -> Particao {ano_mes}: +{particao.num_rows} registros")
+    
+    if escritor_local:
+        escritor.fechar()
 
-def carregar_checkpoint(arquivo_checkpoint="dataset/raw/checkpoint.txt"):
-    """Carrega o progresso salvo"""
+def salvar_json_comprimido(dados, pagina, escritor=None):
+    """
+    Salva a página comprimida na pasta raw e registra a página no índice da raw
+    Args:
+        dados: JSON da página
+        pagina: número da página
+        escritor: EscritorRaw compartilhado (padrão: um arquivo por página,
+            no formato configurado, ou um segmento próprio no formato ndjson)
+    """
+    escritor_local = escritor is None
+    if escritor_local:
+        escritor = EscritorRaw()
+    
     try:
-        with open(arquivo_checkpoint, 'r') as f:
-            return int(f.read().strip())
-    except FileNotFoundError:
-        return 2  # Página inicial padrão
+        with METRICAS.etapa("raw_gravacao"):
+            gravado = escritor.salvar(dados, pagina)
+    finally:
+        if escritor_local:
+            escritor.fechar()
+    METRICAS.contar("paginas", etapa="raw_gravacao")
+    METRICAS.contar("bytes", gravado['bytes_comprimido'], etapa="raw_gravacao")
+    METRICAS.contar("bytes_descomprimidos", gravado['bytes_descomprimido'], etapa="raw_gravacao")
+    
+    registrar_pagina_raw(descrever_pagina(
+        dados, pagina, gravado['arquivo'], gravado['bytes_descomprimido'], gravado['bytes_comprimido'],
+        gravado['offset'], gravado['formato'], gravado['codec'],
+    ))
+    
+def buscar_pagina(pagina, cliente):
+    """
+    Baixa uma página da API
+    Args:
+        pagina: número da página
+        cliente: ClienteAPI compartilhado entre as threads (limite de taxa,
+            novas tentativas e circuit breaker)
+    Returns:
+        dict com o JSON da página
+    Raises:
+        FalhaRequisicao: a página esgotou as tentativas ou teve erro definitivo
+    """
+    return cliente.obter(params={"page": pagina}, descricao=f"pagina {pagina}")
 
-def ingestão_gastos_diretos(num_pages):
+@execucao("ingestao")
+def ingestão_gastos_diretos(num_pages, max_requisicoes=MAX_REQUISICOES_SIMULTANEAS,
+                            requisicoes_por_segundo=REQUISICOES_POR_SEGUNDO,
+                            capacidade_filas=CAPACIDADE_FILAS_INGESTAO, url=URL_API):
     """
     Ingere dados da API com processamento streaming e JSONs comprimidos
+    Pipeline em três estágios ligados por filas limitadas, que rodam ao mesmo
+    tempo: download (várias threads), gravação da raw e normalização/gravação
+    da bronze. Com as filas cheias o download espera (backpressure).
     Args:
         num_pages: número total de páginas
+        max_requisicoes: número máximo de requisições simultâneas
+        requisicoes_por_segundo: teto de requisições por segundo (token bucket)
+        capacidade_filas: páginas em espera entre um estágio e o seguinte
+        url: endpoint da API (ex.: o servidor simulado)
+    Returns:
+        dict com registros, paginas, falhas e o desempenho por estágio
     """
-    checkpoint_path = "dataset/raw/checkpoint.txt"
-    
     # Criar diretórios se não existirem
     Path("dataset/raw").mkdir(parents=True, exist_ok=True)
     Path("dataset/bronze").mkdir(parents=True, exist_ok=True)
     
-    # Carregar checkpoint
-    init = carregar_checkpoint(checkpoint_path)
-    print(f"Iniciando da página {init}")
-    print("Processamento streaming ativo: dados serão processados conforme chegam\n")
+    # Carregar manifesto e baixar apenas as páginas que faltam
+    manifesto = ManifestoIngestao()
+    manifesto.definir_total(num_pages)
+    faltantes = manifesto.faltantes(num_pages)
+    print(f"Paginas ja concluidas: {len(manifesto.paginas):,} | Faltantes: {len(faltantes):,}")
+    falhas_anteriores = paginas_com_falha()
+    if falhas_anteriores:
+        print(f"Paginas com falha em execucoes anteriores (tentadas de novo): {len(falhas_anteriores):,}")
+    print(f"Requisicoes simultaneas: {max_requisicoes} | Limite: {requisicoes_por_segundo} req/s")
+    print(f"Pipeline: download -> raw -> bronze (filas de {capacidade_filas} paginas)\n")
     
     total_processados = 0
+    cliente = ClienteAPI(LimitadorTaxa(requisicoes_por_segundo), max_conexoes=max_requisicoes, url=url)
+    falhas = []
     
-    for i in range(init, num_pages + 1):
-        while True:
-            try:
-                url = f"https://brasil.io/api/v1/dataset/gastos-diretos/gastos/data?page={i}"
-                headers = {
-                    "Accept": "application/json",
-                    "Content-Type": "application/json",
-                    "Authorization": f"Token {os.getenv('API_KEY')}"
-                }
-                response = requests.get(url, headers=headers)
-
-                if response.status_code == 200:
-                    dados = response.json()
-                    
-                    # 1. Salvar JSON comprimido na raw
-                    arquivo_gz = salvar_json_comprimido(dados, i)
-                    print(f"Página {i}: JSON comprimido salvo")
-                    
-                    # 2. Processar dados imediatamente (streaming)
-                    if dados.get('results'):
-                        processar_dados_streaming(dados, i)
-                        total_processados += len(dados['results'])
-                    
-                    # 3. Salvar checkpoint
-                    salvar_checkpoint(i + 1, checkpoint_path)
-                    
-                    print(f"Página {i}: Concluída (Total processados: {total_processados:,})\n")
-                    
-                    time.sleep(2)  # Tempo entre requisições
-                    break  # Sai do while e vai para a próxima página
-                else:
-                    raise Exception(f"Falha na requisição: {response.status_code}")
-            except Exception as e:
-                print(f"Erro ao processar a página {i}: {e}")
-                print("Aguardando 10 segundos antes de tentar novamente...")
-                time.sleep(10)
-    
-    # Remover checkpoint ao finalizar
-    if Path(checkpoint_path).exists():
-        os.remove(checkpoint_path)
+    # Buffer da bronze: uma página só entra no manifesto depois que
+    # todos os seus registros foram gravados em disco
+    escritor = EscritorBronze()
+    escritor_raw = EscritorRaw()
+    aguardando = {}
+    qualidade = EstatisticasQualidade()
+    
+    def registrar_concluidas():
+        pendentes = escritor.paginas_pendentes()
+        for pagina in [p for p in aguardando if p not in pendentes]:
+            manifesto.registrar(pagina, *aguardando.pop(pagina))
+    
+    # Estágio 1: download (várias threads, limitadas pelo token bucket)
+    # Páginas que esgotam as tentativas vão para a lista de falhas e ficam
+    # fora do manifesto, sendo baixadas de novo na próxima execução
+    def baixar(pagina):
+        try:
+            return pagina, buscar_pagina(pagina, cliente)
+        except FalhaRequisicao as e:
+            print(f"Página {pagina}: FALHOU ({e})")
+            registrar_pagina_falha(pagina, e)
+            falhas.append(pagina)
+            return None
+    
+    # Estágio 2: raw
+    def gravar_raw(item):
+        pagina, dados = item
+        salvar_json_comprimido(dados, pagina, escritor_raw)
+        print(f"Página {pagina}: JSON comprimido salvo")
+        return item
+    
+    # Estágio 3: bronze e manifesto (uma thread: escritor e manifesto não são compartilhados)
+    def gravar_bronze(item):
+        nonlocal total_processados
+        pagina, dados = item
+        if dados.get('results'):
+            processar_dados_streaming(dados, pagina, escritor, qualidade)
+            total_processados += len(dados['results'])
+        
+        aguardando[pagina] = (len(dados.get('results') or []), hash_conteudo(dados))
+        registrar_concluidas()
+        print(f"Página {pagina}: Concluída (Total processados: {total_processados:,})\n")
+    
+    pipeline = (
+        PipelineEstagios(capacidade_filas)
+        .adicionar_estagio("download", baixar, threads=max_requisicoes)
+        .adicionar_estagio("raw", gravar_raw)
+        .adicionar_estagio("bronze", gravar_bronze)
+    )
+    
+    try:
+        desempenho = pipeline.executar(faltantes, intervalo_relatorio=INTERVALO_RELATORIO_INGESTAO)
+    finally:
+        cliente.fechar()
+        escritor_raw.fechar()
+        escritor.fechar()
+        registrar_concluidas()
+        manifesto.compactar()
+        remover_paginas_falhas(manifesto.paginas)
+    
+    print("=" * 60)
+    print("Desempenho por estagio:")
+    for nome, stats in desempenho.items():
+        print(f"  {nome}: {stats['itens']:,} paginas | {stats['vazao']:.2f} pag/s | "
+              f"ocupacao {stats['ocupacao']:.0%}")
+    print(f"Requisicoes: {cliente.estatisticas['requisicoes']:,} | "
+          f"novas tentativas: {cliente.estatisticas['novas_tentativas']:,} | "
+          f"Retry-After: {cliente.estatisticas['retry_after']:,}")
+    if falhas:
+        print(f"Paginas com falha: {len(falhas):,} (registradas em {ARQUIVO_PAGINAS_FALHAS})")
     
     print("=" * 60)
     print("Ingestao concluida com sucesso!")
     print(f"Total de registros processados: {total_processados:,}")
     print(f"JSONs comprimidos salvos em: dataset/raw/")
     print(f"Dados particionados por ano_mes em: dataset/bronze/")
-    print("=" * 60)
\ No newline at end of file
+    
+    validacao = qualidade.resultado()
+    print(f"Qualidade dos dados ingeridos: {validacao['status']}")
+    for tipo, qtd in validacao['valores_invalidos'].items():
+        if qtd > 0:
+            print(f"  {tipo}: {qtd:,}")
+    print("=" * 60)
+    
+    return {
+        'registros': total_processados,
+        'paginas': len(faltantes) - len(falhas),
+        'falhas': falhas,
+        'desempenho': desempenho,
+    }
@@ -0,0 +1,303 @@
+"""
+Servidor local que imita o endpoint de gastos diretos da brasil.io
+Serve páginas paginadas no mesmo formato da API (count, next, previous,
+results), geradas sinteticamente em escala configurável ou relidas da raw,
+com latência, respostas 429 (com Retry-After) e falhas 500 injetáveis. Permite
+testar e medir a ingestão sem chave de API.
+
+Uso:
+    python -m services.servidor_simulado --paginas 200 --latencia 0.05 --taxa-429 0.02
+    URL_API=http://127.0.0.1:8000/api/v1/dataset/gastos-diretos/gastos/data python main.py ingerir
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from services.formato_raw import codec_do_arquivo, ler_arquivo_raw, ler_pagina_raw, listar_arquivos_raw_disco
+from services.indice_raw import carregar_indice
+
+CAMINHO_API = "/api/v1/dataset/gastos-diretos/gastos/data"
+
+# Valores usados pelos registros sintéticos
+_ORGAOS = [
+    ("MINISTERIO DA EDUCACAO", "FUNDACAO UNIVERSIDADE FEDERAL DE OURO PRETO"),
+    ("MINISTERIO DA SAUDE", "FUNDO NACIONAL DE SAUDE"),
+    ("MINISTERIO DA DEFESA", "COMANDO DO EXERCITO"),
+    ("MINISTERIO DA FAZENDA", "SECRETARIA DO TESOURO NACIONAL"),
+    ("MINISTERIO DA JUSTICA", "DEPARTAMENTO DE POLICIA FEDERAL"),
+    ("MINISTERIO DO DESENVOLVIMENTO SOCIAL", "FUNDO NACIONAL DE ASSISTENCIA SOCIAL"),
+]
+_FUNCOES = ["Educação", "Saúde", "Defesa nacional", "Assistência social", "Segurança pública"]
+_ELEMENTOS = ["Auxílio Financeiro a Estudantes", "Diárias - Civil", "Material de Consumo",
+              "Outros Serviços de Terceiros - Pessoa Jurídica", "Obrigações Tributárias e Contributivas"]
+_NOMES = ["ANA", "JOSE", "MARIA", "JOAO", "FRANCISCA", "ANTONIO", "PAULO", "LUCIA", "CARLOS", "MARCIA"]
+_SOBRENOMES = ["SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "LIMA", "PEREIRA", "COSTA", "RODRIGUES"]
+
+
+class FonteSintetica:
+    """
+    Páginas geradas de forma determinística (mesma semente, mesmos registros)
+    Como na API real, as páginas seguem a ordem cronológica: cada mês ocupa
+    `paginas_por_mes` páginas consecutivas (voltando ao primeiro mês após `ano_fim`)
+    Args:
+        paginas: total de páginas servidas
+        tamanho_pagina: registros por página
+        ano_inicio / ano_fim: intervalo de anos dos registros
+        paginas_por_mes: páginas consecutivas com registros do mesmo mês
+        semente: semente do gerador
+    """
+
+    def __init__(self, paginas=100, tamanho_pagina=1000, ano_inicio=2013, ano_fim=2017,
+                 paginas_por_mes=10, semente=42):
+        self.paginas = paginas
+        self.tamanho_pagina = tamanho_pagina
+        self.ano_inicio = ano_inicio
+        self.ano_fim = ano_fim
+        self.paginas_por_mes = paginas_por_mes
+        self.semente = semente
+
+    @property
+    def total_registros(self):
+        return self.paginas * self.tamanho_pagina
+
+    def _registro(self, aleatorio, indice, ano, mes):
+        orgao_superior, orgao = aleatorio.choice(_ORGAOS)
+        return {
+            "ano": ano,
+            "mes": mes,
+            "codigo_acao": str(aleatorio.randint(1000, 9999)),
+            "codigo_elemento_despesa": aleatorio.randint(1, 99),
+            "codigo_favorecido": f"***{aleatorio.randint(0, 999999):06d}**",
+            "codigo_funcao": aleatorio.randint(1, 28),
+            "codigo_orgao": aleatorio.randint(20000, 99999),
+            "codigo_unidade_gestora": aleatorio.randint(100000, 999999),
+            "data_pagamento": f"{ano}-{mes:02d}-{aleatorio.randint(1, 28):02d}",
+            "nome_elemento_despesa": aleatorio.choice(_ELEMENTOS),
+            "nome_favorecido": f"{aleatorio.choice(_NOMES)} {aleatorio.choice(_SOBRENOMES)}",
+            "nome_funcao": aleatorio.choice(_FUNCOES),
+            "nome_orgao": orgao,
+            "nome_orgao_superior": orgao_superior,
+            "numero_documento": f"{ano}OB{indice:06d}",
+            "valor": f"{aleatorio.lognormvariate(6, 1.5):.2f}",
+        }
+
+    def pagina(self, numero):
+        """Registros da página (None se fora do intervalo)"""
+        if not 1 <= numero <= self.paginas:
+            return None
+        aleatorio = random.Random(self.semente * 1_000_003 + numero)
+        meses = (self.ano_fim - self.ano_inicio + 1) * 12
+        ano, mes = divmod((numero - 1) // self.paginas_por_mes % meses, 12)
+        inicio = (numero - 1) * self.tamanho_pagina
+        return [self._registro(aleatorio, inicio + i, self.ano_inicio + ano, mes + 1)
+                for i in range(self.tamanho_pagina)]
+
+
+class FonteRaw:
+    """
+    Páginas relidas da camada raw, renumeradas de 1 a N na ordem original
+    (a raw pode ter lacunas; a API simulada não)
+    Args:
+        raw_path: diretório da raw (índice usado quando existir)
+        limite: máximo de páginas servidas
+    """
+
+    def __init__(self, raw_path="dataset/raw", limite=None):
+        self.raw_path = Path(raw_path)
+        entradas = carregar_indice(self.raw_path / "indice_raw.jsonl")
+        if not entradas:
+            # Sem índice: localizar páginas pelos arquivos (segmentos são lidos uma vez)
+            for arquivo in listar_arquivos_raw_disco(self.raw_path):
+                for pagina, _, posicao in ler_arquivo_raw(arquivo):
+                    entradas[pagina] = {'pagina': pagina, 'arquivo': arquivo.name, **posicao,
+                                        'codec': codec_do_arquivo(arquivo)}
+        self._entradas = [entradas[p] for p in sorted(entradas)][:limite]
+        if not self._entradas:
+            raise FileNotFoundError(f"Nenhuma página encontrada em {self.raw_path}")
+        self.paginas = len(self._entradas)
+        self.tamanho_pagina = self._entradas[0].get('registros') or 1000
+
+    @property
+    def total_registros(self):
+        return sum(e.get('registros') or self.tamanho_pagina for e in self._entradas)
+
+    def pagina(self, numero):
+        if not 1 <= numero <= self.paginas:
+            return None
+        return ler_pagina_raw(self._entradas[numero - 1], self.raw_path).get('results') or []
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    servidor_simulado = None  # definido por ServidorSimulado
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, status, corpo=None, cabecalhos=None):
+        conteudo = json.dumps(corpo, ensure_ascii=False).encode("utf-8") if corpo is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(conteudo)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def do_GET(self):
+        simulado = self.servidor_simulado
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != CAMINHO_API:
+            self._responder(404, {"detail": "Not found."})
+            return
+
+        simulado._contar('requisicoes')
+        falha = simulado.sortear_falha()
+        if simulado.latencia:
+            time.sleep(simulado.sortear_latencia())
+        if falha == 429:
+            simulado._contar('respostas_429')
+            self._responder(429, {"detail": "Request was throttled."},
+                            {"Retry-After": f"{simulado.retry_after:g}"})
+            return
+        if falha == 500:
+            simulado._contar('respostas_500')
+            self._responder(500, {"detail": "Internal server error."})
+            return
+
+        try:
+            numero = int(parse_qs(url.query).get("page", ["1"])[0])
+        except ValueError:
+            numero = 0
+        registros = simulado.fonte.pagina(numero)
+        if registros is None:
+            self._responder(404, {"detail": "Invalid page."})
+            return
+
+        base = f"http://{self.headers.get('Host', 'localhost')}{CAMINHO_API}/"
+        self._responder(200, {
+            "count": simulado.fonte.total_registros,
+            "next": f"{base}?page={numero + 1}" if numero < simulado.fonte.paginas else None,
+            "previous": f"{base}?page={numero - 1}" if numero > 1 else None,
+            "results": registros,
+        })
+        simulado._contar('paginas_servidas')
+
+
+class ServidorSimulado:
+    """
+    API brasil.io simulada rodando em uma thread
+    Args:
+        fonte: FonteSintetica ou FonteRaw
+        latencia: latência média (s) por requisição, com variação de ±50%
+        taxa_429: probabilidade de responder 429
+        retry_after: valor (s) do cabeçalho Retry-After nas respostas 429
+        taxa_falhas: probabilidade de responder 500
+        limite_por_segundo: acima dessa taxa responde 429, como a API real (None: sem limite)
+        host / porta: endereço (porta 0 escolhe uma livre)
+        semente: semente do sorteio de latências e falhas
+    """
+
+    def __init__(self, fonte, latencia=0.0, taxa_429=0.0, retry_after=1.0, taxa_falhas=0.0,
+                 limite_por_segundo=None, host="127.0.0.1", porta=0, semente=0):
+        self.fonte = fonte
+        self.latencia = latencia
+        self.taxa_429 = taxa_429
+        self.retry_after = retry_after
+        self.taxa_falhas = taxa_falhas
+        self.limite_por_segundo = limite_por_segundo
+        self.estatisticas = {'requisicoes': 0, 'paginas_servidas': 0, 'respostas_429': 0, 'respostas_500': 0}
+        self._aleatorio = random.Random(semente)
+        self._janela = []
+        self._lock = threading.Lock()
+
+        manipulador = type("Manipulador", (_Manipulador,), {'servidor_simulado': self})
+        self._servidor = ThreadingHTTPServer((host, porta), manipulador)
+        self._servidor.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}{CAMINHO_API}"
+
+    def _contar(self, chave):
+        with self._lock:
+            self.estatisticas[chave] += 1
+
+    def sortear_latencia(self):
+        with self._lock:
+            return self.latencia * self._aleatorio.uniform(0.5, 1.5)
+
+    def sortear_falha(self):
+        """429, 500 ou None para a requisição atual"""
+        with self._lock:
+            if self.limite_por_segundo:
+                agora = time.monotonic()
+                self._janela = [t for t in self._janela if agora - t < 1.0]
+                if len(self._janela) >= self.limite_por_segundo:
+                    return 429
+                self._janela.append(agora)
+            sorteio = self._aleatorio.random()
+        if sorteio < self.taxa_429:
+            return 429
+        if sorteio < self.taxa_429 + self.taxa_falhas:
+            return 500
+        return None
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._servidor.serve_forever, name="servidor-simulado", daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API brasil.io simulada (gastos diretos)")
+    parser.add_argument("--paginas", type=int, help="páginas servidas (sintéticas: 100)")
+    parser.add_argument("--tamanho-pagina", type=int, default=1000)
+    parser.add_argument("--raw", help="servir as páginas desta pasta raw em vez de dados sintéticos")
+    parser.add_argument("--latencia", type=float, default=0.0, help="latência média (s)")
+    parser.add_argument("--taxa-429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--taxa-falhas", type=float, default=0.0)
+    parser.add_argument("--limite-por-segundo", type=float)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    fonte = (FonteRaw(args.raw, limite=args.paginas) if args.raw
+             else FonteSintetica(args.paginas or 100, args.tamanho_pagina))
+    servidor = ServidorSimulado(
+        fonte, latencia=args.latencia, taxa_429=args.taxa_429, retry_after=args.retry_after,
+        taxa_falhas=args.taxa_falhas, limite_por_segundo=args.limite_por_segundo,
+        host=args.host, porta=args.porta,
+    )
+    print(f"API simulada em {servidor.url} ({fonte.paginas} paginas)")
+    try:
+        servidor._servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor._servidor.server_close()
+        print(f"Estatisticas: {servidor.estatisticas}")
+
+
+if __name__ == "__main__":
+    main()
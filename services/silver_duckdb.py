@@ -0,0 +1,231 @@
+"""
+Motor DuckDB para o pipeline Bronze -> Silver
+Executa os mesmos passos do motor pandas (deduplicação, conversão de tipos,
+padronização de textos, filtro valor > 0, ano_mes e validação) em SQL direto
+sobre os parquets da bronze. O DuckDB processa em paralelo e usa disco quando
+os dados não cabem na memória.
+"""
+
+import logging
+import os
+import shutil
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from services.bronze_compactor import concluir_compactacoes_pendentes
+from services.deduplicacao import COLUNA_HASH, hash_tabela
+from services.esquema import COLUNAS_TEXTO, ESQUEMA_GASTOS
+from services.qualidade import COLUNAS_ESTATISTICAS, REGRAS_QUALIDADE, EstatisticasQualidade, verificar_colunas
+
+logger = logging.getLogger(__name__)
+
+# Tipos Arrow do esquema declarado -> tipos do DuckDB. Datas saem como
+# TIMESTAMP_MS, a mesma unidade que o motor pandas grava na silver
+_TIPOS_DUCKDB = {
+    pa.int8(): 'TINYINT', pa.int16(): 'SMALLINT', pa.int32(): 'INTEGER', pa.int64(): 'BIGINT',
+    pa.float64(): 'DOUBLE', pa.string(): 'VARCHAR', pa.date32(): 'TIMESTAMP_MS',
+}
+
+
+def _q(coluna):
+    """Identificador SQL entre aspas"""
+    return '"' + coluna.replace('"', '""') + '"'
+
+
+def _expressao_coluna(coluna):
+    """Expressão SQL da transformação de uma coluna (equivalente a transformar_dados)"""
+    if coluna == 'mes_ano':
+        # Recalculada a partir de ano/mes (a bronze antiga a grava em ns)
+        return "CAST(make_date(TRY_CAST(ano AS BIGINT), TRY_CAST(mes AS BIGINT), 1) AS TIMESTAMP_MS) AS mes_ano"
+    if coluna in COLUNAS_TEXTO:
+        texto = f"upper(trim(CAST({_q(coluna)} AS VARCHAR)))"
+        return f"CASE WHEN {texto} IN ('NAN', 'NONE', '') THEN NULL ELSE {texto} END AS {_q(coluna)}"
+    if coluna in ESQUEMA_GASTOS.names:
+        tipo = _TIPOS_DUCKDB[ESQUEMA_GASTOS.field(coluna).type]
+        if tipo == 'TIMESTAMP_MS':
+            # Bronze antiga traz a data em texto: passar por DATE antes do timestamp
+            return f"CAST(TRY_CAST({_q(coluna)} AS DATE) AS TIMESTAMP_MS) AS {_q(coluna)}"
+        return f"TRY_CAST({_q(coluna)} AS {tipo}) AS {_q(coluna)}"
+    return _q(coluna)
+
+
+def _sql_transformacao(colunas):
+    """SELECT que lê a view `bronze` e produz as linhas da silver"""
+    selecao = ",\n        ".join(_expressao_coluna(c) for c in colunas)
+    ano_mes = ""
+    if 'ano' in colunas and 'mes' in colunas:
+        ano_mes = ",\n        CAST(ano AS VARCHAR) || '_' || lpad(CAST(mes AS VARCHAR), 2, '0') AS ano_mes"
+
+    filtro = "WHERE valor > 0" if 'valor' in colunas else ""
+
+    # Chave de deduplicação: o hash do registro (gravado na bronze ou, nos
+    # arquivos antigos, calculado por hash_tabela como no motor pandas)
+    return f"""
+    WITH deduplicado AS (
+        SELECT * FROM bronze
+        QUALIFY row_number() OVER (PARTITION BY {_q(COLUNA_HASH)} ORDER BY filename, file_row_number) = 1
+    ), tipado AS (
+        SELECT
+        {selecao}
+        FROM deduplicado
+    )
+    SELECT *{ano_mes} FROM tipado
+    {filtro}
+    """
+
+
+def _registrar_bronze(con, arquivos):
+    """
+    Cria a view `bronze` sobre os arquivos, com `_hash_registro` em todas as
+    linhas: arquivos antigos, gravados sem hash, recebem o de hash_tabela
+    """
+    lista = ", ".join("'" + a.replace("'", "''") + "'" for a in arquivos)
+    leitura = f"""read_parquet([{lista}], union_by_name = true, hive_partitioning = false,
+                                filename = true, file_row_number = true)"""
+
+    sem_hash = [a for a in arquivos if COLUNA_HASH not in pq.read_schema(a).names]
+    if not sem_hash:
+        con.execute(f"CREATE VIEW bronze AS SELECT * FROM {leitura}")
+        return
+
+    hashes = []
+    for arquivo in sem_hash:
+        hash_arquivo = hash_tabela(pq.read_table(arquivo))
+        hashes.append(pa.table({
+            'arquivo': pa.array([arquivo] * len(hash_arquivo), type=pa.string()),
+            'linha': pa.array(np.arange(len(hash_arquivo), dtype=np.int64)),
+            'hash': hash_arquivo,
+        }))
+    con.register('hashes_bronze_antiga', pa.concat_tables(hashes))
+    logger.info(f"DuckDB: hash calculado para {len(sem_hash)} arquivo(s) antigo(s) da bronze")
+
+    tem_hash = len(sem_hash) < len(arquivos)
+    hash_gravado = f"b.{_q(COLUNA_HASH)}" if tem_hash else "NULL"
+    con.execute(f"""
+        CREATE VIEW bronze AS
+        SELECT b.* {'EXCLUDE (' + _q(COLUNA_HASH) + ')' if tem_hash else ''},
+               coalesce({hash_gravado}, h.hash) AS {_q(COLUNA_HASH)}
+        FROM {leitura} AS b
+        LEFT JOIN hashes_bronze_antiga AS h ON b.filename = h.arquivo AND b.file_row_number = h.linha
+    """)
+
+
+def _sql_validacao(colunas):
+    """Agregação única com nulos, violações de regras e estatísticas"""
+    verificar_colunas(colunas)
+    expressoes = ["count(*) AS total"]
+    for c in colunas:
+        expressoes.append(f"count(*) - count({_q(c)}) AS {_q('nulos:' + c)}")
+    for regra in REGRAS_QUALIDADE:
+        if regra['coluna'] not in colunas:
+            continue
+        col = _q(regra['coluna'])
+        condicoes = []
+        if 'minimo' in regra:
+            condicoes.append(f"{col} {'<=' if regra.get('minimo_exclusivo') else '<'} {regra['minimo']}")
+        if 'maximo' in regra:
+            condicoes.append(f"{col} > {regra['maximo']}")
+        expressoes.append(f"count_if({' OR '.join(condicoes)}) AS {_q('regra:' + regra['nome'])}")
+    for c in COLUNAS_ESTATISTICAS:
+        if c in colunas:
+            expressoes.append(
+                f"min({_q(c)})::DOUBLE AS {_q('min:' + c)}, max({_q(c)})::DOUBLE AS {_q('max:' + c)}, "
+                f"sum({_q(c)})::DOUBLE AS {_q('soma:' + c)}, count({_q(c)}) AS {_q('contagem:' + c)}"
+            )
+    return f"SELECT {', '.join(expressoes)} FROM silver"
+
+
+def _validacao_de_agregados(linha):
+    """Converte o resultado de _sql_validacao em um dict de validação"""
+    acumulador = EstatisticasQualidade()
+    acumulador.total = linha.pop('total')
+    for chave, valor in linha.items():
+        tipo, nome = chave.split(':', 1)
+        if tipo == 'nulos':
+            acumulador.nulos[nome] = int(valor)
+        elif tipo == 'regra':
+            acumulador.invalidos[nome] = int(valor)
+        elif tipo == 'contagem' and valor:
+            acumulador.estatisticas[nome] = {
+                'min': linha[f'min:{nome}'], 'max': linha[f'max:{nome}'],
+                'soma': linha[f'soma:{nome}'], 'contagem': int(valor),
+            }
+    return acumulador.resultado()
+
+
+def executar_pipeline_duckdb(bronze_path="dataset/bronze", silver_path="dataset/silver",
+                             threads=None, limite_memoria=None):
+    """
+    Executa o pipeline Bronze -> Silver no DuckDB (sempre um full refresh)
+    Args:
+        bronze_path: diretório da camada bronze
+        silver_path: diretório da camada silver
+        threads: threads do DuckDB (padrão: todos os núcleos)
+        limite_memoria: ex.: '4GB'; acima disso o DuckDB usa disco temporário
+    Returns:
+        dict de validação no formato de validar_qualidade
+    """
+    bronze_path = Path(bronze_path)
+    silver_path = Path(silver_path)
+
+    concluir_compactacoes_pendentes(bronze_path)
+    arquivos = [str(a) for a in sorted(bronze_path.glob("ano_mes=*/*.parquet"))]
+    if not arquivos:
+        raise FileNotFoundError("Nenhuma partição encontrada na bronze.")
+
+    con = duckdb.connect()
+    con.execute(f"SET temp_directory = '{silver_path.parent / '.duckdb_tmp'}'")
+    con.execute("SET preserve_insertion_order = false")
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    if limite_memoria:
+        con.execute(f"SET memory_limit = '{limite_memoria}'")
+
+    _registrar_bronze(con, arquivos)
+    colunas = [
+        linha[0] for linha in con.execute("DESCRIBE bronze").fetchall()
+        if linha[0] not in ('filename', 'file_row_number')
+    ]
+    logger.info(f"DuckDB: {len(colunas)} colunas lidas de {bronze_path}")
+
+    # A silver nova é gravada e validada em um diretório irmão; a atual só é
+    # substituída depois que tudo deu certo
+    destino = silver_path.with_name(f".{silver_path.name}_duckdb")
+    shutil.rmtree(destino, ignore_errors=True)
+    try:
+        con.execute(f"""
+            COPY ({_sql_transformacao(colunas)}) TO '{destino}'
+            (FORMAT PARQUET, PARTITION_BY (ano_mes), OVERWRITE_OR_IGNORE true,
+             FILENAME_PATTERN 'dados_silver_{{i}}')
+        """)
+
+        con.execute(f"""
+            CREATE VIEW silver AS
+            SELECT * FROM read_parquet('{destino}/ano_mes=*/*.parquet', hive_partitioning = false)
+        """)
+        colunas_silver = [linha[0] for linha in con.execute("DESCRIBE silver").fetchall()]
+        cursor = con.execute(_sql_validacao(colunas_silver))
+        nomes = [d[0] for d in cursor.description]
+        validacao = _validacao_de_agregados(dict(zip(nomes, cursor.fetchone())))
+    except BaseException:
+        con.close()
+        shutil.rmtree(destino, ignore_errors=True)
+        raise
+
+    # Full refresh: a troca do diretório descarta também o estado incremental
+    # e os índices de deduplicação do motor pandas
+    antiga = silver_path.with_name(f".{silver_path.name}_antiga")
+    shutil.rmtree(antiga, ignore_errors=True)
+    if silver_path.exists():
+        os.replace(silver_path, antiga)
+    destino.mkdir(parents=True, exist_ok=True)
+    os.replace(destino, silver_path)
+    shutil.rmtree(antiga, ignore_errors=True)
+    logger.info(f"DuckDB: silver gravada em {silver_path}")
+
+    con.close()
+    return validacao
@@ -3,14 +3,42 @@ Módulo de transformação Bronze -> Silver
 Realiza limpeza, validação e padronização dos dados
 """
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
+import hashlib
 import logging
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from services.bronze_compactor import concluir_compactacoes_pendentes
+from services.bronze_writer import sem_colunas_nulas
+from services.particoes import assinaturas_arquivos, carregar_estado, impressao_digital, salvar_estado
+from services.qualidade import EstatisticasQualidade, LIMITE_NULOS_CRITICOS
+from services.metricas import METRICAS, execucao, executar_medido
+from services.deduplicacao import COLUNA_HASH, IndiceDeduplicacao, filtrar_novos, hash_dataframe, hash_tabela
+from services.esquema import COLUNAS_TEXTO, conformar_tabela
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Teto de memória do modo streaming e quantas cópias dos dados a transformação
+# mantém vivas ao mesmo tempo (lote lido, cópia, filtros intermediários)
+LIMITE_MEMORIA_MB = 512
+FATOR_MEMORIA = 4
+
+# Estado do build incremental: impressão digital da partição bronze e validação
+# em cache de cada partição silver. Mudar a versão invalida todo o cache.
+ARQUIVO_ESTADO_SILVER = "dataset/silver/_estado.json"
+VERSAO_TRANSFORMACAO = 5
+
+# Processos usados para transformar partições em paralelo
+WORKERS_SILVER = os.cpu_count() or 1
+
 
 def ler_dados_bronze():
     """
@@ -23,6 +51,9 @@ def ler_dados_bronze():
     if not bronze_path.exists():
         raise FileNotFoundError("Pasta bronze não encontrada. Execute primeiro a ingestão de dados.")
     
+    # Uma compactação interrompida deixaria fragmentos e arquivo compactado juntos
+    concluir_compactacoes_pendentes(bronze_path)
+    
     # Buscar todas as partições
     particoes = list(bronze_path.glob("ano_mes=*/"))
     
@@ -36,7 +67,7 @@ def ler_dados_bronze():
     for particao in sorted(particoes):
         arquivos = list(particao.glob("*.parquet"))
         for arquivo in arquivos:
-            df = pd.read_parquet(arquivo)
+            df = completar_hashes(ler_arquivo_bronze(arquivo))
             dfs.append(df)
     
     df_bronze = pd.concat(dfs, ignore_index=True)
@@ -45,6 +76,59 @@ def ler_dados_bronze():
     return df_bronze
 
 
+def tabela_para_pandas(tabela):
+    """
+    Converte uma tabela/lote da bronze em DataFrame já nos tipos declarados
+    (arquivos antigos, com valor e datas em texto e sem hash, são convertidos
+    aqui); datas viram datetime64 em vez de objetos date
+    """
+    if isinstance(tabela, pa.RecordBatch):
+        tabela = pa.Table.from_batches([tabela])
+    # Arquivos sem hash: calcular sobre os valores originais, antes da conversão
+    if COLUNA_HASH not in tabela.column_names:
+        tabela = tabela.append_column(COLUNA_HASH, hash_tabela(tabela))
+    return conformar_tabela(tabela).to_pandas(date_as_object=False)
+
+
+def ler_arquivo_bronze(arquivo):
+    """Lê um arquivo da bronze como DataFrame tipado"""
+    return tabela_para_pandas(pq.read_table(arquivo))
+
+
+def normalizar_texto(serie):
+    """
+    Padroniza uma coluna de texto (trim + uppercase) como categórica:
+    a normalização roda uma vez por valor distinto e o resultado volta
+    para as linhas pelos códigos da categoria
+    Args:
+        serie: Series com os textos
+    Returns:
+        Series categórica normalizada, com 'NAN', 'NONE' e '' como nulos
+    """
+    categorica = serie.astype('category')
+    normalizadas = pd.Index(categorica.cat.categories.astype(str)).str.strip().str.upper()
+    normalizadas = normalizadas.where(~normalizadas.isin(['NAN', 'NONE', '']))
+    
+    # Valores distintos que viram o mesmo texto normalizado compartilham um código
+    codigos_normalizados, categorias = pd.factorize(normalizadas)
+    codigos = categorica.cat.codes.to_numpy()
+    if len(codigos_normalizados):
+        codigos = np.where(codigos >= 0, codigos_normalizados[codigos], -1)
+    
+    return pd.Series(
+        pd.Categorical.from_codes(codigos, categories=categorias),
+        index=serie.index, name=serie.name
+    )
+
+
+def completar_hashes(df):
+    """Calcula a coluna de hash do registro para arquivos da bronze gravados sem ela"""
+    if COLUNA_HASH not in df.columns:
+        df[COLUNA_HASH] = hash_dataframe(df)
+    return df
+
+
+@METRICAS.etapa("silver_transformacao")
 def transformar_dados(df):
     """
     Aplica transformações e limpeza nos dados
@@ -57,31 +141,33 @@ def transformar_dados(df):
     
     logger.info("Iniciando transformações...")
     
-    # 1. Remover duplicatas completas
+    # 1. Remover duplicatas pelo hash do conteúdo do registro (calculado na
+    # bronze; recalculado para arquivos antigos gravados sem ele)
     registros_antes = len(df_silver)
-    df_silver = df_silver.drop_duplicates()
+    with METRICAS.etapa("silver_deduplicacao"):
+        df_silver = completar_hashes(df_silver)
+        df_silver = df_silver.drop_duplicates(subset=[COLUNA_HASH])
     duplicatas_removidas = registros_antes - len(df_silver)
     if duplicatas_removidas > 0:
         logger.info(f"Removidas {duplicatas_removidas:,} duplicatas")
     
-    # 2. Converter tipos de dados
+    # 2. Converter tipos de dados (a bronze já vem tipada pelo esquema
+    # declarado; só colunas ainda em texto são convertidas)
     # Colunas numéricas
     colunas_numericas = ['valor', 'ano', 'mes']
     for col in colunas_numericas:
-        if col in df_silver.columns:
+        if col in df_silver.columns and not pd.api.types.is_numeric_dtype(df_silver[col]):
             df_silver[col] = pd.to_numeric(df_silver[col], errors='coerce')
     
     # Converter data mes_ano
-    if 'mes_ano' in df_silver.columns:
+    if 'mes_ano' in df_silver.columns and not pd.api.types.is_datetime64_any_dtype(df_silver['mes_ano']):
         df_silver['mes_ano'] = pd.to_datetime(df_silver['mes_ano'], errors='coerce')
     
-    # 3. Padronizar strings (uppercase e trim)
-    colunas_texto = ['orgao', 'favorecido', 'uf_favorecido', 'unidade_gestora', 'tipo_favorecido']
-    for col in colunas_texto:
+    # 3. Padronizar strings (uppercase e trim) como categóricas
+    # 'NAN', 'NONE' e '' viram valores nulos reais
+    for col in COLUNAS_TEXTO:
         if col in df_silver.columns:
-            df_silver[col] = df_silver[col].astype(str).str.strip().str.upper()
-            # Substituir 'NAN' e 'NONE' por valores nulos reais
-            df_silver[col] = df_silver[col].replace(['NAN', 'NONE', ''], pd.NA)
+            df_silver[col] = normalizar_texto(df_silver[col])
     
     # 4. Validar e limpar dados
     # Remover registros com valores negativos ou zero
@@ -99,14 +185,24 @@ def transformar_dados(df):
             df_silver['mes'].astype(str).str.zfill(2)
         )
     
+    METRICAS.contar("registros_entrada", len(df), etapa="silver_transformacao")
+    METRICAS.contar("registros", len(df_silver), etapa="silver_transformacao")
     logger.info("Transformações concluídas")
     
     return df_silver
 
 
+def _alertar_colunas_criticas(validacao):
+    for col, stats in validacao['colunas_criticas'].items():
+        if stats['nulos'] / max(validacao['total_registros'], 1) > LIMITE_NULOS_CRITICOS:
+            logger.warning(f"Coluna '{col}' tem {stats['nulos']:,} nulos ({stats['percentual']}%)")
+
+
+@METRICAS.etapa("silver_validacao")
 def validar_qualidade(df):
     """
-    Valida a qualidade dos dados transformados
+    Valida a qualidade dos dados transformados em uma única passada
+    (regras declaradas em services.qualidade)
     Args:
         df: DataFrame transformado
     Returns:
@@ -114,57 +210,33 @@ def validar_qualidade(df):
     """
     logger.info("Iniciando validação de qualidade...")
     
-    validacao = {
-        'total_registros': len(df),
-        'colunas_criticas': {},
-        'valores_nulos': {},
-        'valores_invalidos': {},
-        'status': 'OK'
-    }
-    
-    # Colunas críticas que não devem ter nulos
-    colunas_criticas = ['valor', 'ano', 'mes', 'orgao', 'favorecido']
-    
-    for col in colunas_criticas:
-        if col in df.columns:
-            nulos = df[col].isna().sum()
-            validacao['colunas_criticas'][col] = {
-                'nulos': int(nulos),
-                'percentual': round(nulos / len(df) * 100, 2)
-            }
-            
-            # Marcar como falha se mais de 5% de nulos em colunas críticas
-            if nulos / len(df) > 0.05:
-                validacao['status'] = 'ALERTA'
-                logger.warning(f"Coluna '{col}' tem {nulos:,} nulos ({validacao['colunas_criticas'][col]['percentual']}%)")
-    
-    # Verificar valores inválidos
-    if 'valor' in df.columns:
-        valores_negativos = (df['valor'] <= 0).sum()
-        validacao['valores_invalidos']['valor_negativo_ou_zero'] = int(valores_negativos)
-    
-    if 'ano' in df.columns:
-        anos_invalidos = ((df['ano'] < 2000) | (df['ano'] > 2025)).sum()
-        validacao['valores_invalidos']['ano_fora_intervalo'] = int(anos_invalidos)
-    
-    if 'mes' in df.columns:
-        meses_invalidos = ((df['mes'] < 1) | (df['mes'] > 12)).sum()
-        validacao['valores_invalidos']['mes_invalido'] = int(meses_invalidos)
-    
-    # Estatísticas gerais de nulos por coluna
-    for col in df.columns:
-        nulos = df[col].isna().sum()
-        if nulos > 0:
-            validacao['valores_nulos'][col] = {
-                'nulos': int(nulos),
-                'percentual': round(nulos / len(df) * 100, 2)
-            }
+    validacao = EstatisticasQualidade().atualizar(df).resultado()
+    _alertar_colunas_criticas(validacao)
     
     logger.info(f"Validação concluída - Status: {validacao['status']}")
     
     return validacao
 
 
+def combinar_validacoes(validacoes):
+    """
+    Junta resultados de validar_qualidade calculados em partes dos dados
+    (partições ou lotes) em um único resultado equivalente ao do conjunto inteiro
+    Args:
+        validacoes: lista de dicts retornados por validar_qualidade
+    Returns:
+        dict no mesmo formato de validar_qualidade
+    """
+    acumulador = EstatisticasQualidade()
+    for validacao in validacoes:
+        acumulador.combinar(EstatisticasQualidade.de_resultado(validacao))
+    
+    combinada = acumulador.resultado()
+    _alertar_colunas_criticas(combinada)
+    return combinada
+
+
+@METRICAS.etapa("silver_gravacao")
 def salvar_silver(df):
     """
     Salva dados transformados na camada silver mantendo particionamento
@@ -176,6 +248,10 @@ def salvar_silver(df):
     
     logger.info("Salvando dados na camada silver...")
     
+    # A silver é reescrita fora do modo streaming: o estado incremental e o
+    # índice de deduplicação deixam de valer (descartados antes de gravar)
+    _reiniciar_estado_silver(silver_path)
+    
     # Verificar se tem coluna de particionamento
     if 'ano_mes' not in df.columns:
         logger.warning("Coluna ano_mes não encontrada. Salvando sem particionamento.")
@@ -198,34 +274,387 @@ def salvar_silver(df):
         arquivo_parquet = partition_path / f"dados_silver.parquet"
         grupo_clean.to_parquet(arquivo_parquet, index=False)
         
+        # Arquivos de appends incrementais anteriores já estão no arquivo novo
+        for arquivo in partition_path.glob("*.parquet"):
+            if arquivo != arquivo_parquet:
+                arquivo.unlink()
+        
         total_particoes += 1
         logger.info(f"  -> Partição {ano_mes}: {len(grupo_clean):,} registros salvos")
     
+    _remover_particoes_silver(silver_path, {str(ano_mes) for ano_mes in grupos.groups})
     logger.info(f"Total de {total_particoes} partições salvas na silver")
 
 
-def executar_pipeline():
+def listar_particoes_bronze():
+    """
+    Lista as partições ano_mes=* da camada bronze
+    Returns:
+        lista ordenada de diretórios de partição
+    """
+    bronze_path = Path("dataset/bronze")
+    
+    if not bronze_path.exists():
+        raise FileNotFoundError("Pasta bronze não encontrada. Execute primeiro a ingestão de dados.")
+    
+    concluir_compactacoes_pendentes(bronze_path)
+    particoes = sorted(bronze_path.glob("ano_mes=*/"))
+    
+    if not particoes:
+        raise FileNotFoundError("Nenhuma partição encontrada na bronze.")
+    
+    return particoes
+
+
+def ler_particao_em_lotes(particao, limite_memoria_mb=LIMITE_MEMORIA_MB, arquivos=None):
+    """
+    Lê uma partição da bronze em lotes que cabem no teto de memória
+    Partições pequenas são lidas de uma vez; as grandes, por record batches
+    Args:
+        particao: diretório ano_mes=YYYY_MM
+        limite_memoria_mb: teto de memória para um lote em transformação
+        arquivos: nomes dos arquivos a ler (padrão: todos os da partição)
+    Yields:
+        DataFrames com os registros da partição
+    """
+    if arquivos is None:
+        arquivos = sorted(particao.glob("*.parquet"))
+    else:
+        arquivos = [particao / nome for nome in sorted(arquivos)]
+    if not arquivos:
+        return
+    
+    metadados = [pq.read_metadata(arquivo) for arquivo in arquivos]
+    linhas = sum(m.num_rows for m in metadados)
+    bytes_memoria = sum(
+        m.row_group(i).total_byte_size for m in metadados for i in range(m.num_row_groups)
+    )
+    limite_bytes = limite_memoria_mb * 1024 * 1024 / FATOR_MEMORIA
+    
+    METRICAS.contar("bytes", sum(arquivo.stat().st_size for arquivo in arquivos), etapa="silver_leitura")
+    if bytes_memoria <= limite_bytes:
+        with METRICAS.etapa("silver_leitura", particao=particao.name):
+            df = pd.concat([ler_arquivo_bronze(arquivo) for arquivo in arquivos], ignore_index=True)
+        yield df
+        return
+    
+    bytes_por_linha = max(bytes_memoria / max(linhas, 1), 1)
+    linhas_por_lote = max(int(limite_bytes / bytes_por_linha), 1)
+    for arquivo in arquivos:
+        lotes = pq.ParquetFile(arquivo).iter_batches(batch_size=linhas_por_lote)
+        while True:
+            with METRICAS.etapa("silver_leitura", particao=particao.name):
+                lote = next(lotes, None)
+                df = tabela_para_pandas(lote) if lote is not None else None
+            if df is None:
+                break
+            yield df
+
+
+def _padronizar_dicionarios(tabela):
+    """
+    Usa índices int32 em todas as colunas dictionary, para que lotes com
+    quantidades diferentes de categorias tenham o mesmo esquema
+    """
+    esquema = pa.schema([
+        campo.with_type(pa.dictionary(pa.int32(), campo.type.value_type))
+        if pa.types.is_dictionary(campo.type) else campo
+        for campo in tabela.schema
+    ], metadata=tabela.schema.metadata)
+    return tabela.cast(esquema) if esquema != tabela.schema else tabela
+
+
+def _gravar_lotes_silver(lotes, silver_path, nome_arquivo="dados_silver.parquet"):
+    """
+    Grava lotes transformados na silver, um arquivo por partição ano_mes,
+    acrescentando row groups a cada lote. Os arquivos só substituem os
+    anteriores quando todos os lotes foram gravados
+    Args:
+        lotes: iterável de DataFrames transformados
+        silver_path: diretório da camada silver
+        nome_arquivo: nome do arquivo gravado em cada partição
+    Returns:
+        lista das partições gravadas
+    """
+    escritores = {}
+    try:
+        for df in lotes:
+            for ano_mes, grupo in df.groupby('ano_mes'):
+                tabela = _padronizar_dicionarios(sem_colunas_nulas(
+                    pa.Table.from_pandas(grupo.drop(columns=['ano_mes']), preserve_index=False)
+                ))
+                if ano_mes not in escritores:
+                    destino = silver_path / f"ano_mes={ano_mes}" / nome_arquivo
+                    destino.parent.mkdir(parents=True, exist_ok=True)
+                    temporario = destino.with_name(f".{destino.name}.tmp")
+                    escritores[ano_mes] = (pq.ParquetWriter(temporario, tabela.schema), temporario, destino)
+                escritor = escritores[ano_mes][0]
+                with METRICAS.etapa("silver_gravacao", particao=ano_mes):
+                    escritor.write_table(tabela.cast(escritor.schema))
+                METRICAS.contar("registros", tabela.num_rows, etapa="silver_gravacao")
+    finally:
+        for escritor, _, _ in escritores.values():
+            escritor.close()
+    
+    for _, temporario, destino in escritores.values():
+        os.replace(temporario, destino)
+    return list(escritores)
+
+
+def processar_particao(particao, limite_memoria_mb=LIMITE_MEMORIA_MB, silver_path="dataset/silver",
+                       arquivos_novos=None):
+    """
+    Lê, transforma, valida e grava uma partição da bronze, lote a lote
+    Args:
+        particao: diretório ano_mes=YYYY_MM da bronze
+        limite_memoria_mb: teto de memória para um lote em transformação
+        silver_path: diretório da camada silver
+        arquivos_novos: modo append — processa só estes arquivos da bronze,
+            descartando registros já presentes no índice de deduplicação, e grava
+            um arquivo adicional na partição silver. None reconstrói a partição.
+    Returns:
+        dict de validação dos registros gravados (None se nenhum registro sobrou)
+    """
+    particao = Path(particao)
+    silver_path = Path(silver_path)
+    ano_mes = particao.name.replace("ano_mes=", "")
+    validacoes = []
+    
+    # Hashes já vistos na partição: no append vêm do índice persistente,
+    # na reconstrução começam vazios; cobrem também duplicatas entre lotes
+    indice = IndiceDeduplicacao(silver_path / "_dedup")
+    conhecidos = indice.carregar(ano_mes) if arquivos_novos is not None else np.empty(0, dtype=np.int64)
+    
+    def lotes_transformados():
+        nonlocal conhecidos
+        for df in ler_particao_em_lotes(particao, limite_memoria_mb, arquivos_novos):
+            df = completar_hashes(df)
+            hashes = df[COLUNA_HASH].to_numpy(dtype=np.int64)
+            novos = filtrar_novos(hashes, conhecidos)
+            conhecidos = np.union1d(conhecidos, hashes[novos])
+            
+            df_silver = transformar_dados(df[novos])
+            if df_silver.empty:
+                continue
+            
+            validacoes.append(validar_qualidade(df_silver))
+            yield df_silver
+    
+    if arquivos_novos is None:
+        particoes_gravadas = _gravar_lotes_silver(lotes_transformados(), silver_path)
+        # Reconstrução: remover arquivos de appends anteriores
+        for gravada in particoes_gravadas:
+            for arquivo in (silver_path / f"ano_mes={gravada}").glob("*.parquet"):
+                if arquivo.name != "dados_silver.parquet":
+                    arquivo.unlink()
+    else:
+        # Nome determinístico: repetir o mesmo append após uma falha sobrescreve o arquivo
+        digest = hashlib.sha256("\n".join(sorted(arquivos_novos)).encode()).hexdigest()[:16]
+        particoes_gravadas = _gravar_lotes_silver(
+            lotes_transformados(), silver_path, f"dados_silver_{digest}.parquet"
+        )
+    indice.salvar(ano_mes, conhecidos)
+    
+    for gravada in particoes_gravadas:
+        logger.info(f"  -> Partição {gravada} salva na silver")
+    
+    return combinar_validacoes(validacoes) if validacoes else None
+
+
+def _processar_particoes(tarefas, limite_memoria_mb, silver_path, workers):
+    """
+    Processa partições em série ou em um pool de processos
+    Cada processo lê, transforma, valida e grava a sua partição; o teto de
+    memória é dividido entre os processos
+    Args:
+        tarefas: lista de tuplas (particao, arquivos_novos)
+    Yields:
+        tuplas (particao, validacao) na ordem em que terminam
+    """
+    if workers <= 1 or len(tarefas) <= 1:
+        for particao, arquivos_novos in tarefas:
+            yield particao, processar_particao(particao, limite_memoria_mb, silver_path, arquivos_novos)
+        return
+    
+    limite_por_worker = max(limite_memoria_mb // workers, 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = {
+            executor.submit(executar_medido, processar_particao,
+                            particao, limite_por_worker, silver_path, arquivos_novos): particao
+            for particao, arquivos_novos in tarefas
+        }
+        for futuro in as_completed(futuros):
+            validacao, metricas = futuro.result()
+            METRICAS.combinar(metricas, processo=futuros[futuro].name)
+            yield futuros[futuro], validacao
+
+
+def particoes_desatualizadas():
+    """
+    Partições cuja silver não reflete a bronze atual, sem ler dados
+    Returns:
+        lista de ano_mes novos, alterados ou removidos da bronze desde o último build
+    """
+    estado = carregar_estado(ARQUIVO_ESTADO_SILVER)
+    atuais = {}
+    for particao in listar_particoes_bronze():
+        atuais[particao.name.replace("ano_mes=", "")] = impressao_digital(particao)
+
+    alteradas = [
+        ano_mes for ano_mes, impressao in atuais.items()
+        if ano_mes not in estado
+        or estado[ano_mes].get('versao') != VERSAO_TRANSFORMACAO
+        or estado[ano_mes].get('impressao') != impressao
+    ]
+    return sorted(alteradas + [ano_mes for ano_mes in estado if ano_mes not in atuais])
+
+
+def _reiniciar_estado_silver(silver_path):
+    """Descarta o estado incremental e o índice de deduplicação (full refresh)"""
+    shutil.rmtree(silver_path / "_dedup", ignore_errors=True)
+    Path(ARQUIVO_ESTADO_SILVER).unlink(missing_ok=True)
+
+
+def _remover_particoes_silver(silver_path, manter):
+    """Remove as partições da silver cujo ano_mes não está em `manter`"""
+    for diretorio in silver_path.glob("ano_mes=*"):
+        if diretorio.name.replace("ano_mes=", "") not in manter:
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def executar_pipeline_streaming(limite_memoria_mb=LIMITE_MEMORIA_MB, incremental=False, workers=1):
+    """
+    Executa o pipeline Bronze -> Silver uma partição (ou lote) por vez,
+    com memória limitada pelo teto configurado
+    Args:
+        limite_memoria_mb: teto de memória para os lotes em transformação
+        incremental: reprocessa apenas partições novas ou alteradas na bronze,
+            reaproveitando a validação em cache das demais; partições que só
+            ganharam arquivos novos processam apenas esses arquivos
+        workers: número de processos transformando partições em paralelo
+    Returns:
+        dict de validação combinado de todas as partições
+    """
+    particoes = listar_particoes_bronze()
+    logger.info(
+        f"Encontradas {len(particoes)} partições na bronze "
+        f"(modo streaming, teto {limite_memoria_mb} MB, {workers} worker(s))"
+    )
+    
+    silver_path = Path("dataset/silver")
+    if incremental:
+        estado_anterior = carregar_estado(ARQUIVO_ESTADO_SILVER)
+    else:
+        estado_anterior = {}
+        _reiniciar_estado_silver(silver_path)
+    estado = {}
+    
+    # Classificar partições: em cache, append (só arquivos novos) ou reconstrução
+    assinaturas = {}
+    impressoes = {}
+    tarefas = []
+    for particao in particoes:
+        ano_mes = particao.name.replace("ano_mes=", "")
+        assinaturas[ano_mes] = assinaturas_arquivos(particao)
+        impressoes[ano_mes] = impressao_digital(particao)
+        anterior = estado_anterior.get(ano_mes)
+        
+        if not anterior or anterior['versao'] != VERSAO_TRANSFORMACAO:
+            tarefas.append((particao, None))
+        elif anterior['impressao'] == impressoes[ano_mes]:
+            estado[ano_mes] = anterior
+        elif all(assinaturas[ano_mes].get(nome) == a for nome, a in anterior['arquivos'].items()):
+            tarefas.append((particao, sorted(set(assinaturas[ano_mes]) - set(anterior['arquivos']))))
+        else:
+            tarefas.append((particao, None))
+    
+    arquivos_novos = dict(tarefas)
+    appends = sum(1 for novos in arquivos_novos.values() if novos is not None)
+    
+    for particao, validacao in _processar_particoes(tarefas, limite_memoria_mb, silver_path, workers):
+        ano_mes = particao.name.replace("ano_mes=", "")
+        
+        if arquivos_novos[particao] is not None:
+            # Append: somar a validação dos registros novos à que estava em cache
+            partes = [v for v in (estado_anterior[ano_mes]['validacao'], validacao) if v]
+            validacao = combinar_validacoes(partes) if partes else None
+        elif validacao is None:
+            # Nenhum registro válido: não deixar uma versão antiga na silver
+            shutil.rmtree(silver_path / f"ano_mes={ano_mes}", ignore_errors=True)
+        
+        estado[ano_mes] = {
+            'impressao': impressoes[ano_mes],
+            'arquivos': assinaturas[ano_mes],
+            'versao': VERSAO_TRANSFORMACAO,
+            'validacao': validacao,
+        }
+        salvar_estado(ARQUIVO_ESTADO_SILVER, {**estado_anterior, **estado})
+    
+    # Partições que deixaram de existir na bronze
+    indice = IndiceDeduplicacao(silver_path / "_dedup")
+    for ano_mes in set(estado_anterior) - set(estado):
+        shutil.rmtree(silver_path / f"ano_mes={ano_mes}", ignore_errors=True)
+        indice.remover(ano_mes)
+    if not incremental:
+        # Full refresh: nada que não veio desta execução fica na silver
+        _remover_particoes_silver(silver_path, {a for a, e in estado.items() if e['validacao']})
+    estado = dict(sorted(estado.items()))
+    salvar_estado(ARQUIVO_ESTADO_SILVER, estado)
+    
+    logger.info(
+        f"Partições reprocessadas: {len(tarefas)} de {len(particoes)} "
+        f"({appends} apenas com arquivos novos)"
+    )
+    
+    validacao = combinar_validacoes([e['validacao'] for e in estado.values() if e['validacao']])
+    logger.info(f"Validação concluída - Status: {validacao['status']}")
+    return validacao
+
+
+@execucao("silver")
+def executar_pipeline(streaming=False, limite_memoria_mb=LIMITE_MEMORIA_MB, incremental=False, workers=1,
+                      motor="pandas"):
     """
     Executa o pipeline completo Bronze -> Silver
+    Args:
+        streaming: processa partição a partição com memória limitada
+        limite_memoria_mb: teto de memória do modo streaming
+        incremental: (modo streaming) reprocessa só partições novas ou alteradas;
+            False equivale a um full refresh
+        workers: (modo streaming) processos transformando partições em paralelo
+        motor: "pandas", "duckdb" (SQL sobre os parquets) ou "spark" (jobs
+            PySpark, local ou em cluster); os dois últimos sempre em full refresh
     Returns:
-        tuple (DataFrame, validação)
+        tuple (DataFrame, validação); no modo streaming, no DuckDB e no Spark o DataFrame é None
     """
     try:
         logger.info("=" * 60)
         logger.info("INICIANDO PIPELINE BRONZE -> SILVER")
         logger.info("=" * 60)
         
-        # 1. Ler dados da bronze
-        df_bronze = ler_dados_bronze()
-        
-        # 2. Transformar dados
-        df_silver = transformar_dados(df_bronze)
-        
-        # 3. Validar qualidade
-        validacao = validar_qualidade(df_silver)
-        
-        # 4. Salvar na silver
-        salvar_silver(df_silver)
+        if motor == "duckdb":
+            from services.silver_duckdb import executar_pipeline_duckdb
+            validacao = executar_pipeline_duckdb()
+            df_silver = None
+        elif motor == "spark":
+            from services.motor_spark import executar_pipeline_spark
+            validacao = executar_pipeline_spark()
+            df_silver = None
+        elif streaming:
+            validacao = executar_pipeline_streaming(limite_memoria_mb, incremental, workers)
+            df_silver = None
+        else:
+            # 1. Ler dados da bronze
+            df_bronze = ler_dados_bronze()
+            
+            # 2. Transformar dados
+            df_silver = transformar_dados(df_bronze)
+            
+            # 3. Validar qualidade
+            validacao = validar_qualidade(df_silver)
+            
+            # 4. Salvar na silver
+            salvar_silver(df_silver)
         
         logger.info("=" * 60)
         logger.info("PIPELINE CONCLUÍDO COM SUCESSO")